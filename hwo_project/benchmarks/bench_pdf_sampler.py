@@ -0,0 +1,59 @@
+# Benchmark of the inverse-CDF sampler used to draw planets from the PDF grid
+
+import argparse
+import time
+
+import numpy as np
+
+from hwo_project.data import data_utils
+from hwo_project.planet_simulations import gen_planets
+
+
+def bench_sampler(sizes, chunk_size=10_000_000, spread_in_cell=False, seed=42):
+    """
+    Time the planet grid sampler for a range of draw counts.
+
+    Draws are made in chunks of at most chunk_size so that 10^8 draws fit in memory.
+
+    :return: List of (ndraws, seconds, draws per second) tuples.
+    """
+    grid = data_utils.load_data('pdf_grid')
+    R = gen_planets.R_BINS
+    P = gen_planets.P_BINS
+    rng = np.random.default_rng(seed)
+
+    results = []
+    for ndraws in sizes:
+        start = time.perf_counter()
+        cdf = gen_planets.build_grid_cdf(grid)
+        remaining = ndraws
+        while remaining > 0:
+            nchunk = min(remaining, chunk_size)
+            gen_planets.sample_planet_grid(R, P, cdf, grid.shape, nchunk, rng=rng,
+                                           spread_in_cell=spread_in_cell)
+            remaining -= nchunk
+        elapsed = time.perf_counter() - start
+        results.append((ndraws, elapsed, ndraws / elapsed))
+
+    return results
+
+
+def parser():
+    parser = argparse.ArgumentParser(description='Benchmark the planet PDF grid sampler.')
+    parser.add_argument('--max_exp', type=int, default=8, help='Largest number of draws as a power of 10.')
+    parser.add_argument('--min_exp', type=int, default=4, help='Smallest number of draws as a power of 10.')
+    parser.add_argument('--spread_in_cell', action='store_true', help='Spread draws uniformly inside each grid cell.')
+    return parser
+
+
+def main():
+    args = parser().parse_args()
+    sizes = [10**exp for exp in range(args.min_exp, args.max_exp + 1)]
+
+    print(f"{'draws':>12} {'time (s)':>10} {'draws/s':>12}")
+    for ndraws, elapsed, rate in bench_sampler(sizes, spread_in_cell=args.spread_in_cell):
+        print(f"{ndraws:>12d} {elapsed:>10.3f} {rate:>12.3e}")
+
+
+if __name__ == '__main__':
+    main()
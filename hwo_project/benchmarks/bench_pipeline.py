@@ -0,0 +1,330 @@
+# Scaling benchmarks for every stage of the catalog pipeline
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from hwo_project.data import data_utils
+from hwo_project.models import obj_models
+from hwo_project.planet_simulations import gen_planets, gen_inclinations, dist_planets_to_stars, make_planet_catalog, catalog_utils
+from hwo_project.planet_simulations.pdf import gen_r_vs_A_pdf
+
+# Registered benchmarks, name -> (setup function, largest size to run)
+BENCHMARKS = {}
+
+
+def benchmark(name, max_size=None):
+    """
+    Register a benchmark. The decorated function takes the problem size, builds the
+    synthetic inputs and returns a function without arguments that runs the timed work.
+
+    :param name: Name of the benchmark.
+    :param max_size: Largest size to run, for stages that are too slow at full scale.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, max_size)
+        return setup
+    return register
+
+
+def make_stars(num_stars, seed=0):
+    """
+    Make a deterministic synthetic star catalog with the columns of star_data.csv.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'ra': rng.uniform(0, 360, num_stars),
+        'dec': rng.uniform(-90, 90, num_stars),
+        'tic_id': np.char.add('S', np.arange(num_stars).astype(str)),
+        'sy_dist': rng.uniform(1, 30, num_stars),
+        'sy_disterr': rng.uniform(0, 0.5, num_stars),
+        'st_lum': rng.uniform(-3, 3, num_stars),
+        'st_mass': rng.uniform(0.1, 2, num_stars),
+        'inclination': np.degrees(np.arcsin(rng.uniform(0, 1, num_stars))),
+    })
+
+
+def make_planets(num_planets, num_stars, seed=0):
+    """
+    Make deterministic synthetic assigned planets with the columns of assigned_planets.csv.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'planet_radius': rng.uniform(0.67, 17, num_planets),
+        'Period(Days)': rng.integers(10, 640, num_planets),
+        'host_star_id': np.char.add('S', rng.integers(0, num_stars, num_planets).astype(str)),
+        'planet_name': np.char.add('Planet_', np.arange(1, num_planets + 1).astype(str)),
+    })
+
+
+def make_catalog(num_planets, seed=0):
+    """
+    Make a deterministic synthetic planet catalog with the columns used by the yield counts.
+    """
+    rng = np.random.default_rng(seed)
+    planet_types = np.array(['mercuries', 'venuses', 'earths', 'frozen_planets',
+                             'neptunes', 'hot_jupiters', 'gas_giants'], dtype=object)
+    return pd.DataFrame({
+        'contrast': 10**rng.uniform(-12, -6, num_planets),
+        'angular_separation': rng.uniform(0, 0.5, num_planets),
+        'planet_type': planet_types[rng.integers(0, len(planet_types), num_planets)],
+    })
+
+
+def stars_for(num_planets):
+    # About as many planets per star as the SAG13 occurrence rates give
+    return max(1, int(num_planets / 1.4))
+
+
+@benchmark('simulate_random_planets')
+def bench_simulate_random_planets(size):
+    grid = data_utils.load_data('pdf_grid')
+    return lambda: gen_planets.simulate_random_planets(gen_planets.R_BINS, gen_planets.P_BINS, grid, nplanets=size, seed=0)
+
+
+@benchmark('generate_planets_per_star')
+def bench_generate_planets_per_star(size):
+    return lambda: dist_planets_to_stars.generate_planets_per_star(stars_for(size), size, 7, 1, seed=0, verbose=False)
+
+
+@benchmark('assign_planets_to_stars')
+def bench_assign_planets_to_stars(size):
+    planets_per_star = dist_planets_to_stars.generate_planets_per_star(stars_for(size), size, 7, 1, seed=0, verbose=False)
+    return lambda: dist_planets_to_stars.assign_planets_to_stars(planets_per_star, size, seed=0)
+
+
+@benchmark('assign_star_ids_to_planets')
+def bench_assign_star_ids_to_planets(size):
+    num_stars = stars_for(size)
+    stars_df = make_stars(num_stars)
+    planets_df = make_planets(size, num_stars)[['planet_radius', 'Period(Days)']]
+    planets_per_star = dist_planets_to_stars.generate_planets_per_star(num_stars, size, 7, 1, seed=0, verbose=False)
+    planet_indices = dist_planets_to_stars.assign_planets_to_stars(planets_per_star, size, seed=0)
+    return lambda: dist_planets_to_stars.assign_star_ids_to_planets(planets_df, stars_df, planet_indices)
+
+
+@benchmark('create_planet_objects', max_size=10**4)
+def bench_create_planet_objects(size):
+    num_stars = stars_for(size)
+    stars_df = make_stars(num_stars)
+    planets_df = make_planets(size, num_stars)
+    stars_dict = make_planet_catalog.create_star_objects(stars_df)
+    # The per-object path can not handle planets without a type, keep those it can classify
+    types = make_planet_catalog.create_planet_columns(planets_df, stars_df)[1]
+    planets_df = planets_df[pd.notna(types)]
+    return lambda: make_planet_catalog.create_planet_objects(planets_df, stars_dict)
+
+
+@benchmark('create_planet_columns')
+def bench_create_planet_columns(size):
+    num_stars = stars_for(size)
+    stars_df = make_stars(num_stars)
+    planets_df = make_planets(size, num_stars)
+    return lambda: make_planet_catalog.create_planet_columns(planets_df, stars_df, rng=np.random.default_rng(0))
+
+
+@benchmark('create_planet_population')
+def bench_create_planet_population(size):
+    num_stars = stars_for(size)
+    stars_df = make_stars(num_stars)
+    planets_df = make_planets(size, num_stars)
+    return lambda: make_planet_catalog.create_planet_population(planets_df, stars_df, rng=np.random.default_rng(0))
+
+
+@benchmark('generate_mock_i')
+def bench_generate_mock_i(size):
+    return lambda: gen_inclinations.generate_mock_i(size, seed=0)
+
+
+@benchmark('sample_planet_inclinations')
+def bench_sample_planet_inclinations(size):
+    num_stars = max(1, size // 3)
+    host_inclination = gen_inclinations.sample_inclinations(num_stars, rng=0)
+    host_idx = np.random.default_rng(0).integers(0, num_stars, size)
+    out = np.empty(size)
+    return lambda: gen_inclinations.sample_planet_inclinations(host_inclination, host_idx, rng=0, out=out)
+
+
+@benchmark('compute_integral')
+def bench_compute_integral(size):
+    # A grid with about size cells
+    num_edges = int(np.sqrt(size)) + 1
+    R = np.geomspace(0.67, 17, num_edges)
+    P = np.geomspace(10, 640, num_edges) / 365.25
+    return lambda: gen_r_vs_A_pdf.compute_integral(R, P)
+
+
+@benchmark('compute_integral_dblquad', max_size=10**3)
+def bench_compute_integral_dblquad(size):
+    num_edges = int(np.sqrt(size)) + 1
+    R = np.geomspace(0.67, 17, num_edges)
+    P = np.geomspace(10, 640, num_edges) / 365.25
+    return lambda: gen_r_vs_A_pdf.compute_integral(R, P, method='dblquad')
+
+
+@benchmark('get_num_observable_planets')
+def bench_get_num_observable_planets(size):
+    catalog = make_catalog(size)
+    tele_dict = data_utils.load_data('tele_constraints')
+    return lambda: catalog_utils.get_num_observable_planets(catalog, tele_dict)
+
+
+@benchmark('observability_index')
+def bench_observability_index(size):
+    # Build the index and count 50 telescope configurations for every planet type
+    catalog = make_catalog(size)
+    rng = np.random.default_rng(0)
+    planet_types = catalog['planet_type'].unique()
+    iwa = rng.uniform(0, 0.5, (50, 1))
+    contrast_floor = 10**rng.uniform(-12, -6, (50, 1))
+    return lambda: catalog_utils.ObservabilityIndex(catalog).count_batch(iwa, contrast_floor, planet_types)
+
+
+@benchmark('yield_hypercube')
+def bench_yield_hypercube(size):
+    # A 50 x 20 x 40 telescope design sweep
+    catalog = make_catalog(size)
+    return lambda: catalog_utils.get_yield_hypercube(catalog, np.linspace(2, 15, 50), np.linspace(400, 1100, 20),
+                                                     np.geomspace(1e-12, 1e-7, 40))
+
+
+def run_benchmark(name, size, repeat=3, measure_memory=True):
+    """
+    Run one benchmark at one size.
+
+    The wall time is the best of repeat runs, stopping early once a run takes over a
+    second. Peak memory is measured with tracemalloc in a separate run, so its
+    overhead does not affect the timings.
+
+    :return: Dictionary with the results.
+    """
+    setup, _ = BENCHMARKS[name]
+    func = setup(size)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if times[-1] > 1:
+            break
+    wall = min(times)
+
+    peak_mb = None
+    if measure_memory:
+        tracemalloc.start()
+        func()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return {'name': name, 'size': size, 'wall_s': wall, 'items_per_s': size / wall, 'peak_mem_mb': peak_mb,
+            'repeats': len(times)}
+
+
+def run_suite(names=None, min_exp=3, max_exp=7, repeat=3, measure_memory=True, verbose=True):
+    """
+    Run the benchmark suite.
+
+    :param names: Benchmarks to run, None for all of them.
+    :param min_exp: Smallest size as a power of 10.
+    :param max_exp: Largest size as a power of 10.
+    :return: Dictionary with the run metadata and a list of results.
+    """
+    if names is None:
+        names = list(BENCHMARKS)
+
+    results = []
+    for name in names:
+        _, max_size = BENCHMARKS[name]
+        for exp in range(min_exp, max_exp + 1):
+            size = 10**exp
+            if max_size is not None and size > max_size:
+                break
+            result = run_benchmark(name, size, repeat=repeat, measure_memory=measure_memory)
+            results.append(result)
+            if verbose:
+                print(format_result(result))
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def format_result(result, ratio=None):
+    peak = '-' if result['peak_mem_mb'] is None else f"{result['peak_mem_mb']:.1f}"
+    line = (f"{result['name']:<28} {result['size']:>10d} {result['wall_s']:>10.4f} s "
+            f"{result['items_per_s']:>12.3e} /s {peak:>10} MB")
+    if ratio is not None:
+        line += f"  x{ratio:.2f} vs baseline"
+    return line
+
+
+def compare_to_baseline(report, baseline, tolerance=0.2):
+    """
+    Compare the throughput of a run against a stored baseline run.
+
+    :param report: Report from run_suite.
+    :param baseline: Report from an earlier run_suite, e.g. loaded from its JSON file.
+    :param tolerance: Relative throughput drop counted as a regression.
+    :return: List of (result, throughput ratio, is_regression) for the results present in both runs.
+    """
+    reference = {(result['name'], result['size']): result for result in baseline['results']}
+
+    comparison = []
+    for result in report['results']:
+        base = reference.get((result['name'], result['size']))
+        if base is None:
+            continue
+        ratio = result['items_per_s'] / base['items_per_s']
+        comparison.append((result, ratio, ratio < 1 - tolerance))
+
+    return comparison
+
+
+def parser():
+    parser = argparse.ArgumentParser(description='Run the pipeline scaling benchmarks.')
+    parser.add_argument('--benchmarks', type=str, nargs='+', default=None, choices=list(BENCHMARKS), help='Benchmarks to run, defaults to all.')
+    parser.add_argument('--min_exp', type=int, default=3, help='Smallest size as a power of 10.')
+    parser.add_argument('--max_exp', type=int, default=7, help='Largest size as a power of 10.')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs per size.')
+    parser.add_argument('--no_memory', action='store_true', help='Skip the peak memory measurement.')
+    parser.add_argument('--out_file', type=str, default=None, help='JSON file to save the results to.')
+    parser.add_argument('--baseline', type=str, default=None, help='JSON file of an earlier run to compare against.')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Relative throughput drop counted as a regression.')
+    return parser
+
+
+def main():
+    args = parser().parse_args()
+
+    report = run_suite(args.benchmarks, min_exp=args.min_exp, max_exp=args.max_exp, repeat=args.repeat,
+                       measure_memory=not args.no_memory)
+
+    if args.out_file is not None:
+        with open(args.out_file, 'w') as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline is not None:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        comparison = compare_to_baseline(report, baseline, tolerance=args.tolerance)
+        print('Comparison against baseline:')
+        for result, ratio, regression in comparison:
+            print(format_result(result, ratio) + ('  REGRESSION' if regression else ''))
+        if any(regression for _, _, regression in comparison):
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+# Startup time of the command line entry points, measured in fresh interpreters
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Entry point name -> module imported by its bin/ script
+ENTRY_POINTS = {
+    'hwo_project_gen_planet_catalog': 'hwo_project.scripts.gen_planet_catalog',
+    'hwo_project_run_realizations': 'hwo_project.scripts.run_realizations',
+    'hwo_project_show_contrast_plot': 'hwo_project.scripts.show_contrast_plot',
+    'hwo_project_render_figures': 'hwo_project.scripts.render_figures',
+}
+
+# Plotting and interactive packages that non-plotting runs should not import
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'IPython', 'tqdm', 'scipy']
+
+_PROBE = (
+    'import sys, json, importlib\n'
+    'importlib.import_module({module!r})\n'
+    'print(json.dumps([name for name in {heavy!r} if name in sys.modules]))\n'
+)
+
+
+def measure_startup(module, repeat=5):
+    """
+    Time importing an entry point module in fresh interpreters.
+
+    :param module: Module imported by the entry point.
+    :param repeat: Number of interpreters to start.
+    :return: Dictionary with the median and min wall time (in seconds), the interpreter
+        baseline subtracted, and the heavy modules the import pulled in.
+    """
+    base = np.median([_time_interpreter('pass')[0] for _ in range(repeat)])
+    probe = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    runs = [_time_interpreter(probe) for _ in range(repeat)]
+    times = np.array([elapsed for elapsed, _ in runs]) - base
+
+    return {
+        'module': module,
+        'median_s': float(np.median(times)),
+        'min_s': float(np.min(times)),
+        'heavy_modules': json.loads(runs[-1][1]),
+    }
+
+
+def _time_interpreter(code):
+    """
+    Run code in a fresh interpreter and get its wall time and standard output.
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def parser():
+    parser = argparse.ArgumentParser(description='Benchmark the startup time of the command line entry points.')
+    parser.add_argument('--entry_points', type=str, nargs='+', default=None, choices=list(ENTRY_POINTS), help='Entry points to time, defaults to all.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per entry point.')
+    parser.add_argument('--out_file', type=str, default=None, help='JSON file to save the results to.')
+    return parser
+
+
+def main():
+    args = parser().parse_args()
+    names = args.entry_points or list(ENTRY_POINTS)
+
+    results = {}
+    print(f"{'entry point':<32} {'median (s)':>10} {'min (s)':>10}  heavy modules")
+    for name in names:
+        result = measure_startup(ENTRY_POINTS[name], repeat=args.repeat)
+        results[name] = result
+        print(f"{name:<32} {result['median_s']:>10.3f} {result['min_s']:>10.3f}  {', '.join(result['heavy_modules']) or '-'}")
+
+    if args.out_file:
+        with open(args.out_file, 'w') as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Benchmark of the table storage formats used between pipeline stages
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from hwo_project.data import data_utils
+
+
+def make_synthetic_catalog(nrows, seed=42):
+    """
+    Make a synthetic planet catalog with the columns of updated_planets.csv.
+    """
+    rng = np.random.default_rng(seed)
+    planet_types = np.array(['mercuries', 'venuses', 'earths', 'frozen_planets',
+                             'neptunes', 'hot_jupiters', 'gas_giants'], dtype=object)
+    return pd.DataFrame({
+        'planet_radius': rng.uniform(0.67, 17, nrows),
+        'Period(Days)': rng.integers(10, 640, nrows),
+        'host_star_id': np.char.add('S', rng.integers(10**8, 10**9, nrows).astype(str)),
+        'planet_name': np.char.add('Planet_', np.arange(1, nrows + 1).astype(str)),
+        'contrast': 10**rng.uniform(-12, -6, nrows),
+        'planet_type': planet_types[rng.integers(0, len(planet_types), nrows)],
+        'angular_separation': rng.uniform(0, 0.5, nrows),
+        'orbital_radius': rng.uniform(0.05, 2.5, nrows),
+        'eff_orbital_radius': 10**rng.uniform(-4, 3, nrows),
+    })
+
+
+def get_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def bench_storage(sizes, formats=('csv', 'npz', 'columns'), columns=('contrast', 'angular_separation', 'planet_type')):
+    """
+    Time writing, full loads and column-projected loads of the table formats.
+
+    :return: List of dictionaries with the results for every size and format.
+    """
+    results = []
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        for nrows in sizes:
+            df = make_synthetic_catalog(nrows)
+            for fmt in formats:
+                path = os.path.join(tmp_dir, 'catalog' + data_utils.TABLE_FORMATS[fmt])
+
+                start = time.perf_counter()
+                data_utils.write_table(df, path)
+                write_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                loaded = data_utils.read_table(path, mmap_mode=None)
+                load_time = time.perf_counter() - start
+
+                start = time.perf_counter()
+                projected = data_utils.read_table(path, columns=list(columns))
+                # Touch the data so memory mapped columns are actually read
+                projected['contrast'].to_numpy().sum()
+                projected_time = time.perf_counter() - start
+
+                results.append({'rows': nrows, 'format': fmt, 'size_mb': get_size(path) / 1e6,
+                                'write_s': write_time, 'load_s': load_time, 'projected_load_s': projected_time})
+                del loaded, projected
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    return results
+
+
+def parser():
+    parser = argparse.ArgumentParser(description='Benchmark the table storage formats.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10**6, 10**7], help='Number of rows to benchmark.')
+    return parser
+
+
+def main():
+    args = parser().parse_args()
+    print(pd.DataFrame(bench_storage(args.sizes)).to_string(index=False, float_format='%.3f'))
+
+
+if __name__ == '__main__':
+    main()
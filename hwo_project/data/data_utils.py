@@ -1,13 +1,30 @@
 import os
+import collections
+import copy
+import functools
+import shutil
+import threading
 import importlib.resources as pkg_resources
 import pandas as pd
 import numpy as np
 import json
 
-# Load the data
-def load_data(filename='planet_catalog', get_path=False,sep=','):
-    # Define the mapping of filenames to their respective paths
-    data_paths = {
+# Table formats, csv is the plain text export, 'columns' is a directory with one
+# memory-mappable .npy file per column and 'npz' is a compressed NumPy archive
+TABLE_FORMATS = {'csv': '.csv', 'columns': '.columns', 'npz': '.npz'}
+
+# Process-wide cache of loaded datasets, keyed by path and read options and
+# validated against the file mtime and size, least recently used first
+CACHE_MAX_BYTES = 2 * 1024**3
+_data_cache = collections.OrderedDict()
+_data_cache_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=None)
+def get_data_paths():
+    """
+    Get the mapping of dataset names to their paths, built once per process.
+    """
+    return {
         'planet_catalog': os.path.join(pkg_resources.files('hwo_project'), 'data/updated_planets.csv'),
         'random_planets': os.path.join(pkg_resources.files('hwo_project'), 'data/random_planets.csv'),
         'assigned_planets': os.path.join(pkg_resources.files('hwo_project'), 'data/assigned_planets.csv'),
@@ -18,19 +35,69 @@ def load_data(filename='planet_catalog', get_path=False,sep=','):
         'raw_stars': os.path.join(pkg_resources.files('hwo_project'), 'star_data_extraction/hpic_data.txt')
     }
 
+# Load the data
+def load_data(filename='planet_catalog', get_path=False,sep=',', fmt='csv', columns=None, mmap_mode='r', cache=True,
+              data_dir=None):
+    """
+    Load a dataset of the project, or get its path.
+
+    Loaded datasets are cached for the whole process, repeated loads of an
+    unchanged file return a view of the cached data. Arrays come back as read-only
+    views, copy them before modifying values in place. Tables can be modified, the
+    changes never reach the cached table, see _shared_view.
+
+    :param filename: Name of the dataset.
+    :param get_path: Return the path of the dataset instead of loading it.
+    :param sep: Separator of text tables.
+    :param fmt: Storage format of the stage tables, one of TABLE_FORMATS.
+    :param columns: Columns to read from a table, None for all of them.
+    :param mmap_mode: Memory-map mode for the 'columns' format, None to read into memory.
+    :param cache: Use the process-wide dataset cache.
+    :param data_dir: Directory to use instead of the package data directories, e.g. the output of a pipeline run.
+    :return: The dataset, or its path.
+    """
+    # The pipeline stage tables can also be stored in a binary format
+    stage_tables = ['planet_catalog', 'random_planets', 'assigned_planets', 'star_catalog']
+
     # Get the data path based on the filename
-    data_path = data_paths.get(filename)
+    data_path = get_data_paths().get(filename)
 
     if data_path is None:
         print('No data found for filename:', filename)
         return None
 
+    if filename in stage_tables and fmt != 'csv':
+        if fmt not in TABLE_FORMATS:
+            raise ValueError(f"Unknown table format {fmt}, use one of {list(TABLE_FORMATS)}.")
+        data_path = os.path.splitext(data_path)[0] + TABLE_FORMATS[fmt]
+
+    if data_dir is not None:
+        data_path = os.path.join(data_dir, os.path.basename(data_path))
+
+    if get_path:
+        return data_path
+
+    if not cache:
+        return _read_data(data_path, sep, columns, mmap_mode)
+
+    key = (data_path, sep, None if columns is None else tuple(columns), mmap_mode)
+    data = _cache_get(key)
+    if data is None:
+        data = _read_data(data_path, sep, columns, mmap_mode)
+        if data is None:
+            return None
+        _cache_put(key, data)
+
+    return _shared_view(data)
+
+def _read_data(data_path, sep, columns, mmap_mode):
     # Load the data based on the file extension
     if data_path.endswith('.csv'):
-        data = pd.read_csv(data_path)
-
+        data = pd.read_csv(data_path, usecols=columns)
+    elif data_path.endswith('.columns') or data_path.endswith('.npz'):
+        data = read_table(data_path, columns=columns, mmap_mode=mmap_mode)
     elif data_path.endswith('.txt'):
-        data = pd.read_csv(data_path,sep=sep)
+        data = pd.read_csv(data_path,sep=sep, usecols=columns)
     elif data_path.endswith('.npy'):
         data = np.load(data_path)
     elif data_path.endswith('.json'):
@@ -40,22 +107,370 @@ def load_data(filename='planet_catalog', get_path=False,sep=','):
         print('Data format not supported.')
         return None
 
-    if get_path:
-        return data_path
+    return data
+
+def _file_signature(data_path):
+    """
+    Get the (mtime, size) signature of a data file, for directory tables the
+    meta.json or parts.json file that is written last.
+    """
+    if os.path.exists(os.path.join(data_path, 'parts.json')):
+        data_path = os.path.join(data_path, 'parts.json')
+    elif data_path.endswith('.columns'):
+        data_path = os.path.join(data_path, 'meta.json')
+    stat = os.stat(data_path)
+    return stat.st_mtime_ns, stat.st_size
+
+def get_data_signature(filename, fmt='csv'):
+    """
+    Get the (mtime, size) signature of a dataset file, the one the dataset cache is invalidated with.
+
+    Objects built from a dataset can be kept as long as its signature is unchanged.
+
+    :param filename: Name of the dataset.
+    :param fmt: Storage format of the stage tables, one of TABLE_FORMATS.
+    """
+    return _file_signature(load_data(filename, get_path=True, fmt=fmt))
+
+def _data_nbytes(data):
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=True).sum())
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    return 0
+
+def _cache_get(key):
+    try:
+        signature = _file_signature(key[0])
+    except OSError:
+        return None
+
+    with _data_cache_lock:
+        entry = _data_cache.get(key)
+        if entry is None:
+            return None
+        if entry['signature'] != signature:
+            # The file changed on disk
+            del _data_cache[key]
+            return None
+        _data_cache.move_to_end(key)
+        return entry['data']
+
+def _cache_put(key, data):
+    try:
+        signature = _file_signature(key[0])
+    except OSError:
+        return
+
+    nbytes = _data_nbytes(data)
+    if nbytes > CACHE_MAX_BYTES:
+        return
+
+    if isinstance(data, np.ndarray):
+        data.flags.writeable = False
+
+    with _data_cache_lock:
+        _data_cache[key] = {'signature': signature, 'nbytes': nbytes, 'data': data}
+        _data_cache.move_to_end(key)
+
+        # Evict the least recently used datasets until the cache fits
+        total = sum(entry['nbytes'] for entry in _data_cache.values())
+        while total > CACHE_MAX_BYTES and len(_data_cache) > 1:
+            _, entry = _data_cache.popitem(last=False)
+            total -= entry['nbytes']
+
+def _pandas_copy_on_write():
+    """
+    Check whether pandas copies data shared between DataFrames before writing to it.
+
+    Copy-on-Write is always on from pandas 3, older versions need the mode.copy_on_write option.
+    """
+    if int(pd.__version__.split('.')[0]) >= 3:
+        return True
+    try:
+        return pd.get_option('mode.copy_on_write') is True
+    except KeyError:
+        # pandas without the option
+        return False
+
+def _shared_view(data):
+    """
+    Get a view of cached data that callers can modify without changing the cached data.
+
+    Arrays are read-only views. DataFrames are shallow copies under pandas
+    Copy-on-Write, which copies a column before the first write to it, and deep
+    copies otherwise, since in-place writes to a shallow copy would reach the cache.
+    """
+    if isinstance(data, pd.DataFrame):
+        return data.copy(deep=not _pandas_copy_on_write())
+    if isinstance(data, np.ndarray):
+        return data.view()
+    return copy.deepcopy(data)
+
+def clear_cache(data_path=None):
+    """
+    Drop cached datasets, all of them or only those loaded from data_path.
+    """
+    with _data_cache_lock:
+        if data_path is None:
+            _data_cache.clear()
+            return
+        for key in [key for key in _data_cache if key[0] == data_path]:
+            del _data_cache[key]
+
+def get_cache_info():
+    """
+    Get the number of cached datasets and their total size in bytes.
+    """
+    with _data_cache_lock:
+        return len(_data_cache), sum(entry['nbytes'] for entry in _data_cache.values())
+
+def save_data(df, filename, fmt='csv', data_dir=None):
+    """
+    Save a pipeline stage table in the given format.
+
+    :param df: DataFrame to save.
+    :param filename: Name of the dataset, see load_data.
+    :param fmt: Storage format, one of TABLE_FORMATS.
+    :param data_dir: Directory to save to instead of the package data directory.
+    :return: Path the table was saved to.
+    """
+    out_path = load_data(filename, get_path=True, fmt=fmt, data_dir=data_dir)
+    write_table(df, out_path)
+    return out_path
+
+def _encode_column(series):
+    """
+    Encode a column as a plain NumPy array, text columns become integer codes plus categories.
+    """
+    if series.dtype.kind in 'biufcmM':
+        return series.to_numpy(), None
+
+    categorical = pd.Categorical(series)
+    return categorical.codes, np.asarray(categorical.categories, dtype=str)
+
+def _decode_column(values, categories):
+    if categories is None:
+        return values
+    return pd.Categorical.from_codes(values, categories)
+
+def remove_table(path):
+    """
+    Remove the table at a path, a file or a directory of columns or parts, and drop it from the cache.
+    """
+    clear_cache(path)
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def write_table(df, path):
+    """
+    Write a DataFrame to a table file, the format is given by the extension of the path.
+
+    '.csv' writes plain text, '.columns' writes a directory with one .npy file per
+    column and '.npz' writes a compressed NumPy archive. Text columns are stored as
+    categorical codes in the binary formats, which also keep the scalar entries of
+    df.attrs. The index is not saved. Any existing table at the path is replaced,
+    including a chunked one from ChunkedTableWriter.
+
+    :param df: DataFrame to save.
+    :param path: Output path.
+    """
+    remove_table(path)
+
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+        return
+
+    arrays = {}
+    meta = {'columns': [], 'categorical': [],
+            'attrs': {key: value for key, value in df.attrs.items() if isinstance(value, (str, int, float, bool))}}
+    for i, column in enumerate(df.columns):
+        key = f'col_{i:03d}'
+        values, categories = _encode_column(df[column])
+        arrays[key] = values
+        if categories is not None:
+            arrays[key + '_categories'] = categories
+        meta['columns'].append(column)
+        meta['categorical'].append(categories is not None)
+
+    if path.endswith('.npz'):
+        np.savez_compressed(path, __meta__=np.array(json.dumps(meta)), **arrays)
+    elif path.endswith('.columns'):
+        os.makedirs(path, exist_ok=True)
+        for key, values in arrays.items():
+            np.save(os.path.join(path, key + '.npy'), values)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump(meta, f)
     else:
-        return data
+        raise ValueError(f"Unsupported table extension: {path}")
+
+def read_table(path, columns=None, mmap_mode='r'):
+    """
+    Read a table written by write_table.
+
+    Only the requested columns are read, and in the '.columns' format they are
+    memory mapped rather than loaded.
+
+    :param path: Path of the table.
+    :param columns: Columns to read, None for all of them.
+    :param mmap_mode: Memory-map mode for the '.columns' format, None to read into memory.
+    :return: DataFrame with the table.
+    """
+    if path.endswith('.csv'):
+        return pd.read_csv(path, usecols=columns)
+
+    if os.path.exists(os.path.join(path, 'parts.json')):
+        # Table written in chunks by ChunkedTableWriter
+        return pd.concat(list(iter_table_chunks(path, columns=columns, mmap_mode=mmap_mode)), ignore_index=True)
+
+    if path.endswith('.npz'):
+        # Decode the columns before the archive is closed, NpzFile members are read on access
+        with np.load(path) as archive:
+            meta = json.loads(archive['__meta__'].item())
+            return _decode_table(meta, lambda key: archive[key], columns)
+
+    if path.endswith('.columns'):
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        return _decode_table(meta, lambda key: np.load(os.path.join(path, key + '.npy'), mmap_mode=mmap_mode), columns)
+
+    raise ValueError(f"Unsupported table extension: {path}")
+
+def _decode_table(meta, load, columns=None):
+    """
+    Build the DataFrame of a table from its metadata and a function loading its arrays by key.
+    """
+    if columns is None:
+        columns = meta['columns']
+
+    data = {}
+    for column in columns:
+        i = meta['columns'].index(column)
+        key = f'col_{i:03d}'
+        categories = load(key + '_categories') if meta['categorical'][i] else None
+        data[column] = _decode_column(load(key), categories)
+
+    df = pd.DataFrame(data, columns=columns, copy=False)
+    df.attrs.update(meta.get('attrs', {}))
+    return df
+
+class ChunkedTableWriter:
+    def __init__(self, path):
+        """
+        Write a table chunk by chunk, so it never has to be held in memory at once.
+
+        '.csv' tables are appended to a single file, the binary formats become a
+        directory of parts (one write_table file per chunk) listed in parts.json.
+        Any existing table at the path is replaced. read_table reads the whole
+        table back and iter_table_chunks reads it one part at a time.
+
+        :param path: Output path, the format is given by its extension.
+        """
+        self.path = path
+        self.num_chunks = 0
+        self.num_rows = 0
+        self.parts = []
+
+        remove_table(path)
+
+        if not path.endswith('.csv'):
+            self.ext = os.path.splitext(path)[1]
+            if self.ext not in TABLE_FORMATS.values():
+                raise ValueError(f"Unsupported table extension: {path}")
+            os.makedirs(path)
+
+    def append(self, df):
+        """
+        Append a chunk of rows to the table.
+        """
+        if self.path.endswith('.csv'):
+            df.to_csv(self.path, mode='a', header=self.num_chunks == 0, index=False)
+        else:
+            part = f'part_{self.num_chunks:05d}{self.ext}'
+            write_table(df, os.path.join(self.path, part))
+            self.parts.append(part)
+            with open(os.path.join(self.path, 'parts.json'), 'w') as f:
+                json.dump({'parts': self.parts}, f)
+
+        self.num_chunks += 1
+        self.num_rows += len(df)
+
+    def close(self):
+        clear_cache(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def iter_table_chunks(path, columns=None, chunk_size=1_000_000, mmap_mode='r'):
+    """
+    Iterate over a table in chunks, one part at a time for tables written by ChunkedTableWriter.
+
+    :param path: Path of the table.
+    :param columns: Columns to read, None for all of them.
+    :param chunk_size: Number of rows per chunk for '.csv' tables.
+    :param mmap_mode: Memory-map mode for the '.columns' format, None to read into memory.
+    :return: Generator of DataFrames.
+    """
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+
+    parts_path = os.path.join(path, 'parts.json')
+    if not os.path.exists(parts_path):
+        yield read_table(path, columns=columns, mmap_mode=mmap_mode)
+        return
+
+    with open(parts_path, 'r') as f:
+        parts = json.load(f)['parts']
+    for part in parts:
+        yield read_table(os.path.join(path, part), columns=columns, mmap_mode=mmap_mode)
+
+class LazyCatalog:
+    def __init__(self, fmt='csv'):
+        """
+        Lazy access to the planet and star catalogs, a table is only loaded
+        (through the dataset cache) when it is first used.
+
+        :param fmt: Storage format of the tables, one of TABLE_FORMATS.
+        """
+        self.fmt = fmt
 
-def quick_catalog_load():
+    @property
+    def planet_catalog(self):
+        return load_data('planet_catalog', fmt=self.fmt)
+
+    @property
+    def star_catalog(self):
+        return load_data('star_catalog', fmt=self.fmt)
+
+def lazy_catalog_load(fmt='csv'):
+    """
+    Lazy version of quick_catalog_load, only the tables that are used get loaded.
+    """
+    return LazyCatalog(fmt=fmt)
+
+def quick_catalog_load(fmt='csv'):
     """
     Quick load the data for the project.
     """
     # Load the planet catalog
-    planet_catalog = load_data('planet_catalog')
+    planet_catalog = load_data('planet_catalog', fmt=fmt)
     # Load the star catalog
-    star_catalog = load_data('star_catalog')
+    star_catalog = load_data('star_catalog', fmt=fmt)
 
 
     return planet_catalog, star_catalog
 
+def get_manifest_dir():
+    return os.path.join(pkg_resources.files('hwo_project'), 'data/.stage_manifests')
+
+def get_ingest_cache_dir():
+    return os.path.join(pkg_resources.files('hwo_project'), 'data/.ingest_cache')
+
 def get_fig_dir_path():
     return os.path.join(pkg_resources.files('hwo_project'), 'figures/')
\ No newline at end of file
@@ -0,0 +1,194 @@
+# Content-hashed manifests for the catalog pipeline stages, so unchanged stages can be skipped
+
+import os
+import ast
+import json
+import hashlib
+import inspect
+import importlib.util
+
+from hwo_project import instrumentation
+
+
+def hash_path(path, chunk_size=1 << 20):
+    """
+    Get the SHA-256 hash of a file, or of all files in a directory table.
+
+    :param path: Path of the file or directory.
+    :return: Hex digest of the contents.
+    """
+    digest = hashlib.sha256()
+
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(bytes.fromhex(hash_path(file_path, chunk_size)))
+        return digest.hexdigest()
+
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def path_signature(path):
+    """
+    Get a cheap (mtime, size) signature of a file or directory table, used to skip rehashing unchanged files.
+    """
+    if os.path.isdir(path):
+        stats = [os.stat(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files]
+        return [max((stat.st_mtime_ns for stat in stats), default=0), sum(stat.st_size for stat in stats)]
+
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class StageCache:
+    def __init__(self, manifest_dir):
+        """
+        Initialize the stage cache.
+
+        Every stage run records a manifest with the hashes of its input and output
+        files, its parameters and the hash of the code that ran it. A stage is fresh,
+        and can be skipped, when all of these still match.
+
+        :param manifest_dir: Directory to keep the stage manifests in.
+        """
+        self.manifest_dir = manifest_dir
+
+    def _manifest_path(self, stage):
+        return os.path.join(self.manifest_dir, f'{stage}.json')
+
+    def load_manifest(self, stage):
+        try:
+            with open(self._manifest_path(stage), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _describe_files(paths, recorded=None):
+        """
+        Get the signature and hash of every file, reusing the recorded hash when the signature is unchanged.
+        """
+        recorded = recorded or {}
+        files = {}
+        for path in paths:
+            signature = path_signature(path)
+            previous = recorded.get(path)
+            if previous is not None and previous['signature'] == signature:
+                files[path] = previous
+            else:
+                files[path] = {'signature': signature, 'sha256': hash_path(path)}
+        return files
+
+    def is_fresh(self, stage, inputs, outputs, params, code):
+        """
+        Check whether a stage can be skipped.
+
+        :param stage: Name of the stage.
+        :param inputs: Paths of the input files.
+        :param outputs: Paths of the output files.
+        :param params: JSON serializable dictionary of parameters, including the seed.
+        :param code: Functions that run the stage, their source files and the hwo_project modules
+            these import, directly or not, are hashed.
+        :return: True if the recorded manifest matches the current inputs, outputs, parameters and code.
+        """
+        manifest = self.load_manifest(stage)
+        if manifest is None or manifest['params'] != params:
+            return False
+
+        paths = list(inputs) + list(outputs) + _code_paths(code)
+        if any(not os.path.exists(path) for path in paths):
+            return False
+
+        recorded = {**manifest['inputs'], **manifest['outputs'], **manifest['code']}
+        current = self._describe_files(paths, recorded)
+        return all(path in recorded and current[path]['sha256'] == recorded[path]['sha256'] for path in paths)
+
+    def record(self, stage, inputs, outputs, params, code):
+        """
+        Record the manifest of a stage that just ran, see is_fresh for the arguments.
+        """
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        manifest = {
+            'stage': stage,
+            'params': params,
+            'inputs': self._describe_files(inputs),
+            'outputs': self._describe_files(outputs),
+            'code': self._describe_files(_code_paths(code)),
+        }
+        with open(self._manifest_path(stage), 'w') as f:
+            json.dump(manifest, f, indent=4)
+
+    def run_stage(self, stage, func, inputs, outputs, params, code=(), cacheable=True, force=False):
+        """
+        Run a stage unless its manifest shows it is fresh.
+
+        :param stage: Name of the stage.
+        :param func: Function without arguments that runs the stage.
+        :param inputs: Paths of the input files.
+        :param outputs: Paths of the output files.
+        :param params: JSON serializable dictionary of parameters, including the seed.
+        :param code: Functions whose source files, and the hwo_project modules they import, are part of the stage.
+        :param cacheable: False for stages that must always run, e.g. unseeded random draws.
+        :param force: Run the stage even if it is fresh.
+        :return: True if the stage was recomputed, False if the cached outputs were reused.
+        """
+        if cacheable and not force and self.is_fresh(stage, inputs, outputs, params, code):
+            return False
+
+        with instrumentation.stage(f'stage.{stage}'):
+            func()
+        self.record(stage, inputs, outputs, params, code)
+        return True
+
+
+def _code_paths(code):
+    """
+    Get the source files of the functions and of every hwo_project module they import, transitively.
+
+    Imports are read from the source, including the ones inside functions, so a
+    change to a helper module, e.g. utils, also makes the stages using it stale.
+    """
+    pending = [inspect.getsourcefile(inspect.unwrap(func)) for func in code]
+    paths = set()
+    while pending:
+        path = pending.pop()
+        if path in paths:
+            continue
+        paths.add(path)
+        pending.extend(_imported_paths(path))
+    return sorted(paths)
+
+
+def _imported_paths(path, package='hwo_project'):
+    """
+    Get the source files of the package modules imported by a source file.
+    """
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+
+    modules = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            modules.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            modules.add(node.module)
+            # from package import module imports submodules by name
+            modules.update(f'{node.module}.{alias.name}' for alias in node.names)
+
+    paths = []
+    for module in modules:
+        if module != package and not module.startswith(package + '.'):
+            continue
+        try:
+            spec = importlib.util.find_spec(module)
+        except (ImportError, ValueError):
+            spec = None
+        if spec is not None and spec.origin and spec.origin.endswith('.py'):
+            paths.append(spec.origin)
+    return paths
@@ -0,0 +1,243 @@
+# Timing and memory instrumentation for the pipeline stages and hot functions
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Instrumentation is off by default, instrumented code then only pays for one flag check
+_enabled = False
+_callback = None
+_profile_stage = None
+_profile_dir = None
+# Profiler of the profiled stage, shared by its repeated calls, and its nesting depth
+_profiler = None
+_profile_depth = 0
+
+_records = {}
+_lock = threading.Lock()
+
+
+class _StageHandle:
+    """
+    Handle yielded by stage, set its items attribute to the number of items processed.
+    """
+    __slots__ = ('items',)
+
+    def __init__(self):
+        self.items = None
+
+
+class _NullHandle:
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_HANDLE = _NullHandle()
+
+
+def enable(callback=None, profile_stage=None, profile_dir='.'):
+    """
+    Turn the instrumentation on.
+
+    :param callback: Function called with the record dictionary of every finished stage or call.
+    :param profile_stage: Name of the one stage to capture with cProfile and tracemalloc, other
+        stages and instrumented calls are only timed. Repeated calls of the stage add up in one profile.
+    :param profile_dir: Directory to write the cProfile stats of the profiled stage to.
+    """
+    global _enabled, _callback, _profile_stage, _profile_dir, _profiler
+    _callback = callback
+    _profile_stage = profile_stage
+    _profile_dir = profile_dir
+    _profiler = None
+    _enabled = True
+
+
+def disable():
+    """
+    Turn the instrumentation off, the recorded stages are kept until reset.
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    """
+    Drop all recorded stages.
+    """
+    with _lock:
+        _records.clear()
+
+
+def get_peak_rss_mb():
+    """
+    Get the peak resident set size of the whole process so far in MB, None where it is not available.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    Record the wall time, CPU time, call count, memory and throughput of a block of code.
+
+    RSS is only known for the whole process: process_peak_rss_mb is its high-water
+    mark when the block ends, and peak_rss_increase_mb how much the block raised it,
+    a lower bound of the memory the block used on top of what the process had already used.
+
+    Usage:
+        with instrumentation.stage('assign_planets') as s:
+            ...
+            s.items = len(planets_df)
+
+    :param name: Name the block is recorded under, repeated blocks with the same name are aggregated.
+    """
+    if not _enabled:
+        yield _NULL_HANDLE
+        return
+
+    handle = _StageHandle()
+    # Only the outermost call of the profiled stage starts and stops the capture
+    profiled = name == _profile_stage and _profile_depth == 0
+    if name == _profile_stage:
+        _start_profile()
+
+    rss_start = get_peak_rss_mb()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield handle
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+
+        profile = None
+        if name == _profile_stage:
+            profile = _stop_profile(name, profiled)
+
+        _record(name, wall, cpu, handle.items, profile, rss_start)
+
+
+def _start_profile():
+    global _profiler, _profile_depth
+    _profile_depth += 1
+    if _profile_depth > 1:
+        return
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+    tracemalloc.start()
+    _profiler.enable()
+
+
+def _stop_profile(name, outermost):
+    global _profile_depth
+    _profile_depth -= 1
+    if not outermost:
+        return None
+
+    _profiler.disable()
+    os.makedirs(_profile_dir, exist_ok=True)
+    prof_file = os.path.join(_profile_dir, f'{name}.prof')
+    _profiler.dump_stats(prof_file)
+
+    snapshot = tracemalloc.take_snapshot()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'prof_file': prof_file,
+        'tracemalloc_peak_mb': peak / 1e6,
+        'top_allocations': [str(stat) for stat in snapshot.statistics('lineno')[:10]],
+    }
+
+
+def _record(name, wall, cpu, items, profile, rss_start=None):
+    peak_rss = get_peak_rss_mb()
+    with _lock:
+        record = _records.setdefault(name, {'name': name, 'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0,
+                                            'items': None, 'items_per_s': None, 'process_peak_rss_mb': None,
+                                            'peak_rss_increase_mb': None})
+        record['calls'] += 1
+        record['wall_s'] += wall
+        record['cpu_s'] += cpu
+        if items is not None:
+            record['items'] = (record['items'] or 0) + int(items)
+            record['items_per_s'] = record['items'] / record['wall_s'] if record['wall_s'] > 0 else None
+        record['process_peak_rss_mb'] = peak_rss
+        if peak_rss is not None and rss_start is not None:
+            record['peak_rss_increase_mb'] = max(record['peak_rss_increase_mb'] or 0.0, peak_rss - rss_start)
+        if profile is not None:
+            # Repeated calls share the profiler, the tracemalloc peak is the largest of one call
+            previous = record.get('profile', {}).get('tracemalloc_peak_mb', 0.0)
+            profile['tracemalloc_peak_mb'] = max(previous, profile['tracemalloc_peak_mb'])
+            record['profile'] = profile
+        snapshot = dict(record)
+
+    if _callback is not None:
+        _callback(snapshot)
+
+
+def instrument(name=None, items=None):
+    """
+    Decorator recording every call of a function as a stage.
+
+    :param name: Name to record the calls under, defaults to module.qualname of the function.
+    :param items: Function of the return value giving the number of items processed.
+    """
+    def decorate(func):
+        label = name or f'{func.__module__}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(label) as handle:
+                result = func(*args, **kwargs)
+                if items is not None:
+                    handle.items = items(result)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def get_report():
+    """
+    Get the run report with the records of every stage.
+    """
+    with _lock:
+        stages = [dict(record) for record in _records.values()]
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'process_peak_rss_mb': get_peak_rss_mb(),
+        'stages': stages,
+    }
+
+
+def write_report(path):
+    """
+    Write the run report as JSON.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(get_report(), f, indent=4)
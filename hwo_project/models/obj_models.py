@@ -1,5 +1,8 @@
+import hashlib
+
 import numpy as np
-from hwo_project import utils
+import pandas as pd
+from hwo_project import utils, instrumentation, random_streams
 
 from astropy import units as u, constants as const
 
@@ -30,7 +33,8 @@ class Star:
 
 
 class Planet:
-    def __init__(self,planet_name,planet_radius,period, star):
+    @instrumentation.instrument()
+    def __init__(self,planet_name,planet_radius,period, star, rng=None):
         """
         Initialize a planet object.
 
@@ -38,6 +42,7 @@ class Planet:
         :param planet_radius: Radius of the planet (in Earth radii).
         :param period: Orbital period of the planet (in days).
         :param star: Star object that the planet orbits.
+        :param rng: Generator for the albedo, shared by all the planets of a population, see random_streams.get_item_rng.
         """
         self.name = planet_name
         self.radius = planet_radius
@@ -45,14 +50,16 @@ class Planet:
         self.orbital_radius = utils.convert_period_to_orbital_radius(period, star.mass)
         self.optimal_pos = utils.get_optimal_obs_pos(star.inclination)
         self.eff_radius = utils.get_eff_orbital_radius(self.orbital_radius, star.lu_star)
-        self.planet_type, self.albedo = utils.get_exoplanet_type(planet_radius,self.eff_radius)
+        self.planet_type, self.albedo = utils.get_exoplanet_type(planet_radius,self.eff_radius, rng=rng)
 
+    @instrumentation.instrument()
     def angular_separation(self):
         """
         Calculate the angular separation between the planet and its star.
         """
         return utils.get_pos_radius(self.orbital_radius, self.optimal_pos, self.star.inclination)/self.star.distance
 
+    @instrumentation.instrument()
     def lambertian_contrast(self):
         """
         Calculate the contrast between the planet and its star using the Lambertian phase function.
@@ -68,3 +75,379 @@ class Planet:
     def __str__(self):
         return f"Planet {self.name} with radius {self.radius} and albedo {self.albedo}."
 
+
+
+class PlanetClassifier:
+    def __init__(self, properties_df):
+        """
+        Initialize a planet classifier from the planet properties table.
+
+        The table rows are closed (planet radius, effective orbital radius) boxes,
+        and a planet gets the first row whose box contains it. The boxes are
+        flattened into a lookup table over the elementary intervals between all
+        box edges, so a whole array of planets is classified with two binary
+        searches and one gather.
+
+        :param properties_df: DataFrame with the planet_properties.csv columns.
+        """
+        self.exoplanet_types = properties_df['exoplanet_type'].to_numpy(dtype=object)
+        self.albedo_lower = properties_df['albedo_lower'].to_numpy(dtype=float)
+        self.albedo_upper = properties_df['albedo_upper'].to_numpy(dtype=float)
+
+        radius_lower = properties_df['planet_radius_lower'].to_numpy(dtype=float)
+        radius_upper = properties_df['planet_radius_upper'].to_numpy(dtype=float)
+        orbit_lower = properties_df['orbitals_radius_lower'].to_numpy(dtype=float)
+        orbit_upper = properties_df['orbitals_radius_upper'].to_numpy(dtype=float)
+
+        self.radius_edges = np.unique(np.concatenate([radius_lower, radius_upper]))
+        self.orbit_edges = np.unique(np.concatenate([orbit_lower, orbit_upper]))
+
+        # Classify one representative value of every elementary interval with the
+        # first-match rule, the lookup table then holds the answer for the whole interval
+        radius_rep = self._representatives(self.radius_edges)[:, None]
+        orbit_rep = self._representatives(self.orbit_edges)[None, :]
+
+        self.lookup = np.full((radius_rep.shape[0], orbit_rep.shape[1]), -1, dtype=np.intp)
+        for index in range(len(self.exoplanet_types)):
+            match = ((self.lookup == -1) &
+                     (radius_lower[index] <= radius_rep) & (radius_rep <= radius_upper[index]) &
+                     (orbit_lower[index] <= orbit_rep) & (orbit_rep <= orbit_upper[index]))
+            self.lookup[match] = index
+
+    @staticmethod
+    def _representatives(edges):
+        """
+        Get one value inside each elementary interval of the sorted edges.
+
+        The intervals are, in order: below the first edge, the first edge itself,
+        the open interval to the next edge, the next edge, ... and above the last edge.
+        """
+        reps = np.empty(2 * len(edges) + 1)
+        reps[0] = edges[0] - 1
+        reps[1::2] = edges
+        reps[2:-1:2] = 0.5 * (edges[:-1] + edges[1:])
+        reps[-1] = edges[-1] + 1
+        return reps
+
+    @staticmethod
+    def _interval_index(edges, values):
+        """
+        Get the elementary interval index of each value, see _representatives.
+        """
+        pos = np.searchsorted(edges, values, side='left')
+        on_edge = edges[np.minimum(pos, len(edges) - 1)] == values
+        return 2 * pos + on_edge
+
+    @instrumentation.instrument(items=np.size)
+    def classify(self, planet_radius, eff_orbital_radius):
+        """
+        Get the index of the matching planet properties row for each planet.
+
+        :param planet_radius: Array of planet radii (in Earth radii).
+        :param eff_orbital_radius: Array of effective orbital radii of the planets (in AU).
+        :return: Array of row indices, -1 for planets without a match.
+        """
+        planet_radius = np.asarray(planet_radius, dtype=float)
+        eff_orbital_radius = np.asarray(eff_orbital_radius, dtype=float)
+
+        radius_idx = self._interval_index(self.radius_edges, planet_radius)
+        orbit_idx = self._interval_index(self.orbit_edges, eff_orbital_radius)
+        return self.lookup[radius_idx, orbit_idx]
+
+    def get_types(self, type_idx):
+        """
+        Get the exoplanet type names for an array of row indices, None where there is no match.
+        """
+        return np.append(self.exoplanet_types, None)[type_idx]
+
+    def draw_albedos(self, type_idx, rng=None):
+        """
+        Draw albedos uniformly from the range of each planet's type, NaN where there is no match.
+
+        :param type_idx: Array of row indices from classify.
+        :param rng: Generator or seed, a seed seeds the whole array from its 'albedos' stream.
+        :return: Array of albedos.
+        """
+        rng = random_streams.get_rng(rng, 'albedos')
+        type_idx = np.asarray(type_idx)
+        matched = type_idx >= 0
+
+        albedos = np.full(type_idx.shape, np.nan)
+        albedos[matched] = rng.uniform(self.albedo_lower[type_idx[matched]],
+                                       self.albedo_upper[type_idx[matched]])
+        return albedos
+
+    def __call__(self, planet_radius, eff_orbital_radius, rng=None):
+        """
+        Classify the planets and draw their albedos.
+
+        :return: Arrays of exoplanet types and albedos.
+        """
+        type_idx = self.classify(planet_radius, eff_orbital_radius)
+        return self.get_types(type_idx), self.draw_albedos(type_idx, rng)
+
+
+def _field_property(field, doc):
+    """
+    Make a read-only property of a population view that reads one field of its row.
+    """
+    return property(lambda self: self.population.data[field][self.index], doc=doc)
+
+
+class StarIndex:
+    def __init__(self, tic_ids):
+        """
+        Index of the rows of a star table by TIC ID.
+
+        Every distinct TIC ID gets a dense integer code, in order of first appearance,
+        and a code refers to the last row with that TIC ID. Planets can carry the code
+        of their host star, star columns are then gathered with one fancy index.
+
+        :param tic_ids: Array of the TIC IDs of the star table rows.
+        """
+        codes, self.tic_ids = pd.factorize(np.asarray(tic_ids, dtype=object), use_na_sentinel=False)
+        self.row_codes = codes
+        self.rows = np.full(len(self.tic_ids), -1, dtype=np.intp)
+        np.maximum.at(self.rows, codes, np.arange(len(codes)))
+        self._lookup = pd.Index(self.tic_ids)
+        self._signature = None
+
+    def __len__(self):
+        return len(self.tic_ids)
+
+    @property
+    def signature(self):
+        """
+        Hash of the TIC IDs in code order, star tables with the same signature give the same codes.
+        """
+        if self._signature is None:
+            hashes = pd.util.hash_array(np.asarray(self.tic_ids, dtype=object))
+            self._signature = hashlib.sha1(hashes.tobytes()).hexdigest()
+        return self._signature
+
+    def get_code(self, tic_id):
+        """
+        Get the code of a TIC ID with a hash lookup, raises KeyError if it is not in the index.
+        """
+        return self._lookup.get_loc(tic_id)
+
+    def get_codes(self, tic_ids):
+        """
+        Get the codes of an array of TIC IDs, raises KeyError if any is not in the index.
+        """
+        codes = self._lookup.get_indexer(np.asarray(tic_ids, dtype=object))
+        if np.any(codes < 0):
+            missing = np.asarray(tic_ids, dtype=object)[codes < 0]
+            raise KeyError(f"TIC IDs not found in the star index: {missing[:5]}")
+        return codes
+
+    def get_row(self, tic_id):
+        return self.rows[self.get_code(tic_id)]
+
+    def get_rows(self, tic_ids):
+        return self.rows[self.get_codes(tic_ids)]
+
+
+class StarPopulation:
+    # One row per star, the hpic_ids are kept in a separate array
+    dtype = np.dtype([('ra', 'f8'), ('dec', 'f8'), ('distance', 'f8'), ('mass', 'f8'),
+                      ('inclination', 'f8'), ('lu_star', 'f8')])
+
+    def __init__(self, data, hpic_ids):
+        """
+        Initialize a star population backed by a structured array.
+
+        :param data: Structured array with StarPopulation.dtype, one row per star.
+        :param hpic_ids: Array of the HPIC IDs of the stars.
+        """
+        self.data = data
+        self.hpic_ids = np.asarray(hpic_ids)
+        self._star_index = None
+
+    @classmethod
+    def from_dataframe(cls, stars_df):
+        """
+        Create a star population from a DataFrame with the star_data.csv columns.
+        """
+        data = np.empty(len(stars_df), dtype=cls.dtype)
+        for field, column in [('ra', 'ra'), ('dec', 'dec'), ('distance', 'sy_dist'), ('mass', 'st_mass'),
+                              ('inclination', 'inclination'), ('lu_star', 'st_lum')]:
+            data[field] = stars_df[column].to_numpy(dtype=float)
+        return cls(data, stars_df['tic_id'].to_numpy())
+
+    @property
+    def star_index(self):
+        """
+        StarIndex of the population, built on first use.
+        """
+        if self._star_index is None:
+            self._star_index = StarIndex(self.hpic_ids)
+        return self._star_index
+
+    def get(self, hpic_id):
+        """
+        Get the star with an HPIC ID, raises KeyError if there is none.
+        """
+        return StarView(self, self.star_index.get_row(hpic_id))
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return StarView(self, index)
+
+    def __iter__(self):
+        return (StarView(self, index) for index in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + self.hpic_ids.nbytes
+
+
+class StarView:
+    """
+    A single star of a StarPopulation, with the attributes of a Star object.
+    """
+    __slots__ = ('population', 'index')
+
+    def __init__(self, population, index):
+        self.population = population
+        self.index = index
+
+    ra = _field_property('ra', 'Right ascension of the star.')
+    dec = _field_property('dec', 'Declination of the star.')
+    distance = _field_property('distance', 'Distance to the star (in parsecs).')
+    mass = _field_property('mass', 'Mass of the star.')
+    inclination = _field_property('inclination', 'Inclination of the star orbits (in degrees).')
+    lu_star = _field_property('lu_star', 'Luminosity of the star.')
+
+    @property
+    def hpic_id(self):
+        return self.population.hpic_ids[self.index]
+
+    def __str__(self):
+        return f"Star {self.hpic_id} at RA {self.ra} and Dec {self.dec}."
+
+
+class PlanetPopulation:
+    # One row per planet, about 50 bytes each
+    dtype = np.dtype([('radius', 'f8'), ('period', 'f8'), ('host', 'i4'), ('orbital_radius', 'f8'),
+                      ('eff_radius', 'f8'), ('optimal_pos', 'f8'), ('albedo', 'f8'), ('type_idx', 'i1')])
+
+    @instrumentation.instrument()
+    def __init__(self, planet_radius, period, stars, host_index, names=None, rng=None, classifier=None):
+        """
+        Initialize a planet population, computing the same quantities as Planet objects for all planets at once.
+
+        :param planet_radius: Array of planet radii (in Earth radii).
+        :param period: Array of orbital periods of the planets (in days).
+        :param stars: StarPopulation of the host stars.
+        :param host_index: Array with the position of the host star of every planet in stars.
+        :param names: Optional array of planet names.
+        :param rng: Generator or seed for the albedos, a seed seeds the whole population from its 'albedos' stream.
+        :param classifier: PlanetClassifier for the types and albedos, defaults to the package classifier. The
+            population keeps it, so its planet types stay those it was classified with.
+        """
+        host_index = np.asarray(host_index)
+        host = stars.data[host_index]
+
+        data = np.empty(len(host_index), dtype=self.dtype)
+        data['radius'] = planet_radius
+        data['period'] = period
+        data['host'] = host_index
+        data['orbital_radius'] = utils.convert_period_to_orbital_radius(data['period'], host['mass'])
+        data['eff_radius'] = utils.get_eff_orbital_radius(data['orbital_radius'], host['lu_star'])
+        data['optimal_pos'] = utils.get_optimal_obs_pos_array(host['inclination'])
+
+        if classifier is None:
+            classifier = utils.get_planet_classifier()
+        type_idx = classifier.classify(data['radius'], data['eff_radius'])
+        data['type_idx'] = type_idx
+        data['albedo'] = classifier.draw_albedos(type_idx, rng)
+
+        self.data = data
+        self.stars = stars
+        self.names = None if names is None else np.asarray(names)
+        self.classifier = classifier
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        return PlanetView(self, index)
+
+    def __iter__(self):
+        return (PlanetView(self, index) for index in range(len(self)))
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (0 if self.names is None else self.names.nbytes)
+
+    @property
+    def planet_type(self):
+        """
+        Array of the exoplanet types of the planets, None for planets without a type.
+        """
+        return self.classifier.get_types(self.data['type_idx'])
+
+    def angular_separation(self, index=slice(None)):
+        """
+        Calculate the angular separation between the planets and their stars.
+
+        :param index: Planets to evaluate, defaults to all of them.
+        """
+        data = self.data[index]
+        host = self.stars.data[data['host']]
+        return utils.get_pos_radius(data['orbital_radius'], data['optimal_pos'], host['inclination'])/host['distance']
+
+    def lambertian_contrast(self, index=slice(None)):
+        """
+        Calculate the contrast between the planets and their stars using the Lambertian phase function at alpha=60.
+
+        :param index: Planets to evaluate, defaults to all of them.
+        """
+        data = self.data[index]
+        return utils.get_lambertian_contrast(data['albedo'], data['radius'], data['orbital_radius'])
+
+
+class PlanetView:
+    """
+    A single planet of a PlanetPopulation, with the attributes and methods of a Planet object.
+    """
+    __slots__ = ('population', 'index')
+
+    def __init__(self, population, index):
+        self.population = population
+        self.index = index
+
+    radius = _field_property('radius', 'Radius of the planet (in Earth radii).')
+    orbital_radius = _field_property('orbital_radius', 'Orbital radius of the planet (in AU).')
+    eff_radius = _field_property('eff_radius', 'Effective orbital radius of the planet (in AU).')
+    optimal_pos = _field_property('optimal_pos', 'Optimal observation position (in degrees).')
+
+    @property
+    def albedo(self):
+        albedo = self.population.data['albedo'][self.index]
+        return None if np.isnan(albedo) else albedo
+
+    @property
+    def name(self):
+        names = self.population.names
+        return None if names is None else names[self.index]
+
+    @property
+    def star(self):
+        return self.population.stars[self.population.data['host'][self.index]]
+
+    @property
+    def planet_type(self):
+        return self.population.classifier.get_types(self.population.data['type_idx'][self.index])
+
+    def angular_separation(self):
+        return self.population.angular_separation(self.index)
+
+    def lambertian_contrast(self):
+        return self.population.lambertian_contrast(self.index)
+
+    def __str__(self):
+        return f"Planet {self.name} with radius {self.radius} and albedo {self.albedo}."
@@ -1,12 +1,162 @@
+import numpy as np
 import pandas as pd
 
 from astropy import units as u
 
+from hwo_project import utils
 from hwo_project.data import data_utils
 
+
+class _TypeObservabilityIndex:
+    def __init__(self, angular_separation, contrast, block_size=None):
+        """
+        Index of the planets of one type for counting the planets above a separation and a contrast.
+
+        The planets are kept sorted by decreasing angular separation and ranked by
+        contrast, so the planets above a pair of thresholds are the positions below k
+        with a rank of at least r, both found by binary search. The positions and
+        ranks are cut into blocks and a 2D cumulative grid holds the counts of whole
+        blocks, only the partial position block and the partial rank block of a
+        query are counted directly. The index takes O(n) memory.
+
+        :param angular_separation: Array of the angular separations of the planets.
+        :param contrast: Array of the contrasts of the planets.
+        :param block_size: Number of planets in a block, defaults to sqrt(n) so the grid has about n cells.
+        """
+        n = len(angular_separation)
+        self.num_planets = n
+        self.block_size = block_size or max(64, int(np.sqrt(n)))
+        self.sorted_separation = np.sort(angular_separation)
+        self.sorted_contrast = np.sort(contrast)
+
+        # Ranks are a permutation, contrast > floor <=> rank >= number of contrasts <= floor
+        order = np.argsort(-angular_separation, kind='stable')
+        contrast_order = np.argsort(contrast[order], kind='stable')
+        self.ranks = np.empty(n, dtype=np.int64)
+        self.ranks[contrast_order] = np.arange(n)
+        self.positions = contrast_order
+
+        # grid[i, j] counts the planets with position block < i and rank block >= j
+        num_blocks = -(-n // self.block_size)
+        position_block = np.arange(n) // self.block_size
+        rank_block = self.ranks // self.block_size
+        hist = np.bincount(position_block * num_blocks + rank_block,
+                           minlength=num_blocks * num_blocks).reshape(num_blocks, num_blocks)
+        self.grid = np.zeros((num_blocks + 1, num_blocks + 1), dtype=np.int64)
+        self.grid[1:, :-1] = hist.cumsum(axis=0)[:, ::-1].cumsum(axis=1)[:, ::-1]
+
+    def count(self, iwa, contrast_floor):
+        """
+        Count the planets with angular_separation > iwa and contrast > contrast_floor.
+
+        :param iwa: Array of inner working angles.
+        :param contrast_floor: Array of contrast floors, same shape as iwa.
+        :return: Array of counts.
+        """
+        n = self.num_planets
+        block_size = self.block_size
+        k = n - np.searchsorted(self.sorted_separation, iwa, side='right')
+        r = np.searchsorted(self.sorted_contrast, contrast_floor, side='right')
+        if n == 0:
+            return np.zeros(k.shape, dtype=np.int64)
+
+        # Whole blocks: positions below the block of k, ranks from the block after r
+        k_block = k // block_size
+        r_block = -(-r // block_size)
+        counts = self.grid[k_block, r_block]
+
+        # Partial position block [k_block * block_size, k) with rank >= r
+        offsets = np.arange(block_size)
+        idx = (k_block * block_size)[:, None] + offsets
+        in_block = idx < k[:, None]
+        counts += np.sum(in_block & (self.ranks[np.minimum(idx, n - 1)] >= r[:, None]), axis=1)
+
+        # Partial rank block [r, r_block * block_size) below the partial position block
+        idx = r[:, None] + offsets
+        in_block = idx < np.minimum(r_block * block_size, n)[:, None]
+        counts += np.sum(in_block & (self.positions[np.minimum(idx, n - 1)] < (k_block * block_size)[:, None]),
+                         axis=1)
+
+        return counts
+
+
+class ObservabilityIndex:
+    def __init__(self, planets_df, block_size=None):
+        """
+        Precomputed index of a planet catalog for counting observable planets.
+
+        Build it once per catalog to answer many threshold queries, e.g. the yields
+        of many telescope configurations, without scanning the catalog again.
+        Planets without a type, separation or contrast are never observable.
+
+        :param planets_df: DataFrame with the angular_separation, contrast and planet_type columns.
+        :param block_size: Number of planets in a block of the per-type indexes, defaults to sqrt(n).
+        """
+        angular_separation = planets_df['angular_separation'].to_numpy(dtype=float)
+        contrast = planets_df['contrast'].to_numpy(dtype=float)
+        planet_type = planets_df['planet_type'].to_numpy(dtype=object)
+
+        valid = ~np.isnan(angular_separation) & ~np.isnan(contrast) & pd.notna(planet_type)
+        codes, exoplanet_types = pd.factorize(planet_type[valid])
+        angular_separation = angular_separation[valid]
+        contrast = contrast[valid]
+
+        self.types = {}
+        for code, exoplanet_type in enumerate(exoplanet_types):
+            mask = codes == code
+            self.types[exoplanet_type] = _TypeObservabilityIndex(angular_separation[mask], contrast[mask], block_size)
+
+    def count(self, iwa, contrast_floor, exoplanet_type='earths'):
+        """
+        Count the planets of a type with angular_separation > iwa and contrast > contrast_floor.
+        """
+        return int(self.count_batch(iwa, contrast_floor, exoplanet_type))
+
+    def count_batch(self, iwa, contrast_floor, exoplanet_type):
+        """
+        Count the observable planets for many queries at once.
+
+        :param iwa: Inner working angles (in arcseconds).
+        :param contrast_floor: Contrast floors.
+        :param exoplanet_type: Planet types.
+        :return: Array of counts with the broadcast shape of the arguments.
+        """
+        iwa, contrast_floor, exoplanet_type = np.broadcast_arrays(np.asarray(iwa, dtype=float),
+                                                                  np.asarray(contrast_floor, dtype=float),
+                                                                  np.asarray(exoplanet_type, dtype=object))
+        counts = np.zeros(iwa.shape, dtype=np.int64)
+
+        for name, index in self.types.items():
+            mask = exoplanet_type == name
+            if np.any(mask):
+                counts[mask] = index.count(iwa[mask], contrast_floor[mask])
+
+        return counts
+
+    def count_telescopes(self, telescope_constraints_dict=None, exoplanet_types=None):
+        """
+        Count the observable planets of every type for every telescope.
+
+        :param telescope_constraints_dict: Dictionary of telescope constraints, defaults to the package constraints.
+        :param exoplanet_types: Planet types to count, defaults to the types in the catalog.
+        :return: Dictionary of counts keyed by (telescope, planet_type).
+        """
+        tele_dict = telescope_constraints_dict or data_utils.load_data('tele_constraints')
+        if exoplanet_types is None:
+            exoplanet_types = list(self.types)
+
+        keys = [(telescope, exoplanet_type) for telescope in tele_dict for exoplanet_type in exoplanet_types]
+        counts = self.count_batch([tele_dict[telescope]['iwa'] for telescope, _ in keys],
+                                  [tele_dict[telescope]['contrast_floor'] for telescope, _ in keys],
+                                  [exoplanet_type for _, exoplanet_type in keys])
+        return {key: int(count) for key, count in zip(keys, counts)}
+
+
 def get_num_observable_planets(planets_df,telescope_constraints_dict=None,telescope_type='hwo',exoplanet_type='earths'):
     """
     Get the number of observable planets in the planet DataFrame
+
+    planets_df can also be an ObservabilityIndex of the catalog, to count without scanning it.
     """
 
     if telescope_constraints_dict:
@@ -15,8 +165,65 @@ def get_num_observable_planets(planets_df,telescope_constraints_dict=None,telesc
     else:
         tele_dict = data_utils.load_data('tele_constraints')
 
-    contrast_cut = planets_df['contrast'] > tele_dict[telescope_type]['contrast_floor']
-    angular_separation_cut = planets_df['angular_separation'] > tele_dict[telescope_type]['iwa']
-    mod_df = planets_df[contrast_cut & angular_separation_cut]
-    mask = mod_df['planet_type'] == exoplanet_type
-    return len(mod_df[mask])
\ No newline at end of file
+    iwa = tele_dict[telescope_type]['iwa']
+    contrast_floor = tele_dict[telescope_type]['contrast_floor']
+
+    if isinstance(planets_df, ObservabilityIndex):
+        return planets_df.count(iwa, contrast_floor, exoplanet_type)
+
+    contrast_cut = planets_df['contrast'].to_numpy(dtype=float) > contrast_floor
+    angular_separation_cut = planets_df['angular_separation'].to_numpy(dtype=float) > iwa
+    mask = planets_df['planet_type'].to_numpy() == exoplanet_type
+    return int(np.count_nonzero(contrast_cut & angular_separation_cut & mask))
+
+
+def get_yield_hypercube(planets, aperture_diameters, wavelengths, contrast_floors, exoplanet_types=None):
+    """
+    Count the observable planets of every type for every combination of telescope design parameters.
+
+    Every planet is binned once by the number of IWAs below its angular separation
+    and the number of contrast floors below its contrast. The count for an
+    (IWA, floor) pair is then a reverse 2D cumulative sum of these bins, so the
+    catalog is read once however many designs there are.
+
+    :param planets: Planet catalog DataFrame, or an iterable of catalog chunks (e.g. from data_utils.iter_table_chunks).
+    :param aperture_diameters: Array of aperture diameters (in m).
+    :param wavelengths: Array of wavelengths (in nm).
+    :param contrast_floors: Array of contrast floors.
+    :param exoplanet_types: Planet types to count, defaults to all the types of the planet classifier.
+    :return: Dictionary of planet type to an integer array of counts with shape
+        (len(aperture_diameters), len(wavelengths), len(contrast_floors)).
+    """
+    if exoplanet_types is None:
+        exoplanet_types = utils.get_planet_classifier().exoplanet_types
+    exoplanet_types = list(exoplanet_types)
+
+    aperture_diameters = np.atleast_1d(np.asarray(aperture_diameters, dtype=float))
+    wavelengths = np.atleast_1d(np.asarray(wavelengths, dtype=float))
+    contrast_floors = np.atleast_1d(np.asarray(contrast_floors, dtype=float))
+
+    iwa = utils.calculate_iwa_array(wavelengths[None, :], aperture_diameters[:, None])
+    iwa_values, iwa_idx = np.unique(iwa, return_inverse=True)
+    floor_values, floor_idx = np.unique(contrast_floors, return_inverse=True)
+
+    # Bin (t, a, b) holds the planets of type t above exactly a IWAs and b floors
+    shape = (len(exoplanet_types), len(iwa_values) + 1, len(floor_values) + 1)
+    hist = np.zeros(shape, dtype=np.int64)
+
+    chunks = [planets] if isinstance(planets, pd.DataFrame) else planets
+    for chunk in chunks:
+        angular_separation = chunk['angular_separation'].to_numpy(dtype=float)
+        contrast = chunk['contrast'].to_numpy(dtype=float)
+        type_idx = pd.Index(exoplanet_types).get_indexer(chunk['planet_type'].to_numpy(dtype=object))
+
+        valid = (type_idx >= 0) & ~np.isnan(angular_separation) & ~np.isnan(contrast)
+        num_iwa_below = np.searchsorted(iwa_values, angular_separation[valid], side='left')
+        num_floor_below = np.searchsorted(floor_values, contrast[valid], side='left')
+        flat_idx = np.ravel_multi_index((type_idx[valid], num_iwa_below, num_floor_below), shape)
+        hist += np.bincount(flat_idx, minlength=hist.size).reshape(shape)
+
+    # Planets above IWA i and floor j are the bins with a > i and b > j
+    above = hist[:, ::-1, ::-1].cumsum(axis=1).cumsum(axis=2)[:, ::-1, ::-1]
+    counts = above[:, 1:, 1:][:, iwa_idx.reshape(iwa.shape)[:, :, None], floor_idx[None, None, :]]
+
+    return dict(zip(exoplanet_types, counts))
@@ -1,21 +1,24 @@
 import numpy as np
-import matplotlib.pyplot as plt
 import pandas as pd
 
+from hwo_project import instrumentation, random_streams
+from hwo_project.models import obj_models
 from hwo_project.data import data_utils
 
-from IPython import embed
-
 def generate_planets_per_star(num_stars, 
                               total_planets, 
                               max_planets_per_star, 
                               min_planets_per_star,
                               seed=None,
                               expected_planets_per_star=None, 
-                              show_plot=False):
+                              show_plot=False,
+                              rng=None,
+                              verbose=True):
     """
     Function to generate the number of planets for each star based on the occurrence rate distribution.
 
+    The draws come from rng if given, otherwise from the 'planets_per_star' stream of seed.
+
     Returns:
     planets_per_star : Array of the number of planets for each star.
     """
@@ -28,11 +31,10 @@ def generate_planets_per_star(num_stars,
         
         expected_planets_per_star = np.sum(pdf_from_sag13) / 100
 
-    if seed is not None:
-        np.random.seed(seed)
+    rng = random_streams.get_rng(seed if rng is None else rng, 'planets_per_star')
 
     # Simulate the number of planets for each star using a Poisson distribution
-    planets_per_star = np.random.poisson(lam=expected_planets_per_star, size=num_stars)
+    planets_per_star = rng.poisson(lam=expected_planets_per_star, size=num_stars)
 
     # Ensure every star has at least one planet
     planets_per_star = np.maximum(planets_per_star, min_planets_per_star)
@@ -42,7 +44,8 @@ def generate_planets_per_star(num_stars,
 
     # Ensure the total number of planets does not exceed the given limit
     cumulative_planets = np.cumsum(planets_per_star)
-    print("Total Number of Planets assigned to stars:", cumulative_planets[-1])
+    if verbose:
+        print("Total Number of Planets assigned to stars:", cumulative_planets[-1])
 
     cutoff_index = np.searchsorted(cumulative_planets, total_planets, side='right')
     if cutoff_index < num_stars:
@@ -50,6 +53,8 @@ def generate_planets_per_star(num_stars,
         planets_per_star[cutoff_index + 1:] = 0
 
     if show_plot:
+        import matplotlib.pyplot as plt
+
         # Bar plot for planets per star
         unique, counts = np.unique(planets_per_star, return_counts=True)
         cumulative = np.cumsum(counts) / num_stars
@@ -95,30 +100,48 @@ def generate_planets_per_star(num_stars,
     return planets_per_star
 
 
-def assign_planets_to_stars(planets_per_star,num_total_planets,seed=None ,demo=False):
+def get_planet_offsets(planets_per_star, num_total_planets):
     """
-    Function to assign planets to stars based on the number of planets for each star.
+    Function to get the CSR-style offsets of each star's planets in the shuffled planet order.
 
     Returns:
-    planet_indices : List of lists containing the indices of planets assigned to each star.
+    offsets : Array of length num_stars + 1, the planets of star k are planet_order[offsets[k]:offsets[k + 1]].
     """
+    offsets = np.zeros(len(planets_per_star) + 1, dtype=np.intp)
+    np.cumsum(planets_per_star, out=offsets[1:])
 
-    planet_indices = []
+    # Stars past the last planet get none
+    return np.minimum(offsets, num_total_planets)
+
+
+def assign_planets_to_stars_csr(planets_per_star, num_total_planets, seed=None, rng=None):
+    """
+    Function to assign planets to stars as a shuffled planet order plus per-star offsets.
+
+    The shuffle comes from rng if given, otherwise from the 'assign_planets' stream of seed.
+
+    Returns:
+    planet_order : Shuffled array of planet indices.
+    offsets : Array of offsets into planet_order for each star (see get_planet_offsets).
+    """
+    rng = random_streams.get_rng(seed if rng is None else rng, 'assign_planets')
 
-    planet_list = list(range(num_total_planets))
+    # Same order as rng.shuffle on a list of range(num_total_planets), without the list
+    planet_order = rng.permutation(num_total_planets)
 
-    if seed is not None:
-        np.random.seed(seed)
+    return planet_order, get_planet_offsets(planets_per_star, num_total_planets)
 
-    np.random.shuffle(planet_list)
 
-    start_index = 0
+def assign_planets_to_stars(planets_per_star,num_total_planets,seed=None ,demo=False):
+    """
+    Function to assign planets to stars based on the number of planets for each star.
 
-    for num_planets in planets_per_star:
-        end_index = start_index + num_planets
-        planet_indices.append(planet_list[start_index:end_index])
-        start_index = end_index
+    Returns:
+    planet_indices : List of lists containing the indices of planets assigned to each star.
+    """
+    planet_order, offsets = assign_planets_to_stars_csr(planets_per_star, num_total_planets, seed=seed)
 
+    planet_indices = [planet_order[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
 
     if demo:
         print("Example of planets assigned to the first 5 stars:")
@@ -127,37 +150,62 @@ def assign_planets_to_stars(planets_per_star,num_total_planets,seed=None ,demo=F
 
     return planet_indices
 
-def assign_star_ids_to_planets(planets_df, stars_df, planet_indices):
+def get_host_star_index(planet_order, offsets, num_total_planets):
     """
-    Assign star IDs to planets based on the provided indices.
+    Get the index of the host star of every planet from the CSR assignment.
+
+    :param planet_order: Shuffled array of planet indices.
+    :param offsets: Array of offsets into planet_order for each star.
+    :param num_total_planets: Total number of planets.
+    :return: Array with the host star index of each planet, -1 for planets without a host.
+    """
+    star_of_slot = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+    host_star_idx = np.full(num_total_planets, -1, dtype=np.intp)
+    host_star_idx[planet_order[:offsets[-1]]] = star_of_slot
+
+    return host_star_idx
+
+def assign_host_stars(planets_df, stars_df, planet_order, offsets):
+    """
+    Assign star IDs to planets from the CSR assignment.
 
     :param planets_df: DataFrame containing the planet data.
     :param stars_df: DataFrame containing the star data.
-    :param planet_indices: List of lists containing the indices of planets assigned to each star.
-    :return: Updated DataFrame with a new column 'star_id' indicating the host star for each planet.
+    :param planet_order: Shuffled array of planet indices.
+    :param offsets: Array of offsets into planet_order for each star.
+    :return: DataFrame of the planets with a host, with new columns 'host_star_id' and 'host_star_idx',
+        the StarIndex code of the host star. The signature of the StarIndex is kept in attrs['host_star_signature'].
     """
     if len(planets_df) < len(stars_df):
         print('Warning: Number of planets is less than the number of stars. Some stars will not have any planets assigned.')
-    # Initialize the 'host_star_id' column with NaN values
-    planets_df['host_star_id'] = 'unlucky'
-
 
-    # Convert the 'host_star_id' column to string dtype
-    planets_df['host_star_id'] = planets_df['host_star_id'].astype(str)
+    host_star_idx = get_host_star_index(planet_order, offsets, len(planets_df))
+    has_host = host_star_idx >= 0
 
-    # Assign star IDs to the specified planet indices
-    for star_index, planet_list in enumerate(planet_indices):
-        star_id = str(stars_df.iloc[star_index]['tic_id'])  # Ensure star_id is a string
-        for planet_index in planet_list:
-            planets_df.at[planet_index, 'host_star_id'] = star_id
+    # Planets without a host star are dropped
+    planets_df = planets_df[has_host].copy()
+    planets_df['host_star_id'] = stars_df['tic_id'].astype(str).to_numpy()[host_star_idx[has_host]]
+    star_index = obj_models.StarIndex(stars_df['tic_id'].astype(str))
+    planets_df['host_star_idx'] = star_index.row_codes[host_star_idx[has_host]]
+    planets_df.attrs['host_star_signature'] = star_index.signature
 
-    # Remove any rows with host_star_id 'unlucky'
-    planets_df = planets_df[planets_df['host_star_id'] != 'unlucky']
+    return planets_df
 
+def assign_star_ids_to_planets(planets_df, stars_df, planet_indices):
+    """
+    Assign star IDs to planets based on the provided indices.
 
-    
+    :param planets_df: DataFrame containing the planet data.
+    :param stars_df: DataFrame containing the star data.
+    :param planet_indices: List of lists containing the indices of planets assigned to each star.
+    :return: Updated DataFrame with a new column 'star_id' indicating the host star for each planet.
+    """
+    planets_per_star = [len(planet_list) for planet_list in planet_indices]
+    planet_order = np.fromiter((planet_index for planet_list in planet_indices for planet_index in planet_list),
+                               dtype=np.intp, count=sum(planets_per_star))
 
-    return planets_df
+    return assign_host_stars(planets_df, stars_df, planet_order, get_planet_offsets(planets_per_star, len(planets_df)))
 
 def add_name_ids_to_planets(planets_df):
     """
@@ -173,13 +221,28 @@ def add_name_ids_to_planets(planets_df):
 
     return mod_df
 
-def run_dist_planets_to_stars(show_plot=False,seed=None):
+def run_dist_planets_to_stars(show_plot=False,seed=None,fmt='csv'):
 
     
     # Load the star and planet DataFrames
-    _, star_df = data_utils.quick_catalog_load()
-    planet_df = data_utils.load_data('random_planets')
+    star_df = data_utils.load_data('star_catalog', fmt=fmt)
+    planet_df = data_utils.load_data('random_planets', fmt=fmt)
+
+    updated_planet_df = distribute_planets_to_stars(planet_df, star_df, seed=seed, show_plot=show_plot)
 
+    # Save the updated DataFrame
+    data_utils.save_data(updated_planet_df, 'assigned_planets', fmt=fmt)
+
+@instrumentation.instrument(items=len)
+def distribute_planets_to_stars(planet_df, star_df, seed=None, show_plot=False):
+    """
+    Distribute the random planets to the stars, without any file I/O.
+
+    :param planet_df: DataFrame containing the random planets.
+    :param star_df: DataFrame containing the star data.
+    :param seed: Run seed or SeedSequence, each random draw comes from its own stream of it.
+    :return: DataFrame of the planets with a host star, with 'host_star_id', 'host_star_idx' and 'planet_name' columns.
+    """
     # Given values
     num_stars = len(star_df)  # Number of stars
     total_planets = len(planet_df)  # Updated total number of planets
@@ -190,17 +253,13 @@ def run_dist_planets_to_stars(show_plot=False,seed=None):
     planets_per_star = generate_planets_per_star(num_stars, total_planets, max_planets_per_star, min_planets_per_star, show_plot=show_plot,seed=seed)
 
     # Get the indices of planets assigned to each star
-    planet_indices = assign_planets_to_stars(planets_per_star,total_planets,seed=seed, demo=False)
+    planet_order, offsets = assign_planets_to_stars_csr(planets_per_star, total_planets, seed=seed)
 
     # Assign star IDs to planets
-    updated_planet_df = assign_star_ids_to_planets(planet_df, star_df, planet_indices)
+    updated_planet_df = assign_host_stars(planet_df, star_df, planet_order, offsets)
 
     # Add unique name IDs to planets
-    updated_planet_df = add_name_ids_to_planets(updated_planet_df)
-
-    # Save the updated DataFrame to a CSV file
-    out_path = data_utils.load_data('assigned_planets', get_path=True)
-    updated_planet_df.to_csv(out_path, index=False)
+    return add_name_ids_to_planets(updated_planet_df)
 
 if __name__ == "__main__":
     run_dist_planets_to_stars(show_plot=True)
@@ -1,77 +1,141 @@
 import numpy as np
-import matplotlib.pyplot as plt 
-def generate_mock_i(n_simulated_i, show_plot=False,seed=42,verbose=False):
+
+from hwo_project import random_streams
+
+# Rayleigh scale of the mutual inclinations of planets in the same system (in degrees), Fang & Margot (2012)
+MUTUAL_INCLINATION_SCALE = 1.4
+
+
+def sample_inclinations(size=None, rng=None, out=None):
     """
-    Generate a mock sample of i values using the CDF of the observed i values.
-    :param original_array: Array of observed i values
-    :param n_simulated_i: Number of simulated i values to generate
-    :return: Array of simulated i values
+    Draw inclinations from the cos(i) density on [0, 90] degrees.
+
+    The CDF of the density is sin(i), so the inverse transform i = arcsin(u) of a
+    uniform draw u is exact. The draws are made in place in out when it is given,
+    so a Generator allocates no temporary arrays.
+
+    :param size: Number of inclinations to draw, ignored when out is given.
+    :param rng: Generator or legacy RandomState to draw from, or a seed for a new Generator.
+    :param out: Float64 array to write the inclinations to.
+    :return: Array of inclinations (in degrees).
     """
-    from numpy.random import default_rng
+    rng = random_streams.get_rng(rng)
+    if out is None:
+        out = np.empty(size, dtype=np.float64)
 
-    # Set seed for reproducibility
+    _random(rng, out)
+    np.arcsin(out, out=out)
+    return np.degrees(out, out=out)
 
-    rng = default_rng(seed=seed)
 
-    x = rng.uniform(0, 1, n_simulated_i)
+def _random(rng, out):
+    """
+    Fill out with uniform draws on [0, 1), in place for a Generator.
+    """
+    if isinstance(rng, np.random.Generator):
+        rng.random(out=out)
+    else:
+        # Legacy RandomState or the np.random module, which cannot draw in place
+        out[...] = rng.random_sample(out.shape)
+    return out
 
-    # Generate inclination values (0 to 90 degrees)
-    inclinations = np.linspace(0, np.pi/2, 1000)  # radians
 
-    # PDF: Probability density function as cos(i)
-    pdf0 = np.cos(inclinations)
+def sample_planet_inclinations(host_inclination, host_idx, scale=MUTUAL_INCLINATION_SCALE, rng=None, out=None,
+                               chunk_size=1 << 20):
+    """
+    Draw the inclinations of planets whose orbits are tilted from the plane of their system.
+
+    Every planet gets a mutual inclination d from the Rayleigh distribution and a
+    uniform node angle w around the system plane. Its inclination follows
+    cos(i) = cos(i_sys) cos(d) + sin(i_sys) sin(d) cos(w), folded onto [0, 90]
+    degrees since only sin(i) enters the observability. The planets are drawn in
+    chunks of chunk_size, so the temporary arrays do not grow with the number of planets.
+
+    :param host_inclination: Array of the inclinations of the systems (in degrees).
+    :param host_idx: Array of the index of the system of every planet in host_inclination.
+    :param scale: Rayleigh scale of the mutual inclinations (in degrees), 0 for coplanar systems.
+    :param rng: Generator or legacy RandomState to draw from, or a seed for a new Generator.
+    :param out: Float64 array to write the inclinations to.
+    :param chunk_size: Number of planets drawn at once.
+    :return: Array of planet inclinations (in degrees).
+    """
+    rng = random_streams.get_rng(rng)
+    host_inclination = np.radians(np.asarray(host_inclination, dtype=np.float64))
+    host_idx = np.asarray(host_idx)
+    if out is None:
+        out = np.empty(len(host_idx), dtype=np.float64)
+
+    # All the mutual inclinations are drawn before the node angles, so the draws do not depend on chunk_size
+    _random(rng, out)
+    node = np.empty(min(chunk_size, len(host_idx)), dtype=np.float64)
+    for start in range(0, len(host_idx), chunk_size):
+        chunk = out[start:start + chunk_size]
+        chunk_node = node[:len(chunk)]
+        system = host_inclination[host_idx[start:start + chunk_size]]
 
-    # Normalize the PDF to create a probability density
-    pdf = pdf0/np.trapezoid(pdf0, inclinations)  # normalization using trapezoidal integration
+        # Rayleigh mutual inclination by inverse transform, d = scale * sqrt(-2 ln(1 - u))
+        np.negative(chunk, out=chunk)
+        np.log1p(chunk, out=chunk)
+        chunk *= -2
+        np.sqrt(chunk, out=chunk)
+        chunk *= np.radians(scale)
 
-    # CDF: Cumulative distribution function (integral of PDF)
-    cdf = np.cumsum(pdf) * (inclinations[1] - inclinations[0])  # discrete integration
-    # Calculate the CDF of the i values
-    i_sorted, i_cdf = inclinations, cdf
+        _random(rng, chunk_node)
+        chunk_node *= 2 * np.pi
+        np.cos(chunk_node, out=chunk_node)
 
-    # Get the indices 
-    idx = np.searchsorted(i_cdf, x, side='left')
+        cos_i = np.cos(system) * np.cos(chunk) + np.sin(system) * np.sin(chunk) * chunk_node
+        np.arccos(np.clip(cos_i, -1, 1, out=cos_i), out=chunk)
 
-    # Check whether the range of i_sorted is OK
-    n_zero = np.where(idx==0)[0]
-    while len(n_zero) > 0:
-        # Regenerate the random values where idx is 0
-        if verbose:
-            print(f'Regenerating {len(n_zero)} random values')
-        x[n_zero] = rng.uniform(0, 1, len(n_zero))
-        idx[n_zero] = np.searchsorted(i_cdf, x[n_zero], side='left')
-        n_zero = np.where(idx==0)[0]
+        # Fold retrograde orientations, sin(180 - i) = sin(i)
+        np.degrees(chunk, out=chunk)
+        np.subtract(180, chunk, out=chunk_node)
+        np.minimum(chunk, chunk_node, out=chunk)
 
-    # Perform inverse lookup with linear interpolation
-    x_pdf = i_sorted[idx-1] + (x-i_cdf[idx-1])/(i_cdf[idx]-i_cdf[idx-1]) * (i_sorted[idx]-i_sorted[idx-1])
+    return out
+
+
+def generate_mock_i(n_simulated_i, show_plot=False,seed=None,verbose=False):
+    """
+    Generate a mock sample of i values from the cos(i) density, see sample_inclinations.
+
+    :param n_simulated_i: Number of simulated i values to generate
+    :param seed: Seed or Generator for the draws, None for fresh entropy.
+    :return: Array of simulated i values (in degrees)
+    """
+    simulated_i = sample_inclinations(n_simulated_i, rng=seed)
 
     if show_plot:
+        import matplotlib.pyplot as plt
+
         # Plot the histogram of the pdf and simulated i values
         plt.figure(figsize=(10, 8))
-        
-        # Plot the PDF
-        plt.plot(np.degrees(inclinations), 400 * pdf0, label='PDF', color='red', linewidth=2)
-        
+
+        # Plot the PDF, scaled to the histogram counts
+        inclinations = np.linspace(0, 90, 1000)
+        bin_width = 90 / 50
+        pdf = np.cos(np.radians(inclinations)) * np.radians(bin_width) * n_simulated_i
+        plt.plot(inclinations, pdf, label='PDF', color='red', linewidth=2)
+
         # Plot the histogram
-        plt.hist(np.degrees(x_pdf), bins=50, color='blue', alpha=0.6, label='Simulated i', edgecolor='black')
-        
+        plt.hist(simulated_i, bins=50, range=(0, 90), color='blue', alpha=0.6, label='Simulated i', edgecolor='black')
+
         # Add labels and title
         plt.xlabel('Inclination (degrees)', fontsize=14)
         plt.ylabel('Frequency', fontsize=14)
         plt.title('Simulated Inclination Distribution', fontsize=16)
-        
+
         # Add grid lines
         plt.grid(True, linestyle='--', alpha=0.7)
-        
+
         # Add legend
         plt.legend(fontsize=12)
-        
-        
+
         # Show the plot
         plt.show()
 
-    return np.degrees(x_pdf)
+    return simulated_i
 
 if __name__ == '__main__':
     # Generate 1000 simulated i values
-    simulated_i = generate_mock_i(13000, show_plot=True)
\ No newline at end of file
+    simulated_i = generate_mock_i(13000, show_plot=True)
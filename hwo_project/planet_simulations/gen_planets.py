@@ -1,36 +1,95 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from tqdm import tqdm
+from hwo_project import instrumentation, random_streams
 from hwo_project.data import data_utils
-from IPython import embed
+
+# Lower bin edges of the PDF grid (plus the upper edges), planet radius in Earth radii and period in days
+R_BINS = np.arange(0.67, 17.1, 0.1)
+P_BINS = np.arange(10, 640, 1)
 
 def load_probability_grid(file_path):
     return np.load(file_path)
 
-def simulate_random_planets(R, P, grid, nplanets=30000, seed=None):
-    if seed is not None:
-        np.random.seed(seed)
-
-    r_A_pdf = grid.flatten()
-    cum_sum = np.cumsum(r_A_pdf)
-    cum_sum /= cum_sum[-1]
-
-    randu = np.random.uniform(size=nplanets)
-    uidx = [np.argmin(np.abs(irand - cum_sum)) for irand in tqdm(randu, total=nplanets, desc='Generating Random Planets')]
-    idx = np.unravel_index(uidx, grid.shape)
-
-    planet_rad = R[idx[0]]
-    period_days = P[idx[1]]
+def build_grid_cdf(grid):
+    """
+    Build the normalised cumulative distribution of a probability grid.
+
+    :param grid: 2D array of (unnormalised) probabilities, indexed as [R, P].
+    :return: 1D array with the CDF of the flattened grid, ending at exactly 1.
+    """
+    cdf = np.cumsum(grid, axis=None, dtype=np.float64)
+    cdf /= cdf[-1]
+    cdf[-1] = 1.0
+    return cdf
+
+def sample_grid_cells(cdf, nsamples, rng=None):
+    """
+    Draw flat grid cell indices from a precomputed CDF by inverse transform sampling.
+
+    Each draw is a binary search over the CDF, so the cost is O(N log G)
+    instead of comparing every draw against every grid cell.
+
+    :param cdf: CDF of the flattened grid (see build_grid_cdf).
+    :param nsamples: Number of cells to draw.
+    :param rng: Generator to draw from, defaults to a new unseeded Generator.
+    :return: Array of flat cell indices.
+    """
+    randu = random_streams.get_rng(rng).uniform(size=nsamples)
+    return np.searchsorted(cdf, randu, side='right')
+
+def sample_planet_grid(R, P, cdf, shape, nsamples, rng=None, spread_in_cell=False):
+    """
+    Draw planet radii and periods from the gridded occurrence rate PDF.
+
+    :param R: Planet radius bin edges (in Earth radii), one per grid row (plus the upper edge).
+    :param P: Period bin edges (in days), one per grid column (plus the upper edge).
+    :param cdf: CDF of the flattened grid (see build_grid_cdf).
+    :param shape: Shape of the grid the CDF was built from.
+    :param nsamples: Number of planets to draw.
+    :param rng: Generator to draw from, defaults to a new unseeded Generator.
+    :param spread_in_cell: If True, spread draws uniformly inside each (R, P) cell
+        instead of snapping them to the lower cell edge. Needs the upper edges in R and P.
+    :return: Arrays of planet radii and periods.
+    """
+    rng = random_streams.get_rng(rng)
+    R = np.asarray(R)
+    P = np.asarray(P)
+    uidx = sample_grid_cells(cdf, nsamples, rng=rng)
+    ridx, pidx = np.unravel_index(uidx, shape)
+
+    planet_rad = R[ridx]
+    period_days = P[pidx]
+
+    if spread_in_cell:
+        if len(R) < shape[0] + 1 or len(P) < shape[1] + 1:
+            raise ValueError("spread_in_cell needs the upper bin edges in R and P.")
+        planet_rad = planet_rad + rng.uniform(size=nsamples) * np.diff(R)[ridx]
+        period_days = period_days + rng.uniform(size=nsamples) * np.diff(P)[pidx]
+
+    return planet_rad, period_days
+
+@instrumentation.instrument(items=len)
+def simulate_random_planets(R, P, grid, nplanets=30000, seed=None, spread_in_cell=False):
+    """
+    Draw the random planets of the catalog from the PDF grid.
+
+    :param seed: Run seed, SeedSequence or Generator, the draws come from the 'random_planets' stream of a seed.
+    """
+    rng = random_streams.get_rng(seed, 'random_planets')
+
+    cum_sum = build_grid_cdf(grid)
+    planet_rad, period_days = sample_planet_grid(R, P, cum_sum, grid.shape, nplanets, rng=rng,
+                                                 spread_in_cell=spread_in_cell)
 
     return pd.DataFrame({'planet_radius': planet_rad, 'Period(Days)': period_days})
 
-def save_planets_to_csv(planets_df):
-    file_path = data_utils.load_data('random_planets', get_path=True)
-    planets_df.to_csv(file_path, index=False)
+def save_planets_to_csv(planets_df, fmt='csv'):
+    data_utils.save_data(planets_df, 'random_planets', fmt=fmt)
+
+def plot_scatter(planets_df, save=True, show=True):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-def plot_scatter(planets_df):
     # Set the style
     sns.set(style="whitegrid")
 
@@ -79,13 +138,17 @@ def plot_scatter(planets_df):
     plt.tight_layout()
 
     # Save the figure with high resolution
-    fig_dir = data_utils.get_fig_dir_path()
-    plt.savefig(fig_dir + 'random_planets_scatter_presentation.png', dpi=800)
+    if save:
+        fig_dir = data_utils.get_fig_dir_path()
+        plt.savefig(fig_dir + 'random_planets_scatter_presentation.png', dpi=800)
 
     # Show the plot
-    plt.show()
+    if show:
+        plt.show()
+
+def plot_histograms(planets_df, save=True, show=True):
+    import matplotlib.pyplot as plt
 
-def plot_histograms(planets_df):
     fig, axs = plt.subplots(1, 2, figsize=(16, 6))
 
     # Histogram for planet radius
@@ -111,18 +174,18 @@ def plot_histograms(planets_df):
     plt.tight_layout(rect=[0, 0, 1, 0.95])
 
     # Save the figure with high resolution
-    fig_dir = data_utils.get_fig_dir_path()
-    plt.savefig(fig_dir + 'random_planets_histograms_presentation.png', dpi=800)
+    if save:
+        fig_dir = data_utils.get_fig_dir_path()
+        plt.savefig(fig_dir + 'random_planets_histograms_presentation.png', dpi=800)
 
     # Show the plot
-    plt.show()
+    if show:
+        plt.show()
 
-def gen_random_planets(nplanets=25000, show_plots=True, seed=None):
+def gen_random_planets(nplanets=25000, show_plots=True, seed=None, fmt='csv'):
     grid = data_utils.load_data('pdf_grid')
-    R = np.arange(0.67, 17.1, 0.1)
-    P = np.arange(10, 640, 1)
-    random_planets = simulate_random_planets(R=R, P=P, nplanets=nplanets, grid=grid, seed=seed)
-    save_planets_to_csv(random_planets)
+    random_planets = simulate_random_planets(R=R_BINS, P=P_BINS, nplanets=nplanets, grid=grid, seed=seed)
+    save_planets_to_csv(random_planets, fmt=fmt)
     if show_plots:
         plot_scatter(random_planets)
         plot_histograms(random_planets)
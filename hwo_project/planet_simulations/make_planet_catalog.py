@@ -1,10 +1,10 @@
+import numpy as np
+import pandas as pd
+
+from hwo_project import utils, instrumentation, random_streams
 from hwo_project.models import obj_models
 from hwo_project.data import data_utils
 
-from tqdm import tqdm
-
-from IPython import embed
-
 def create_star_objects(stars_df):
     """
     Create a dictionary of Star objects indexed by their tic_id
@@ -26,10 +26,18 @@ def create_star_objects(stars_df):
     return stars_dict
 
 
-def create_planet_objects(planets_df, stars_dict,verbose=False):
+def create_planet_objects(planets_df, stars_dict,verbose=False,rng=None):
     """
     Create Planet objects and extract the desired attributes
+
+    :param rng: Generator or seed for the albedos, resolved once and shared by all the planets.
     """
+    rng = random_streams.get_rng(rng, 'albedos')
+    # Rebuild the classifier once if planet_properties changed, the per-planet calls skip the check
+    utils.get_planet_classifier()
+
+    from tqdm import tqdm
+
     # Create lists to store the new columns
     contrasts = []
     planet_types = []
@@ -44,7 +52,8 @@ def create_planet_objects(planets_df, stars_dict,verbose=False):
             planet_name=row['planet_name'],
             planet_radius=row['planet_radius'],
             period=row['Period(Days)'],
-            star=star
+            star=star,
+            rng=rng
         )
         contrasts.append(planet.lambertian_contrast())
         planet_types.append(planet.planet_type)
@@ -58,6 +67,116 @@ def create_planet_objects(planets_df, stars_dict,verbose=False):
     return contrasts, planet_types, angular_separations, orbital_radii, eff_orbital_radius
 
 
+@instrumentation.instrument(items=lambda columns: len(columns['contrast']))
+def compute_planet_columns(planet_radius, period, star_mass, star_lum, star_inclination, star_distance, rng=None):
+    """
+    Compute the catalog columns for a whole planet population at once.
+
+    All inputs are arrays with one entry per planet, the star columns already
+    gathered from each planet's host star.
+
+    :param planet_radius: Radius of the planets (in Earth radii).
+    :param period: Orbital period of the planets (in days).
+    :param star_mass: Mass of the host stars (in solar masses).
+    :param star_lum: Luminosity of the host stars.
+    :param star_inclination: Inclination of the host star orbits (in degrees).
+    :param star_distance: Distance to the host stars (in parsecs).
+    :param rng: Generator or seed for the albedos, a seed draws from its 'albedos' stream.
+    :return: Dictionary of column arrays, with the same columns a Planet object provides.
+    """
+    orbital_radius = utils.convert_period_to_orbital_radius(period, star_mass)
+    eff_radius = utils.get_eff_orbital_radius(orbital_radius, star_lum)
+    optimal_pos = utils.get_optimal_obs_pos_array(star_inclination)
+    planet_types, albedos = utils.get_exoplanet_types(planet_radius, eff_radius, rng=rng)
+
+    return {
+        'orbital_radius': orbital_radius,
+        'eff_orbital_radius': eff_radius,
+        'optimal_pos': optimal_pos,
+        'angular_separation': utils.get_pos_radius(orbital_radius, optimal_pos, star_inclination) / star_distance,
+        'planet_type': planet_types,
+        'albedo': albedos,
+        'contrast': utils.get_lambertian_contrast(albedos, planet_radius, orbital_radius),
+    }
+
+
+def lookup_host_stars(planets_df, stars_df, star_index=None):
+    """
+    Get the row of the host star of every planet in the star DataFrame.
+
+    Planets with a 'host_star_idx' column carry the StarIndex code of their host,
+    written by dist_planets_to_stars.assign_host_stars with the signature of the
+    star table in attrs['host_star_signature']. Codes with the signature of stars_df
+    are used directly. Codes without it are range checked and compared with
+    'host_star_id' for every planet, and only used if they all match. Otherwise
+    the host_star_id strings are looked up. The last row wins for duplicated
+    tic_ids, as in create_star_objects.
+
+    :param planets_df: DataFrame containing the planet data, with a 'host_star_id' column.
+    :param stars_df: DataFrame containing the star data, with a 'tic_id' column.
+    :param star_index: StarIndex of stars_df['tic_id'].astype(str), built if not given.
+    :return: Array of star row positions.
+    """
+    if star_index is None:
+        star_index = obj_models.StarIndex(stars_df['tic_id'].astype(str))
+
+    host_star_id = planets_df['host_star_id']
+    if 'host_star_idx' in planets_df:
+        codes = planets_df['host_star_idx'].to_numpy()
+        if planets_df.attrs.get('host_star_signature') == star_index.signature:
+            return star_index.rows[codes]
+        if (np.all((codes >= 0) & (codes < len(star_index))) and
+                np.array_equal(star_index.tic_ids[codes], host_star_id.to_numpy(dtype=object))):
+            return star_index.rows[codes]
+
+    return star_index.get_rows(host_star_id.astype(str).to_numpy(dtype=object))
+
+
+def create_planet_population(planets_df, stars_df, rng=None):
+    """
+    Create array-backed populations of the planets and their host stars, instead of one object per row.
+
+    :param planets_df: DataFrame containing the planet data, with a 'host_star_id' column.
+    :param stars_df: DataFrame containing the star data.
+    :param rng: Generator or seed for the albedos, a seed draws from its 'albedos' stream.
+    :return: PlanetPopulation, its stars attribute holds the StarPopulation.
+    """
+    stars = obj_models.StarPopulation.from_dataframe(stars_df)
+    return obj_models.PlanetPopulation(
+        planet_radius=planets_df['planet_radius'].to_numpy(dtype=float),
+        period=planets_df['Period(Days)'].to_numpy(dtype=float),
+        stars=stars,
+        host_index=lookup_host_stars(planets_df, stars_df),
+        names=planets_df['planet_name'].to_numpy() if 'planet_name' in planets_df else None,
+        rng=rng,
+    )
+
+
+def create_planet_columns(planets_df, stars_df, rng=None):
+    """
+    Columnar replacement for create_planet_objects, without any per-planet Python objects.
+
+    :param planets_df: DataFrame containing the planet data, with a 'host_star_id' column.
+    :param stars_df: DataFrame containing the star data, indexed by 'tic_id' values.
+    :param rng: Generator or seed for the albedos, a seed draws from its 'albedos' stream.
+    :return: The same columns as create_planet_objects, as arrays.
+    """
+    star_idx = lookup_host_stars(planets_df, stars_df)
+
+    columns = compute_planet_columns(
+        planet_radius=planets_df['planet_radius'].to_numpy(dtype=float),
+        period=planets_df['Period(Days)'].to_numpy(dtype=float),
+        star_mass=stars_df['st_mass'].to_numpy(dtype=float)[star_idx],
+        star_lum=stars_df['st_lum'].to_numpy(dtype=float)[star_idx],
+        star_inclination=stars_df['inclination'].to_numpy(dtype=float)[star_idx],
+        star_distance=stars_df['sy_dist'].to_numpy(dtype=float)[star_idx],
+        rng=rng,
+    )
+
+    return (columns['contrast'], columns['planet_type'], columns['angular_separation'],
+            columns['orbital_radius'], columns['eff_orbital_radius'])
+
+
 def add_columns(planets_df,
                 contrasts, 
                 planet_types, 
@@ -76,24 +195,38 @@ def add_columns(planets_df,
     planets_df['orbital_radius'] = orbital_radii
     planets_df['eff_orbital_radius'] = eff_orbital_radius
 
-    # Save the updated planet DataFrame to a new CSV file
-    planets_df.to_csv(output_path, index=False)
+    # Save the updated planet DataFrame, the format follows the extension of output_path
+    if output_path is not None:
+        data_utils.write_table(planets_df, output_path)
 
     return planets_df
 
 
 
-def run_create_planet_catalog(verbose=False):
-    stars_df = data_utils.load_data('star_catalog')
-    planets_df = data_utils.load_data('assigned_planets')
+@instrumentation.instrument(items=len)
+def create_planet_catalog(planets_df, stars_df, output_path=None, seed=None):
+    """
+    Add the catalog columns to the assigned planets, optionally saving the result.
+
+    :param planets_df: DataFrame containing the planets with their host star IDs.
+    :param stars_df: DataFrame containing the star data.
+    :param output_path: Path to save the catalog to, None to keep it in memory only.
+    :param seed: Run seed, SeedSequence or Generator for the albedos.
+    :return: DataFrame with the planet catalog.
+    """
+    columns = create_planet_columns(planets_df, stars_df, rng=seed)
+    contrasts, planet_types, angular_separations, orbital_radii,eff_radius = columns
+
+    return add_columns(planets_df.copy(deep=False), contrasts, planet_types, angular_separations, orbital_radii,eff_radius, output_path)
 
-    stars_dict = create_star_objects(stars_df)
 
-    contrasts, planet_types, angular_separations, orbital_radii,eff_radius = create_planet_objects(planets_df, stars_dict)
+def run_create_planet_catalog(verbose=False, fmt='csv', seed=None):
+    stars_df = data_utils.load_data('star_catalog', fmt=fmt)
+    planets_df = data_utils.load_data('assigned_planets', fmt=fmt)
 
-    output_path = data_utils.load_data('planet_catalog', get_path=True)
+    output_path = data_utils.load_data('planet_catalog', get_path=True, fmt=fmt)
 
-    planets_df = add_columns(planets_df, contrasts, planet_types, angular_separations, orbital_radii,eff_radius, output_path)
+    planets_df = create_planet_catalog(planets_df, stars_df, output_path=output_path, seed=seed)
 
     if verbose:
         print(f"Planet catalog saved to {output_path}")
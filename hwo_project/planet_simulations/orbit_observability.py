@@ -0,0 +1,109 @@
+# Fraction of the orbit during which each planet is observable, sampled over the orbital phase
+
+import numpy as np
+import pandas as pd
+
+from hwo_project import utils, instrumentation
+from hwo_project.data import data_utils
+from hwo_project.planet_simulations import make_planet_catalog
+
+
+def iter_orbit_chunks(num_planets, num_phases, max_elements):
+    """
+    Split the planets into chunks whose (planets x phases) arrays have at most max_elements elements.
+
+    :return: Generator of slices of the planets.
+    """
+    chunk_size = max(1, max_elements // num_phases)
+    for start in range(0, num_planets, chunk_size):
+        yield slice(start, min(start + chunk_size, num_planets))
+
+
+@instrumentation.instrument(items=lambda fractions: len(next(iter(fractions.values()), ())))
+def compute_orbit_fractions(orbital_radius, planet_radius, albedo, inclination, distance, tele_dict,
+                            num_phases=360, max_elements=1 << 22):
+    """
+    Compute the fraction of the circular orbit of every planet during which it is observable by every telescope.
+
+    The orbit is sampled at num_phases equally spaced orbital positions phi. At each
+    position the separation follows get_pos_radius, and the phase angle alpha follows
+    cos(alpha) = sin(phi) * sin(inclination), the relation get_optimal_obs_pos inverts.
+    The contrast uses the Lambertian phase function at alpha. The (planets x phases)
+    arrays are evaluated in chunks of at most max_elements elements, so memory does
+    not grow with the number of planets.
+
+    :param orbital_radius: Array of orbital radii of the planets (in AU).
+    :param planet_radius: Array of planet radii (in Earth radii).
+    :param albedo: Array of planet albedos, NaN for planets that are never observable.
+    :param inclination: Array of inclinations of the host stars (in degrees).
+    :param distance: Array of distances of the host stars (in parsecs).
+    :param tele_dict: Dictionary of telescope constraints with the 'iwa' and 'contrast_floor' of every telescope.
+    :param num_phases: Number of orbital positions to sample.
+    :param max_elements: Maximum number of elements of the chunk arrays.
+    :return: Dictionary of telescope name to an array with the observable fraction of every planet.
+    """
+    orbital_radius = np.asarray(orbital_radius, dtype=float)
+    inclination = np.asarray(inclination, dtype=float)
+    distance = np.asarray(distance, dtype=float)
+
+    # Separation and contrast depend on phi only through sin(phi), so positions
+    # with the same sin(phi), e.g. phi and 180 - phi, are evaluated once and weighted
+    sin_phi, weights = np.unique(np.round(np.sin(np.radians(np.arange(num_phases) * (360 / num_phases))), 12),
+                                 return_counts=True)
+    phi = np.degrees(np.arcsin(sin_phi))
+    weights = weights / num_phases
+
+    # Contrast without the phase function, constant over the orbit
+    contrast_scale = utils.get_lambertian_contrast(np.asarray(albedo, dtype=float), planet_radius, orbital_radius,
+                                                   p_alpha=1)
+
+    fractions = {telescope: np.zeros(len(orbital_radius)) for telescope in tele_dict}
+    for chunk in iter_orbit_chunks(len(orbital_radius), num_phases, max_elements):
+        angular_separation = utils.get_pos_radius(orbital_radius[chunk, None], phi[None, :],
+                                                  inclination[chunk, None]) / distance[chunk, None]
+
+        cos_alpha = np.clip(sin_phi[None, :] * np.sin(np.radians(inclination[chunk, None])), -1, 1)
+        contrast = contrast_scale[chunk, None] * utils.calculate_lambertian_phase_function(np.degrees(np.arccos(cos_alpha)))
+
+        for telescope, constraints in tele_dict.items():
+            observable = (angular_separation > constraints['iwa']) & (contrast > constraints['contrast_floor'])
+            fractions[telescope][chunk] = observable @ weights
+
+    return fractions
+
+
+def get_orbit_observability(planets_df, stars_df, tele_dict=None, num_phases=360, max_elements=1 << 22):
+    """
+    Compute the observable fraction of the orbit of every planet of a planet catalog.
+
+    The albedos are recovered from the catalog contrasts, which were computed at a
+    phase angle of 60 degrees, so the catalog does not need to be regenerated.
+
+    :param planets_df: Planet catalog DataFrame.
+    :param stars_df: DataFrame containing the star data.
+    :param tele_dict: Dictionary of telescope constraints, defaults to the package constraints.
+    :param num_phases: Number of orbital positions to sample.
+    :param max_elements: Maximum number of elements of the chunk arrays.
+    :return: DataFrame with the observable fraction for every telescope, with the index of planets_df.
+    """
+    if tele_dict is None:
+        tele_dict = data_utils.load_data('tele_constraints')
+
+    star_idx = make_planet_catalog.lookup_host_stars(planets_df, stars_df)
+    planet_radius = planets_df['planet_radius'].to_numpy(dtype=float)
+    orbital_radius = planets_df['orbital_radius'].to_numpy(dtype=float)
+    albedo = (planets_df['contrast'].to_numpy(dtype=float) /
+              utils.get_lambertian_contrast(1, planet_radius, orbital_radius))
+
+    fractions = compute_orbit_fractions(
+        orbital_radius=orbital_radius,
+        planet_radius=planet_radius,
+        albedo=albedo,
+        inclination=stars_df['inclination'].to_numpy(dtype=float)[star_idx],
+        distance=stars_df['sy_dist'].to_numpy(dtype=float)[star_idx],
+        tele_dict=tele_dict,
+        num_phases=num_phases,
+        max_elements=max_elements,
+    )
+
+    return pd.DataFrame(fractions, index=planets_df.index)
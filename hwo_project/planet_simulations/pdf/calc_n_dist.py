@@ -29,15 +29,64 @@ def evaluate_integral(R_min, R_max, P_min, P_max, alpha_i, beta_i, Ri, Ri_1, dbg
     
     return result
 
+# SAG13 parameters for i=1 and i=2
+ALPHA_LIST = [-0.19, -1.18]  # alpha_1 = -0.19, alpha_2 = -1.18
+BETA_LIST = [0.26, 0.59]   # beta_1 = 0.26, beta_2 = 0.59
+R_I_LIST = [3.4, np.inf]    # R_1 = 0.34, R_2 = 1000000
+GAMMA_LIST = [0.38, 0.73] # gamma_1 = 0.38, gamma_2 = 0.73
+
+# Exact integral of x^p over d(ln x) from lower to upper
+def integrate_power_law_log(lower, upper, power):
+    if power == 0:
+        return np.log(upper) - np.log(lower)
+    return (np.power(upper, power) - np.power(lower, power)) / power
+
+# Closed form of evaluate_integral, vectorized over arrays of bin edges
+def evaluate_integral_analytic(R_min, R_max, P_min, P_max, alpha_i, beta_i, Ri, Ri_1):
+    # The integrand is separable, so the double integral is a product of two 1D integrals
+    R_lower = np.maximum(R_min, Ri_1)
+    R_upper = np.minimum(R_max, Ri)
+
+    return integrate_power_law_log(R_lower, R_upper, alpha_i) * integrate_power_law_log(P_min, P_max, beta_i)
+
+# Closed form of compute_sum, for every (R, P) cell of the bin edges at once
+def compute_sum_grid(R, P, alpha_list=ALPHA_LIST, beta_list=BETA_LIST, R_i_list=R_I_LIST, gamma_list=GAMMA_LIST):
+    """
+    Compute the occurrence rate of every (R, P) cell with the exact integral of the SAG13 power laws.
+
+    :param R: Planet radius bin edges (in Earth radii).
+    :param P: Period bin edges (in years).
+    :return: 2D array of shape (len(R) - 1, len(P) - 1).
+    """
+    R = np.asarray(R, dtype=float)
+    P = np.asarray(P, dtype=float)
+
+    # Cell edges as (n_R, 1) and (1, n_P) arrays
+    R_min, R_max = R[:-1, None], R[1:, None]
+    P_min, P_max = P[None, :-1], P[None, 1:]
+
+    total_sum = np.zeros((len(R) - 1, len(P) - 1))
+    for i in range(1, len(alpha_list) + 1):
+        Ri = R_i_list[i-1]
+        Ri_1 = R_i_list[i-2] if i > 1 else R_min
+
+        integral_result = gamma_list[i-1]*evaluate_integral_analytic(R_min, R_max, P_min, P_max,
+                                                                     alpha_list[i-1], beta_list[i-1], Ri, Ri_1)
+
+        # Cells outside the radius range of this term integrate backwards, they contribute nothing
+        total_sum += np.maximum(integral_result, 0)
+
+    return total_sum
+
 # Function to compute the sum over i=1 and i=2
 def compute_sum(R_min, R_max, P_min, P_max, dbg=False):
     total_sum = 0
     # Constants
     # Parameters for i=1 and i=2
-    alpha_list = [-0.19, -1.18]  # alpha_1 = -0.19, alpha_2 = -1.18
-    beta_list = [0.26, 0.59]   # beta_1 = 0.26, beta_2 = 0.59
-    R_i_list = [3.4, np.inf]    # R_1 = 0.34, R_2 = 1000000
-    gamma_list = [0.38, 0.73] # gamma_1 = 0.38, gamma_2 = 0.73
+    alpha_list = ALPHA_LIST
+    beta_list = BETA_LIST
+    R_i_list = R_I_LIST
+    gamma_list = GAMMA_LIST
 
     for i in range(1, 3):  # i = 1, 2
         Ri = R_i_list[i-1]      # R_i for the current i
@@ -3,10 +3,14 @@ from hwo_project.planet_simulations.pdf import calc_n_dist
 
 from tqdm import tqdm
 
-def compute_integral(R=None,P=None,dbg=False):
+def compute_integral(R=None,P=None,dbg=False,method='analytic',validate=False,rtol=1e-6):
     """
     Function to compute the double integral of the integrand function over the grid of R and P values.
 
+    method='analytic' evaluates the exact integral of the SAG13 power laws for every
+    cell at once, method='dblquad' integrates every cell numerically with scipy.
+    validate=True computes both and raises a ValueError if they disagree by more than rtol.
+
     Returns:
     integral_values : 2D array of the integral values.
     """
@@ -16,6 +20,28 @@ def compute_integral(R=None,P=None,dbg=False):
     if P is None:
         P = np.array([10, 20, 40, 80, 160, 320, 640]) / 365.25
 
+    if method == 'analytic':
+        integral_values = calc_n_dist.compute_sum_grid(R, P)
+    elif method == 'dblquad':
+        integral_values = compute_integral_dblquad(R, P, dbg=dbg)
+    else:
+        raise ValueError(f"Unknown integration method {method}, use 'analytic' or 'dblquad'.")
+
+    if validate:
+        other = compute_integral_dblquad(R, P, dbg=dbg) if method == 'analytic' else calc_n_dist.compute_sum_grid(R, P)
+        if not np.allclose(integral_values, other, rtol=rtol, atol=0):
+            max_diff = np.max(np.abs(integral_values - other) / np.maximum(np.abs(other), np.finfo(float).tiny))
+            raise ValueError(f"Analytic and dblquad integrals disagree, max relative difference {max_diff:.3e}.")
+
+    return R, P, integral_values
+
+def compute_integral_dblquad(R, P, dbg=False):
+    """
+    Function to compute the integral grid cell by cell with scipy's dblquad.
+
+    Returns:
+    integral_values : 2D array of the integral values.
+    """
     integral_values = np.zeros((len(R) - 1, len(P) - 1))
 
     total_iterations = (R.shape[0] - 1) * (P.shape[0] - 1)
@@ -35,7 +61,7 @@ def compute_integral(R=None,P=None,dbg=False):
 
                 pbar.update(1)
 
-    return R, P, integral_values
+    return integral_values
 
 if __name__ == "__main__":
     # Compute the integral values
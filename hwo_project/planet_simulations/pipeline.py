@@ -0,0 +1,84 @@
+# In-memory end-to-end catalog pipeline, tables are passed between stages without file round-trips
+
+import os
+
+from hwo_project import random_streams
+from hwo_project.data import data_utils
+from hwo_project.planet_simulations import gen_planets, dist_planets_to_stars, make_planet_catalog
+
+
+def run_pipeline(num_planets=30000, seed=None, dist_cutoff=None, stars_df=None, raw_stars_df=None,
+                 output_dir=None, save_intermediates=False, fmt='csv', verbose=False):
+    """
+    Run the catalog pipeline with all stages in memory.
+
+    Nothing is written to the package data directory, so several runs can go on
+    at the same time. The tables can optionally be saved to output_dir.
+
+    :param num_planets: Number of random planets to generate.
+    :param seed: Seed for random number generation, every stage draws from its own stream of it.
+    :param dist_cutoff: Maximum distance of the stars (in parsecs), used when the star catalog is extracted.
+    :param stars_df: Star catalog to use, skips the star extraction.
+    :param raw_stars_df: Raw HPIC table to extract the star catalog from, defaults to the raw star file.
+    :param output_dir: Directory to save the planet catalog to, None to keep everything in memory.
+    :param save_intermediates: Also save the star catalog, random planets and assigned planets to output_dir.
+    :param fmt: Storage format of the saved tables, one of data_utils.TABLE_FORMATS.
+    :param verbose: Print progress.
+    :return: Dictionary with the 'star_catalog', 'random_planets', 'assigned_planets' and 'planet_catalog' tables.
+    """
+    tables = {}
+    seed_seq = random_streams.get_seed_seq(seed)
+
+    # Extract the star data
+    if stars_df is None:
+        from hwo_project.star_data_extraction import star_data_extract
+        if verbose:
+            print('Extracting star data...')
+        if raw_stars_df is None:
+            raw_stars_df = star_data_extract.read_raw_stars()
+        stars_df = star_data_extract.clean_star_data(raw_stars_df, dist_cutoff=dist_cutoff, verbose=verbose,
+                                                     seed=seed_seq)
+    tables['star_catalog'] = stars_df
+
+    # Generate the random planets
+    if verbose:
+        print('Generating planet catalog...')
+    tables['random_planets'] = gen_planets.simulate_random_planets(R=gen_planets.R_BINS, P=gen_planets.P_BINS,
+                                                                   grid=data_utils.load_data('pdf_grid'),
+                                                                   nplanets=num_planets, seed=seed_seq)
+
+    # Distribute the planets to stars
+    if verbose:
+        print('Distributing planets to stars...')
+    tables['assigned_planets'] = dist_planets_to_stars.distribute_planets_to_stars(tables['random_planets'], stars_df,
+                                                                                  seed=seed_seq)
+
+    # Make the planet catalog
+    if verbose:
+        print('Creating planet catalog...')
+    tables['planet_catalog'] = make_planet_catalog.create_planet_catalog(tables['assigned_planets'], stars_df,
+                                                                         seed=seed_seq)
+
+    if output_dir is not None:
+        save_tables(tables, output_dir, fmt=fmt, intermediates=save_intermediates)
+        if verbose:
+            print(f'Tables saved to {output_dir}')
+
+    return tables
+
+
+def save_tables(tables, output_dir, fmt='csv', intermediates=False):
+    """
+    Save the pipeline tables to a directory, with the same file names as the package data.
+
+    The saved tables can be read back with data_utils.load_data(..., data_dir=output_dir).
+
+    :param tables: Dictionary of tables from run_pipeline.
+    :param output_dir: Directory to save to, created if needed.
+    :param fmt: Storage format, one of data_utils.TABLE_FORMATS.
+    :param intermediates: Save every table instead of only the planet catalog.
+    :return: List of the saved paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    names = list(tables) if intermediates else ['planet_catalog']
+    return [data_utils.save_data(tables[name], name, fmt=fmt, data_dir=output_dir) for name in names]
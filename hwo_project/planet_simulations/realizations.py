@@ -0,0 +1,151 @@
+# Monte Carlo realizations of the planet catalog and their exo-planet yields
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from hwo_project import utils, random_streams
+from hwo_project.data import data_utils
+from hwo_project.planet_simulations import gen_planets, gen_inclinations, dist_planets_to_stars, make_planet_catalog, catalog_utils
+
+# Inputs shared by every realization, set once per worker process
+_shared_inputs = {}
+
+
+def _init_worker(inputs):
+    _shared_inputs.update(inputs)
+
+
+def simulate_catalog_realization(seed_seq, stars_df, grid, num_planets, redraw_inclinations=True):
+    """
+    Simulate one realization of the planet catalog, with all stages in memory.
+
+    :param seed_seq: SeedSequence (or seed) of this realization, every stage draws from its own stream of it.
+    :param stars_df: DataFrame containing the star data.
+    :param grid: Planet radius vs period PDF grid.
+    :param num_planets: Number of random planets to draw before assigning them to stars.
+    :param redraw_inclinations: Draw new inclinations for the star orbits instead of
+        using the 'inclination' column of stars_df.
+    :return: DataFrame with the catalog columns of the planets that got a host star.
+    """
+    seed_seq = random_streams.get_seed_seq(seed_seq)
+
+    # Draw the planets
+    cdf = gen_planets.build_grid_cdf(grid)
+    planet_radius, period = gen_planets.sample_planet_grid(gen_planets.R_BINS, gen_planets.P_BINS, cdf, grid.shape,
+                                                           num_planets,
+                                                           rng=random_streams.get_rng(seed_seq, 'random_planets'))
+
+    # Distribute the planets to the stars
+    num_stars = len(stars_df)
+    planets_per_star = dist_planets_to_stars.generate_planets_per_star(num_stars, num_planets, 7, 1,
+                                                                       seed=seed_seq, verbose=False)
+    planet_order, offsets = dist_planets_to_stars.assign_planets_to_stars_csr(planets_per_star, num_planets,
+                                                                              seed=seed_seq)
+    host_star_idx = dist_planets_to_stars.get_host_star_index(planet_order, offsets, num_planets)
+    has_host = host_star_idx >= 0
+    host_star_idx = host_star_idx[has_host]
+
+    if redraw_inclinations:
+        inclination = gen_inclinations.generate_mock_i(num_stars, seed=random_streams.get_rng(seed_seq, 'inclinations'))
+    else:
+        inclination = stars_df['inclination'].to_numpy(dtype=float)
+
+    # Evaluate the catalog columns
+    columns = make_planet_catalog.compute_planet_columns(
+        planet_radius=planet_radius[has_host],
+        period=period[has_host],
+        star_mass=stars_df['st_mass'].to_numpy(dtype=float)[host_star_idx],
+        star_lum=stars_df['st_lum'].to_numpy(dtype=float)[host_star_idx],
+        star_inclination=inclination[host_star_idx],
+        star_distance=stars_df['sy_dist'].to_numpy(dtype=float)[host_star_idx],
+        rng=random_streams.get_rng(seed_seq, 'albedos'),
+    )
+
+    return pd.DataFrame(columns)
+
+
+def count_yields(planets_df, tele_dict, planet_types):
+    """
+    Count the observable planets of every type for every telescope.
+
+    :return: Dictionary of counts keyed by (telescope, planet_type).
+    """
+    return catalog_utils.ObservabilityIndex(planets_df).count_telescopes(tele_dict, planet_types)
+
+
+def _run_realization(seed_seq):
+    planets_df = simulate_catalog_realization(seed_seq,
+                                              _shared_inputs['stars_df'],
+                                              _shared_inputs['grid'],
+                                              _shared_inputs['num_planets'],
+                                              _shared_inputs['redraw_inclinations'])
+    return count_yields(planets_df, _shared_inputs['tele_dict'], _shared_inputs['planet_types'])
+
+
+def run_realizations(num_realizations, num_planets=30000, seed=None, num_workers=None,
+                     stars_df=None, tele_dict=None, redraw_inclinations=True):
+    """
+    Run independent catalog realizations across a process pool and collect their yields.
+
+    Every realization gets its own random stream spawned from one master SeedSequence,
+    so the results depend only on the seed and not on the number of workers.
+
+    :param num_realizations: Number of realizations to run.
+    :param num_planets: Number of random planets drawn in each realization.
+    :param seed: Master seed, None for fresh entropy.
+    :param num_workers: Number of worker processes, defaults to the number of cores.
+    :param stars_df: DataFrame containing the star data, defaults to the star catalog.
+    :param tele_dict: Dictionary of telescope constraints, defaults to telescope_constraints.json.
+    :param redraw_inclinations: Draw new star inclinations in every realization.
+    :return: DataFrame of yields with one row per realization and (telescope, planet_type) columns.
+    """
+    if stars_df is None:
+        stars_df = data_utils.load_data('star_catalog')
+    if tele_dict is None:
+        tele_dict = data_utils.load_data('tele_constraints')
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    inputs = {
+        'stars_df': stars_df,
+        'grid': data_utils.load_data('pdf_grid'),
+        'num_planets': num_planets,
+        'redraw_inclinations': redraw_inclinations,
+        'tele_dict': tele_dict,
+        'planet_types': list(utils.get_planet_classifier().exoplanet_types),
+    }
+
+    root_seq = random_streams.get_seed_seq(seed)
+    seed_seqs = [random_streams.child_seed_seq(root_seq, index) for index in range(num_realizations)]
+
+    if num_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_workers, initializer=_init_worker, initargs=(inputs,)) as executor:
+            chunksize = max(1, num_realizations // (4 * num_workers))
+            yields = list(executor.map(_run_realization, seed_seqs, chunksize=chunksize))
+    else:
+        _init_worker(inputs)
+        yields = [_run_realization(seed_seq) for seed_seq in seed_seqs]
+
+    yields_df = pd.DataFrame(yields)
+    yields_df.columns = pd.MultiIndex.from_tuples(yields_df.columns, names=['telescope', 'planet_type'])
+    yields_df.index.name = 'realization'
+
+    return yields_df
+
+
+def summarize_yields(yields_df, percentiles=(5, 16, 50, 84, 95)):
+    """
+    Summarize the per-realization yields with their mean, standard deviation and percentiles.
+
+    :param yields_df: DataFrame of yields from run_realizations.
+    :param percentiles: Percentiles to compute.
+    :return: DataFrame indexed by (telescope, planet_type) with one column per statistic.
+    """
+    summary = pd.DataFrame({'mean': yields_df.mean(), 'std': yields_df.std(ddof=1)})
+    for percentile in percentiles:
+        summary[f'p{percentile}'] = np.percentile(yields_df.to_numpy(), percentile, axis=0)
+
+    return summary
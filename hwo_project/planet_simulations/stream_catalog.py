@@ -0,0 +1,176 @@
+# Streaming generation of the planet catalog in fixed-size chunks
+
+import collections
+import functools
+
+import numpy as np
+import pandas as pd
+
+from hwo_project import instrumentation, random_streams
+from hwo_project.data import data_utils
+from hwo_project.models import obj_models
+from hwo_project.planet_simulations import gen_planets, dist_planets_to_stars, make_planet_catalog
+
+
+def iter_host_chunks(planets_per_star, chunk_size):
+    """
+    Split the planet slots of all stars into chunks.
+
+    Star k owns the planet slots offsets[k]:offsets[k + 1], chunks are consecutive
+    ranges of slots so only chunk_size host indices exist at any time.
+
+    :param planets_per_star: Array of the number of planets for each star.
+    :param chunk_size: Maximum number of planets per chunk.
+    :return: Generator of (first planet number, array of host star indices) tuples.
+    """
+    offsets = np.zeros(len(planets_per_star) + 1, dtype=np.int64)
+    np.cumsum(planets_per_star, out=offsets[1:])
+
+    for start in range(0, offsets[-1], chunk_size):
+        stop = min(start + chunk_size, offsets[-1])
+        host_star_idx = np.searchsorted(offsets, np.arange(start, stop), side='right') - 1
+        yield start, host_star_idx
+
+
+def get_star_columns(stars_df):
+    """
+    Get the star columns used to evaluate the catalog chunks, as arrays.
+    """
+    tic_ids = stars_df['tic_id'].astype(str).to_numpy()
+    star_index = obj_models.StarIndex(tic_ids)
+    return {
+        'tic_id': tic_ids,
+        'code': star_index.row_codes,
+        'signature': star_index.signature,
+        'mass': stars_df['st_mass'].to_numpy(dtype=float),
+        'lum': stars_df['st_lum'].to_numpy(dtype=float),
+        'inclination': stars_df['inclination'].to_numpy(dtype=float),
+        'distance': stars_df['sy_dist'].to_numpy(dtype=float),
+    }
+
+
+def make_catalog_chunk(chunk_index, start, host_star_idx, chunks_seq, cdf, grid_shape, star_columns):
+    """
+    Draw the planets of one chunk from the PDF grid and evaluate their catalog columns.
+
+    Planets are independent draws, so drawing them per chunk gives the same
+    population as drawing them all and shuffling them over the stars. The chunk
+    draws from its own child stream of chunks_seq, so its result only depends on
+    the seed and its index, whichever thread or process evaluates it.
+
+    :param chunk_index: Index of the chunk.
+    :param start: Number of the first planet of the chunk.
+    :param host_star_idx: Array of the host star index of every planet of the chunk.
+    :param chunks_seq: SeedSequence of the chunk streams.
+    :param cdf: CDF of the flattened PDF grid (see gen_planets.build_grid_cdf).
+    :param grid_shape: Shape of the PDF grid.
+    :param star_columns: Dictionary of star columns from get_star_columns.
+    :return: DataFrame with the columns of the planet catalog.
+    """
+    rng = random_streams.chunk_rng(chunks_seq, chunk_index)
+    planet_radius, period = gen_planets.sample_planet_grid(gen_planets.R_BINS, gen_planets.P_BINS, cdf, grid_shape,
+                                                           len(host_star_idx), rng=rng)
+
+    columns = make_planet_catalog.compute_planet_columns(
+        planet_radius=planet_radius,
+        period=period,
+        star_mass=star_columns['mass'][host_star_idx],
+        star_lum=star_columns['lum'][host_star_idx],
+        star_inclination=star_columns['inclination'][host_star_idx],
+        star_distance=star_columns['distance'][host_star_idx],
+        rng=rng,
+    )
+    planet_numbers = np.arange(start + 1, start + len(host_star_idx) + 1).astype(str)
+
+    chunk = pd.DataFrame({
+        'planet_radius': planet_radius,
+        'Period(Days)': period,
+        'host_star_id': star_columns['tic_id'][host_star_idx],
+        'host_star_idx': star_columns['code'][host_star_idx],
+        'planet_name': np.char.add('Planet_', planet_numbers),
+        'contrast': columns['contrast'],
+        'planet_type': columns['planet_type'],
+        'angular_separation': columns['angular_separation'],
+        'orbital_radius': columns['orbital_radius'],
+        'eff_orbital_radius': columns['eff_orbital_radius'],
+    })
+    chunk.attrs['host_star_signature'] = star_columns['signature']
+    return chunk
+
+
+def iter_catalog_chunks(host_chunks, stars_df, grid, chunks_seq, executor=None, max_pending=4):
+    """
+    Evaluate the catalog chunks in order, in this process or with an executor.
+
+    With an executor at most max_pending chunks are in flight, so memory stays
+    bounded, and the chunks still come out in order.
+
+    :param host_chunks: Generator from iter_host_chunks.
+    :param stars_df: DataFrame containing the star data.
+    :param grid: Planet radius vs period PDF grid.
+    :param chunks_seq: SeedSequence of the chunk streams.
+    :param executor: concurrent.futures executor, None to evaluate the chunks here.
+    :param max_pending: Maximum number of chunks submitted to the executor at once.
+    :return: Generator of DataFrames with the columns of the planet catalog.
+    """
+    task = functools.partial(make_catalog_chunk, chunks_seq=chunks_seq, cdf=gen_planets.build_grid_cdf(grid),
+                             grid_shape=grid.shape, star_columns=get_star_columns(stars_df))
+    chunks = ((chunk_index, start, host_star_idx) for chunk_index, (start, host_star_idx) in enumerate(host_chunks))
+
+    if executor is None:
+        for args in chunks:
+            yield task(*args)
+        return
+
+    pending = collections.deque()
+    for args in chunks:
+        pending.append(executor.submit(task, *args))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+@instrumentation.instrument(items=lambda result: result[1])
+def run_streaming_catalog(num_planets, chunk_size=1_000_000, seed=None, fmt='csv', stars_df=None, verbose=False,
+                          executor=None, max_pending=4):
+    """
+    Generate, assign and evaluate the planet catalog in chunks and append them to the output store.
+
+    Peak memory is set by chunk_size and the size of the star table, not by num_planets.
+    The intermediate random_planets and assigned_planets tables are not written.
+    Every chunk draws from its own stream of the seed, so the catalog is the same
+    whether the chunks are evaluated here, in threads or in processes.
+
+    :param num_planets: Total number of planets to generate.
+    :param chunk_size: Number of planets per chunk.
+    :param seed: Seed for random number generation, None for fresh entropy.
+    :param fmt: Storage format of the tables, one of data_utils.TABLE_FORMATS.
+    :param stars_df: DataFrame containing the star data, defaults to the star catalog.
+    :param verbose: Print progress.
+    :param executor: concurrent.futures executor to evaluate the chunks with, None to evaluate them here.
+    :param max_pending: Maximum number of chunks submitted to the executor at once.
+    :return: Path of the planet catalog and its number of planets.
+    """
+    if stars_df is None:
+        stars_df = data_utils.load_data('star_catalog', fmt=fmt)
+
+    seed_seq = random_streams.get_seed_seq(seed)
+
+    planets_per_star = dist_planets_to_stars.generate_planets_per_star(len(stars_df), num_planets, 7, 1,
+                                                                       seed=seed_seq, verbose=verbose)
+    num_chunks = -(-int(np.sum(planets_per_star)) // chunk_size)
+
+    host_chunks = iter_host_chunks(planets_per_star, chunk_size)
+    catalog_chunks = iter_catalog_chunks(host_chunks, stars_df, data_utils.load_data('pdf_grid'),
+                                         random_streams.stage_seed_seq(seed_seq, 'catalog_chunks'),
+                                         executor=executor, max_pending=max_pending)
+
+    out_path = data_utils.load_data('planet_catalog', get_path=True, fmt=fmt)
+    with data_utils.ChunkedTableWriter(out_path) as writer:
+        for chunk in catalog_chunks:
+            writer.append(chunk)
+            if verbose:
+                print(f"Chunk {writer.num_chunks}/{num_chunks} written, {writer.num_rows} planets.")
+
+    return out_path, writer.num_rows
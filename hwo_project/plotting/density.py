@@ -0,0 +1,148 @@
+# Density rendering of large catalogs, points are binned into per-type 2D histograms and drawn as one image
+
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from matplotlib import colors as mcolors
+from matplotlib.patches import Patch
+
+# Catalogs with more points than this are drawn as densities by default
+MAX_SCATTER_POINTS = 50_000
+
+# Default resolutions of the saved plots, density images are already binned so a higher resolution only adds render time
+DENSITY_DPI = 200
+SCATTER_DPI = 800
+
+
+def use_density(num_points, mode='auto'):
+    """
+    Decide whether to draw a density image or a scatter plot.
+
+    :param num_points: Number of points to draw.
+    :param mode: 'scatter', 'density' or 'auto' to draw densities above MAX_SCATTER_POINTS points.
+    """
+    if mode not in ('auto', 'scatter', 'density'):
+        raise ValueError(f"Unknown plot mode: {mode}")
+    return mode == 'density' or (mode == 'auto' and num_points > MAX_SCATTER_POINTS)
+
+
+def get_plot_dpi(df, mode='auto', dpi=None, **kwargs):
+    """
+    Get the resolution to save a catalog plot at.
+
+    :param df: DataFrame of the plotted points.
+    :param mode: Plot mode, see use_density.
+    :param dpi: Resolution asked for, None for DENSITY_DPI in density mode and SCATTER_DPI in scatter mode.
+    :param kwargs: Other arguments of the plotting function, ignored.
+    """
+    if dpi is not None:
+        return dpi
+    return DENSITY_DPI if use_density(len(df), mode) else SCATTER_DPI
+
+
+def _bin_axis(values, num_bins, value_range, log):
+    """
+    Get the bin index of every value along one axis, -1 for values outside the range.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = np.log10(values) if log else np.asarray(values, dtype=float)
+
+    if value_range is None:
+        finite = scaled[np.isfinite(scaled)]
+        lo, hi = (finite.min(), finite.max()) if len(finite) else (0.0, 1.0)
+    else:
+        lo, hi = np.log10(value_range) if log else value_range
+    if hi <= lo:
+        hi = lo + 1
+
+    idx = np.floor((scaled - lo) / (hi - lo) * num_bins)
+    # The upper edge belongs to the last bin
+    idx[scaled == hi] = num_bins - 1
+    idx[~np.isfinite(idx) | (idx < 0) | (idx >= num_bins)] = -1
+
+    edges = np.linspace(lo, hi, num_bins + 1)
+    return idx.astype(np.intp), 10**edges if log else edges
+
+
+def bin_density(x, y, categories, category_names, bins=(400, 300), x_range=None, y_range=None,
+                x_log=False, y_log=False):
+    """
+    Bin points into one 2D histogram per category.
+
+    :param x: Array of x values.
+    :param y: Array of y values.
+    :param categories: Array of the category of every point.
+    :param category_names: Categories to bin, points of other categories are skipped.
+    :param bins: Number of (x, y) bins.
+    :param x_range: (min, max) of the x bins, defaults to the range of the data.
+    :param y_range: (min, max) of the y bins, defaults to the range of the data.
+    :param x_log: Bin x in log10 space.
+    :param y_log: Bin y in log10 space.
+    :return: Counts with shape (len(category_names), y bins, x bins), x bin edges and y bin edges.
+    """
+    num_x, num_y = bins
+    ix, x_edges = _bin_axis(x, num_x, x_range, x_log)
+    iy, y_edges = _bin_axis(y, num_y, y_range, y_log)
+    code = pd.Index(list(category_names)).get_indexer(np.asarray(categories, dtype=object))
+
+    keep = (ix >= 0) & (iy >= 0) & (code >= 0)
+    shape = (len(category_names), num_y, num_x)
+    flat_idx = np.ravel_multi_index((code[keep], iy[keep], ix[keep]), shape)
+    counts = np.bincount(flat_idx, minlength=np.prod(shape)).reshape(shape)
+
+    return counts, x_edges, y_edges
+
+
+def density_image(counts, category_colors):
+    """
+    Turn per-category counts into an RGBA image.
+
+    Every pixel gets the mix of the category colors weighted by their counts, and
+    an opacity growing with the log of the total count, so sparse outliers stay
+    visible next to dense regions.
+
+    :param counts: Counts from bin_density.
+    :param category_colors: One matplotlib color per category.
+    :return: Array of shape (y bins, x bins, 4).
+    """
+    rgb = np.array([mcolors.to_rgb(color) for color in category_colors])
+    total = counts.sum(axis=0)
+
+    image = np.zeros(total.shape + (4,))
+    image[..., :3] = np.einsum('kyx,kc->yxc', counts, rgb) / np.maximum(total, 1)[..., None]
+    if total.max() > 0:
+        image[..., 3] = np.log1p(total) / np.log1p(total.max())
+    return image
+
+
+def draw_density(ax, x, y, categories, category_colors, bins=(400, 300), x_range=None, y_range=None,
+                 x_log=False, y_log=False, legend_kwargs=None):
+    """
+    Draw points as a density image with one color channel per category.
+
+    The drawing cost depends on the number of bins, not on the number of points.
+
+    :param ax: Matplotlib axes to draw on.
+    :param category_colors: Dictionary of category to color, its keys are the categories drawn.
+    :param legend_kwargs: Keyword arguments of the legend, None to skip the legend. Give an explicit loc,
+        placing the legend at loc='best' over the image is slow.
+    :return: The QuadMesh of the image.
+
+    See bin_density for the other parameters.
+    """
+    names = list(category_colors)
+    counts, x_edges, y_edges = bin_density(x, y, categories, names, bins=bins, x_range=x_range, y_range=y_range,
+                                           x_log=x_log, y_log=y_log)
+
+    if x_log:
+        ax.set_xscale('log')
+    if y_log:
+        ax.set_yscale('log')
+    mesh = ax.pcolormesh(x_edges, y_edges, density_image(counts, category_colors.values()), rasterized=True)
+
+    if legend_kwargs is not None:
+        present = counts.sum(axis=(1, 2)) > 0
+        handles = [Patch(color=category_colors[name], label=name) for name, shown in zip(names, present) if shown]
+        ax.legend(handles=handles, **legend_kwargs)
+
+    return mesh
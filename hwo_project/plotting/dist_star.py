@@ -2,38 +2,54 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from hwo_project.data import data_utils
 
-# Load the data
-df = data_utils.load_data('star_catalog')
 
-# Set the style
-sns.set(style="dark")
+def plot_dist_star(df=None, save=True, show=True):
+    """
+    Plot the histogram of the distances of the stars in the star catalog.
 
-# Create the figure and axis
-plt.figure(figsize=(12, 8))
+    :param df: Star catalog DataFrame, defaults to the package star catalog.
+    :param save: Save the figure to the figures directory.
+    :param show: Show the figure.
+    """
+    # Load the data
+    if df is None:
+        df = data_utils.load_data('star_catalog')
 
-# Plot the histogram
-sns.histplot(df['sy_dist'], bins=30, kde=False, color='skyblue', edgecolor='black', alpha=0.7)
+    # Set the style
+    sns.set(style="dark")
 
-# Calculate mean and median
-mean_dist = df['sy_dist'].mean()
-median_dist = df['sy_dist'].median()
+    # Create the figure and axis
+    plt.figure(figsize=(12, 8))
 
-# Add labels and title with larger font sizes
-plt.xlabel('Distance (parsecs)', fontsize=24)
-plt.ylabel('Frequency', fontsize=24)
-plt.title('Histogram of Star Distances', fontsize=18)
+    # Plot the histogram
+    sns.histplot(df['sy_dist'], bins=30, kde=False, color='skyblue', edgecolor='black', alpha=0.7)
 
-# Add a legend
-plt.legend(fontsize=24)
+    # Calculate mean and median
+    mean_dist = df['sy_dist'].mean()
+    median_dist = df['sy_dist'].median()
 
-# Add grid with specific style
-plt.grid(True, linestyle='--', alpha=0.5)
+    # Add labels and title with larger font sizes
+    plt.xlabel('Distance (parsecs)', fontsize=24)
+    plt.ylabel('Frequency', fontsize=24)
+    plt.title('Histogram of Star Distances', fontsize=18)
 
-# Adjust layout
-plt.tight_layout()
+    # Add a legend
+    plt.legend(fontsize=24)
 
-# Save the figure with high resolution
-plt.savefig(data_utils.get_fig_dir_path() + 'dist_star_presentation.png', dpi=800)
+    # Add grid with specific style
+    plt.grid(True, linestyle='--', alpha=0.5)
 
-# Show the plot
-plt.show()
\ No newline at end of file
+    # Adjust layout
+    plt.tight_layout()
+
+    # Save the figure with high resolution
+    if save:
+        plt.savefig(data_utils.get_fig_dir_path() + 'dist_star_presentation.png', dpi=800)
+
+    # Show the plot
+    if show:
+        plt.show()
+
+
+if __name__ == '__main__':
+    plot_dist_star()
@@ -0,0 +1,201 @@
+# Headless batch rendering of the project figures, only the figures whose inputs changed are redrawn
+
+import os
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+
+from hwo_project.data import data_utils, stage_cache
+
+# Registered figures, name -> dictionary with the plotting function, its input datasets and output file
+FIGURES = {}
+
+# Input tables shared by every figure, set once per worker process
+_shared_inputs = {}
+
+
+def register_figure(name, func, inputs=None, filename=None, dpi=800, kwargs=None, code=(), depends=()):
+    """
+    Register a figure for batch rendering.
+
+    The plotting function draws on a new current figure, the batch saves it.
+    Functions that save or show the figure themselves are called with save=False
+    and show=False through kwargs.
+
+    :param name: Name of the figure.
+    :param func: Plotting function as 'module:function', imported only when the figure is rendered.
+    :param inputs: Dictionary of keyword argument of func to the name of the dataset it takes.
+    :param filename: File name of the figure in the figures directory, defaults to name + '.png'.
+    :param dpi: Resolution of the saved figure, or a function as 'module:function' called with the
+        arguments of func that returns it.
+    :param kwargs: Other keyword arguments of func.
+    :param code: Other functions used by the figure, as 'module:function', whose source is hashed with func.
+    :param depends: Other datasets the figure loads itself, e.g. through data_utils.load_data, which are
+        hashed with the inputs but not passed to func.
+    """
+    FIGURES[name] = {
+        'func': func,
+        'inputs': dict(inputs or {}),
+        'filename': filename or name + '.png',
+        'dpi': dpi,
+        'kwargs': dict(kwargs or {}),
+        'code': tuple(code),
+        'depends': tuple(depends),
+    }
+
+
+register_figure('contrast_vs_angular_separation',
+                'hwo_project.plotting.plot_contrast_vs_angular_separation:plot_contrast_vs_angular_separation',
+                inputs={'df': 'planet_catalog'}, dpi='hwo_project.plotting.density:get_plot_dpi',
+                kwargs={'save': False}, code=('hwo_project.plotting.density:draw_density',),
+                depends=('tele_constraints',))
+register_figure('simulated_planet_populations',
+                'hwo_project.plotting.plot_planet_radius_vs_orbital_radius:plot_planet_radius_vs_orbital_radius',
+                inputs={'df': 'planet_catalog'}, dpi='hwo_project.plotting.density:get_plot_dpi',
+                kwargs={'save': False}, code=('hwo_project.plotting.density:draw_density',))
+register_figure('dist_star_presentation', 'hwo_project.plotting.dist_star:plot_dist_star',
+                inputs={'df': 'star_catalog'}, kwargs={'save': False, 'show': False})
+register_figure('luminosity_violin_plot_presentation', 'hwo_project.plotting.star_scatter_plot:plot_luminosity_violin',
+                inputs={'data': 'star_catalog'}, kwargs={'save': False, 'show': False})
+register_figure('exoplanet_properties', 'hwo_project.plotting.planet_properties:plot_planet_properties',
+                inputs={'df': 'planet_properties'}, dpi=100, kwargs={'save': False, 'show': False})
+register_figure('random_planets_scatter_presentation', 'hwo_project.planet_simulations.gen_planets:plot_scatter',
+                inputs={'planets_df': 'random_planets'}, kwargs={'save': False, 'show': False})
+register_figure('random_planets_histograms_presentation', 'hwo_project.planet_simulations.gen_planets:plot_histograms',
+                inputs={'planets_df': 'random_planets'}, kwargs={'save': False, 'show': False})
+register_figure('inclination_pdf', 'hwo_project.plotting.inclination_pdf:plot_inclination_pdf',
+                kwargs={'show': False})
+register_figure('phase_angle_vs_inclination',
+                'hwo_project.plotting.phase_angle_vs_inclination:plot_phase_angle_vs_inclination',
+                kwargs={'show': False})
+register_figure('optimal_obs_pos_vs_inclination', 'hwo_project.plotting.plot_inclinations:plot_inclinations',
+                kwargs={'show': False})
+
+
+def resolve(func):
+    """
+    Import a function given as 'module:function'.
+    """
+    module, name = func.split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+def _use_agg():
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _init_worker(inputs):
+    _use_agg()
+    _shared_inputs.update(inputs)
+
+
+def _render(figure, path, dpi):
+    """
+    Render a registered figure from the shared inputs and save it.
+    """
+    import matplotlib.pyplot as plt
+
+    kwargs = {arg: _shared_inputs[dataset] for arg, dataset in figure['inputs'].items()}
+    if isinstance(dpi, str):
+        dpi = resolve(dpi)(**kwargs, **figure['kwargs'])
+
+    # Keep style changes, e.g. from seaborn, from leaking into the next figure of the worker
+    with plt.rc_context():
+        resolve(figure['func'])(**kwargs, **figure['kwargs'])
+        fig = plt.gcf()
+        fig.savefig(path, dpi=dpi)
+        plt.close('all')
+
+
+def render_figures(names=None, fmt='csv', fig_dir=None, dpi=None, num_workers=None, force=False, verbose=True):
+    """
+    Render the registered figures with the Agg backend, skipping those whose inputs are unchanged.
+
+    A figure is fresh when its input tables, the source of its plotting code and
+    its parameters hash the same as when it was last rendered, see stage_cache.StageCache.
+    Every input table is loaded once, and the stale figures are spread across a
+    process pool that receives the tables once per worker.
+
+    :param names: Names of the figures to render, defaults to all the registered figures.
+    :param fmt: Storage format of the input tables, one of data_utils.TABLE_FORMATS.
+    :param fig_dir: Directory to save the figures to, defaults to the package figures directory.
+    :param dpi: Resolution of every figure, defaults to the registered resolutions.
+    :param num_workers: Number of worker processes, defaults to the number of cores, 1 renders in this process.
+    :param force: Render every figure, even those whose inputs are unchanged.
+    :param verbose: Print the figures that are rendered, reused or skipped.
+    :return: Dictionary of figure name to True if it was rendered, False if it was fresh,
+        None if it was skipped because an input is missing.
+    """
+    names = list(FIGURES) if names is None else list(names)
+    unknown = [name for name in names if name not in FIGURES]
+    if unknown:
+        raise ValueError(f"Unknown figures {unknown}, use some of {list(FIGURES)}.")
+
+    if fig_dir is None:
+        fig_dir = data_utils.get_fig_dir_path()
+    os.makedirs(fig_dir, exist_ok=True)
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    _use_agg()
+    cache = stage_cache.StageCache(data_utils.get_manifest_dir())
+    status = {}
+    stale = {}
+
+    for name in names:
+        figure = FIGURES[name]
+        inputs = [data_utils.load_data(dataset, get_path=True, fmt=fmt)
+                  for dataset in list(figure['inputs'].values()) + list(figure['depends'])]
+        missing = [path for path in inputs if not os.path.exists(path)]
+        if missing:
+            if verbose:
+                print(f"Skipping {name}, missing inputs: {missing}")
+            status[name] = None
+            continue
+
+        job = {
+            'path': os.path.join(fig_dir, figure['filename']),
+            'dpi': figure['dpi'] if dpi is None else dpi,
+            'inputs': inputs,
+            'code': [resolve(func) for func in (figure['func'],) + figure['code']],
+        }
+        if isinstance(job['dpi'], str):
+            job['code'].append(resolve(job['dpi']))
+        job['params'] = {'dpi': job['dpi'], 'kwargs': figure['kwargs']}
+
+        if not force and cache.is_fresh(f'figure.{name}', inputs, [job['path']], job['params'], job['code']):
+            status[name] = False
+        else:
+            stale[name] = job
+
+    # Load every table needed by a stale figure once
+    datasets = {dataset for name in stale for dataset in FIGURES[name]['inputs'].values()}
+    shared = {dataset: data_utils.load_data(dataset, fmt=fmt) for dataset in datasets}
+
+    def rendered(name):
+        job = stale[name]
+        cache.record(f'figure.{name}', job['inputs'], [job['path']], job['params'], job['code'])
+        status[name] = True
+        if verbose:
+            print(f"Rendered {name} to {job['path']}")
+
+    if num_workers > 1 and len(stale) > 1:
+        with ProcessPoolExecutor(max_workers=min(num_workers, len(stale)), initializer=_init_worker,
+                                 initargs=(shared,)) as executor:
+            futures = {name: executor.submit(_render, FIGURES[name], job['path'], job['dpi'])
+                       for name, job in stale.items()}
+            for name, future in futures.items():
+                future.result()
+                rendered(name)
+    else:
+        _init_worker(shared)
+        for name, job in stale.items():
+            _render(FIGURES[name], job['path'], job['dpi'])
+            rendered(name)
+
+    if verbose:
+        for name in names:
+            if status[name] is False:
+                print(f"{name} is up to date")
+
+    return status
@@ -2,45 +2,61 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from hwo_project.data import data_utils
 
-df = data_utils.load_data("planet_properties")
 
-fig, ax = plt.subplots(figsize=(12, 8))
+def plot_planet_properties(df=None, save=True, show=True):
+    """
+    Plot the planet radius and orbital radius ranges of the planet types.
 
-lower_bound_y = df['planet_radius_lower']
-upper_bound_y = df['planet_radius_upper']
+    :param df: Planet properties DataFrame, defaults to the package planet properties.
+    :param save: Save the figure to the figures directory.
+    :param show: Show the figure.
+    """
+    if df is None:
+        df = data_utils.load_data("planet_properties")
 
-lower_bound_x = df['orbitals_radius_lower']
-upper_bound_x = df['orbitals_radius_upper']
+    fig, ax = plt.subplots(figsize=(12, 8))
 
-albedo_range_upper = df['albedo_upper']
-albedo_range_lower = df['albedo_lower']
+    lower_bound_y = df['planet_radius_lower']
+    upper_bound_y = df['planet_radius_upper']
 
-text = df['exoplanet_type']
+    lower_bound_x = df['orbitals_radius_lower']
+    upper_bound_x = df['orbitals_radius_upper']
 
-# Define a colormap
-cmap = plt.get_cmap("viridis") 
+    albedo_range_upper = df['albedo_upper']
+    albedo_range_lower = df['albedo_lower']
 
-norm = mcolors.Normalize(vmin=0, vmax=len(df))
+    text = df['exoplanet_type']
 
-for i in range(len(df)):
-    color = cmap(norm(i))
-    ax.fill_betweenx([lower_bound_y[i], upper_bound_y[i]], lower_bound_x[i], upper_bound_x[i], color=color, alpha=0.5)
-    mid_x = (lower_bound_x[i] + upper_bound_x[i]) / 2
-    mid_y = (lower_bound_y[i] + upper_bound_y[i]) / 2
-    ax.text(mid_x, mid_y, text[i], fontsize=12, ha='center', va='center', color='black', weight='bold')
+    # Define a colormap
+    cmap = plt.get_cmap("viridis") 
 
-ax.set_xlabel(r'Orbital Radius $\times \frac{L}{L_{\odot}}$ (AU)', fontsize=24)
-ax.set_ylabel('Planet Radius (R⊕)', fontsize=20)
-ax.set_xlim(0, 3)
-ax.set_title('Exoplanet Properties', fontsize=20)
-ax.grid(True, linestyle='--', alpha=0.7)
+    norm = mcolors.Normalize(vmin=0, vmax=len(df))
 
-# Custom legend
-handles = [plt.Line2D([0], [0], color=cmap(norm(i)), lw=4, alpha=0.5) for i in range(len(df))]
-labels = [f'{text[i]}: Albedo {albedo_range_lower[i]} - {albedo_range_upper[i]}' for i in range(len(df))]
-ax.legend(handles, labels, fontsize=14, loc='upper right', bbox_to_anchor=(1.2, 1))
+    for i in range(len(df)):
+        color = cmap(norm(i))
+        ax.fill_betweenx([lower_bound_y[i], upper_bound_y[i]], lower_bound_x[i], upper_bound_x[i], color=color, alpha=0.5)
+        mid_x = (lower_bound_x[i] + upper_bound_x[i]) / 2
+        mid_y = (lower_bound_y[i] + upper_bound_y[i]) / 2
+        ax.text(mid_x, mid_y, text[i], fontsize=12, ha='center', va='center', color='black', weight='bold')
 
-plt.tight_layout(rect=[0, 0, 0.95, 1])
+    ax.set_xlabel(r'Orbital Radius $\times \frac{L}{L_{\odot}}$ (AU)', fontsize=24)
+    ax.set_ylabel('Planet Radius (R⊕)', fontsize=20)
+    ax.set_xlim(0, 3)
+    ax.set_title('Exoplanet Properties', fontsize=20)
+    ax.grid(True, linestyle='--', alpha=0.7)
 
-plt.savefig(data_utils.get_fig_dir_path()+'exoplanet_properties.png')
-plt.show()
\ No newline at end of file
+    # Custom legend
+    handles = [plt.Line2D([0], [0], color=cmap(norm(i)), lw=4, alpha=0.5) for i in range(len(df))]
+    labels = [f'{text[i]}: Albedo {albedo_range_lower[i]} - {albedo_range_upper[i]}' for i in range(len(df))]
+    ax.legend(handles, labels, fontsize=14, loc='upper right', bbox_to_anchor=(1.2, 1))
+
+    plt.tight_layout(rect=[0, 0, 0.95, 1])
+
+    if save:
+        plt.savefig(data_utils.get_fig_dir_path()+'exoplanet_properties.png')
+    if show:
+        plt.show()
+
+
+if __name__ == '__main__':
+    plot_planet_properties()
@@ -54,13 +54,15 @@ def plot_grid(R, P, integral_values):
     ax.set_facecolor('black')
     plt.show()
 
-# Example usage
-R = np.array([0.67, 1.72, 3.88, 5.16, 7.6, 17])
-P = np.array([10, 20, 40, 80, 160, 320, 640])
-integral_values = np.array([[0.001, 0.02, 0.04, 0.07, 0.11, 0.17],
-                            [0.335, 0.527, 0.73, 0.92, 1.12, 2.72],
-                            [0.85, 1.28, 1.94, 2.92, 3.6, 5.0],
-                            [1.35, 2.14, 3.89, 5.93, 7.75, 9.29],
-                            [3.55, 5.85, 7.96, 9.74, 12.08, 13.88]])
 
-plot_grid(R, P, integral_values)
+if __name__ == '__main__':
+    # Example usage
+    R = np.array([0.67, 1.72, 3.88, 5.16, 7.6, 17])
+    P = np.array([10, 20, 40, 80, 160, 320, 640])
+    integral_values = np.array([[0.001, 0.02, 0.04, 0.07, 0.11, 0.17],
+                                [0.335, 0.527, 0.73, 0.92, 1.12, 2.72],
+                                [0.85, 1.28, 1.94, 2.92, 3.6, 5.0],
+                                [1.35, 2.14, 3.89, 5.93, 7.75, 9.29],
+                                [3.55, 5.85, 7.96, 9.74, 12.08, 13.88]])
+
+    plot_grid(R, P, integral_values)
@@ -5,12 +5,25 @@ import matplotlib.pyplot as plt
 from hwo_project import utils
 from hwo_project.data import data_utils
 from hwo_project.planet_simulations import catalog_utils
+from hwo_project.plotting import density
 
 import astropy.units as u
 
-def plot_contrast_vs_angular_separation():
+def plot_contrast_vs_angular_separation(df=None, mode='auto', bins=(800, 400), save=True, dpi=None):
+    """
+    Plot the contrast vs angular separation of the planet catalog.
+
+    :param df: Planet catalog DataFrame, defaults to the package planet catalog.
+    :param mode: 'scatter' for one marker per planet, 'density' for a 2D histogram image with one
+        color per planet type, 'auto' for density above density.MAX_SCATTER_POINTS planets.
+    :param bins: Number of (angular separation, contrast) bins of the density image.
+    :param save: Save the figure to the figures directory.
+    :param dpi: Resolution of the saved figure, defaults to density.DENSITY_DPI in density mode and
+        density.SCATTER_DPI in scatter mode.
+    """
     # Load the updated planets data
-    df = data_utils.load_data('planet_catalog')
+    if df is None:
+        df = data_utils.load_data('planet_catalog')
 
     # Get the IWA
     iwa_hwo = utils.calculate_iwa()
@@ -52,11 +65,20 @@ def plot_contrast_vs_angular_separation():
     # Plot the contrast vs angular separation
     plt.figure(figsize=(20, 10))
 
-    for planet_type in colors.keys():
-        mask = df['planet_type'] == planet_type
-        plt.scatter(df[mask]['angular_separation'], df[mask]['contrast'], 
-                    c=colors[planet_type], marker=markers[planet_type], 
-                    label=planet_type, alpha=0.6, edgecolor='black',s=200)
+    if density.use_density(len(df), mode):
+        density.draw_density(plt.gca(), df['angular_separation'].to_numpy(), df['contrast'].to_numpy(),
+                             df['planet_type'].to_numpy(), colors, bins=bins, x_range=(0, 0.2),
+                             y_range=(1e-11, 1e-2), y_log=True)
+        # Empty scatters give the legend entries of the planet types
+        for planet_type in colors.keys():
+            plt.scatter([], [], c=colors[planet_type], marker=markers[planet_type],
+                        label=planet_type, alpha=0.6, edgecolor='black', s=200)
+    else:
+        for planet_type in colors.keys():
+            mask = df['planet_type'] == planet_type
+            plt.scatter(df[mask]['angular_separation'], df[mask]['contrast'], 
+                        c=colors[planet_type], marker=markers[planet_type], 
+                        label=planet_type, alpha=0.6, edgecolor='black',s=200)
 
     plt.xlabel('Angular Separation (arcsec)', fontsize=20, fontdict=font_dict)
     plt.ylabel('Contrast', fontsize=20, fontdict=font_dict)
@@ -87,7 +109,8 @@ def plot_contrast_vs_angular_separation():
 
     plt.legend(framealpha=0.3, fontsize=18, loc='upper right', bbox_to_anchor=(1., 1))
     plt.tight_layout(rect=[0.01, 0., 1, 1])
-    plt.savefig(data_utils.get_fig_dir_path() + 'contrast_vs_angular_separation.png', dpi=800)
+    if save:
+        plt.savefig(data_utils.get_fig_dir_path() + 'contrast_vs_angular_separation.png', dpi=density.get_plot_dpi(df, mode, dpi))
     #plt.show()
 
 
@@ -2,9 +2,7 @@ import pandas as pd
 import matplotlib.pyplot as plt
 
 from hwo_project.data import data_utils
-
-# Load the updated planets data
-df = data_utils.load_data('planet_catalog')
+from hwo_project.plotting import density
 
 # Define colors for each planet type
 colors = {
@@ -28,96 +26,96 @@ sizes = {
     'gas_giants': 170,
 }
 
-# Create a figure with three rows and two columns
-plt.figure(figsize=(25, 15))
-
-# Plot 1: orbital radius < 1.5 and planet_radius < 1.5
-plt.subplot(3, 2, 5)
-filtered_df = df[(df['orbital_radius'] < 1.5) & (df['planet_radius'] < 1.5)]
-for planet_type, group in filtered_df.groupby('planet_type'):
-    plt.scatter(
-        group['orbital_radius'],
-        group['planet_radius'],
-        color=colors[planet_type],
-        s=sizes[planet_type],
-        label=planet_type,
-        alpha=0.7
-    )
-plt.xticks(fontsize=20)
-plt.yticks(fontsize=20)
-plt.xlabel(r'', fontsize=20)
-plt.ylabel('', fontsize=20)
-plt.title('', fontsize=20)
-plt.xscale('log')
-plt.legend(fontsize=20)
-
-
-# Plot 2: planet radius > 1.5 and planet_radius < 6
-plt.subplot(3, 1, 2)
-filtered_df = df[(df['planet_radius'] > 1.5) & (df['planet_radius'] < 6)]
-for planet_type, group in filtered_df.groupby('planet_type'):
-    plt.scatter(
-        group['orbital_radius'],
-        group['planet_radius'],
-        color=colors[planet_type],
-        s=sizes[planet_type],
-        label=planet_type,
-        alpha=0.7
-    )
-plt.xlabel(r'Orbital Radius (AU)', fontsize=20)
-plt.ylabel('Planet Radius (Earth Radii)', fontsize=20)
-plt.title('', fontsize=20)
-plt.xscale('log')
-plt.legend(fontsize=20)
-plt.xticks(fontsize=20)
-plt.yticks(fontsize=20)
-
-
-# Plot 3: orbital radius > 1.5 and planet_radius < 6
-plt.subplot(3,2,6)
-filtered_df = df[(df['orbital_radius'] > 1.5) & (df['planet_radius'] < 6)]
-for planet_type, group in filtered_df.groupby('planet_type'):
-    plt.scatter(
-        group['orbital_radius'],
-        group['planet_radius'],
-        color=colors[planet_type],
-        s=sizes[planet_type],
-        label=planet_type,
-        alpha=0.7
-    )
-plt.xlabel(r'', fontsize=20)
-plt.ylabel('', fontsize=20)
-plt.title('', fontsize=20)
-plt.xscale('log')
-plt.legend(fontsize=20)
-plt.xticks(fontsize=20)
-plt.yticks(fontsize=20)
-
-# Plot 4: planet_radius > 6
-plt.subplot(3, 1, 1)
-filtered_df = df[df['planet_radius'] > 6]
-for planet_type, group in filtered_df.groupby('planet_type'):
-    plt.scatter(
-        group['orbital_radius'],
-        group['planet_radius'],
-        color=colors[planet_type],
-        s=sizes[planet_type],
-        label=planet_type,
-        alpha=0.7
-    )
-plt.xticks(fontsize=20)
-plt.yticks(fontsize=20)
-plt.xlabel(r'', fontsize=20)
-plt.ylabel('', fontsize=20)
-plt.title('Simulated Planet Populations', fontsize=20)
-plt.xscale('log')
-plt.legend(fontsize=20)
-
-
-# Adjust layout
-plt.tight_layout(rect=[0.02, 0., 1, 1])
-
-# Save and show the plot
-plt.savefig(data_utils.get_fig_dir_path()+'simulated_planet_populations.png', dpi=800)
-
-#plt.show()
\ No newline at end of file
+
+def plot_panel(filtered_df, use_density, bins):
+    """
+    Plot the planet radius vs orbital radius of a subset of the catalog on the current axes, with a log x axis.
+    """
+    if use_density:
+        density.draw_density(plt.gca(), filtered_df['orbital_radius'].to_numpy(), filtered_df['planet_radius'].to_numpy(),
+                             filtered_df['planet_type'].to_numpy(), colors, bins=bins, x_log=True,
+                             legend_kwargs={'fontsize': 20, 'loc': 'upper right'})
+        return
+
+    for planet_type, group in filtered_df.groupby('planet_type'):
+        plt.scatter(
+            group['orbital_radius'],
+            group['planet_radius'],
+            color=colors[planet_type],
+            s=sizes[planet_type],
+            label=planet_type,
+            alpha=0.7
+        )
+    plt.xscale('log')
+    plt.legend(fontsize=20)
+
+
+def plot_planet_radius_vs_orbital_radius(df=None, mode='auto', bins=(600, 300), save=True, dpi=None):
+    """
+    Plot the planet radius vs orbital radius of the planet catalog, in four panels of planet size.
+
+    :param df: Planet catalog DataFrame, defaults to the package planet catalog.
+    :param mode: 'scatter' for one marker per planet, 'density' for 2D histogram images with one
+        color per planet type, 'auto' for density above density.MAX_SCATTER_POINTS planets.
+    :param bins: Number of (orbital radius, planet radius) bins of each density image.
+    :param save: Save the figure to the figures directory.
+    :param dpi: Resolution of the saved figure, defaults to density.DENSITY_DPI in density mode and
+        density.SCATTER_DPI in scatter mode.
+    """
+    # Load the updated planets data
+    if df is None:
+        df = data_utils.load_data('planet_catalog')
+
+    use_density = density.use_density(len(df), mode)
+
+    # Create a figure with three rows and two columns
+    plt.figure(figsize=(25, 15))
+
+    # Plot 1: orbital radius < 1.5 and planet_radius < 1.5
+    plt.subplot(3, 2, 5)
+    plot_panel(df[(df['orbital_radius'] < 1.5) & (df['planet_radius'] < 1.5)], use_density, bins)
+    plt.xticks(fontsize=20)
+    plt.yticks(fontsize=20)
+    plt.xlabel(r'', fontsize=20)
+    plt.ylabel('', fontsize=20)
+    plt.title('', fontsize=20)
+
+    # Plot 2: planet radius > 1.5 and planet_radius < 6
+    plt.subplot(3, 1, 2)
+    plot_panel(df[(df['planet_radius'] > 1.5) & (df['planet_radius'] < 6)], use_density, bins)
+    plt.xlabel(r'Orbital Radius (AU)', fontsize=20)
+    plt.ylabel('Planet Radius (Earth Radii)', fontsize=20)
+    plt.title('', fontsize=20)
+    plt.xticks(fontsize=20)
+    plt.yticks(fontsize=20)
+
+    # Plot 3: orbital radius > 1.5 and planet_radius < 6
+    plt.subplot(3,2,6)
+    plot_panel(df[(df['orbital_radius'] > 1.5) & (df['planet_radius'] < 6)], use_density, bins)
+    plt.xlabel(r'', fontsize=20)
+    plt.ylabel('', fontsize=20)
+    plt.title('', fontsize=20)
+    plt.xticks(fontsize=20)
+    plt.yticks(fontsize=20)
+
+    # Plot 4: planet_radius > 6
+    plt.subplot(3, 1, 1)
+    plot_panel(df[df['planet_radius'] > 6], use_density, bins)
+    plt.xticks(fontsize=20)
+    plt.yticks(fontsize=20)
+    plt.xlabel(r'', fontsize=20)
+    plt.ylabel('', fontsize=20)
+    plt.title('Simulated Planet Populations', fontsize=20)
+
+    # Adjust layout
+    plt.tight_layout(rect=[0.02, 0., 1, 1])
+
+    # Save and show the plot
+    if save:
+        plt.savefig(data_utils.get_fig_dir_path()+'simulated_planet_populations.png', dpi=density.get_plot_dpi(df, mode, dpi))
+
+    #plt.show()
+
+
+if __name__ == '__main__':
+    plot_planet_radius_vs_orbital_radius()
@@ -0,0 +1,102 @@
+# Seeding of the catalog pipeline, every stage and every chunk draws from its own child stream of one SeedSequence
+
+import numpy as np
+
+# Spawn key of the stream of every stage. Keys are never reused, so adding a stage leaves the other streams unchanged
+STAGE_KEYS = {
+    'inclinations': 0,
+    'random_planets': 1,
+    'planets_per_star': 2,
+    'assign_planets': 3,
+    'albedos': 4,
+    'catalog_chunks': 5,
+}
+
+# Generator of the per-item draws made without a Generator, created once per process
+_default_rng = None
+
+
+def get_seed_seq(seed=None):
+    """
+    Get the root SeedSequence of a run.
+
+    :param seed: Integer seed, SeedSequence, or None for fresh entropy.
+    """
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    return np.random.SeedSequence(seed)
+
+
+def child_seed_seq(seed_seq, key):
+    """
+    Get a child of a SeedSequence by its key.
+
+    Unlike SeedSequence.spawn, the child only depends on the parent and the key, not
+    on how many children were spawned before, so every chunk or stage can build its
+    own stream in any order, in any thread or process.
+
+    :param seed_seq: Parent SeedSequence.
+    :param key: Non-negative integer key of the child.
+    """
+    return np.random.SeedSequence(seed_seq.entropy, spawn_key=seed_seq.spawn_key + (key,),
+                                  pool_size=seed_seq.pool_size)
+
+
+def stage_seed_seq(seed, stage):
+    """
+    Get the SeedSequence of a pipeline stage.
+
+    The stream of a stage only depends on the run seed, so a stage gives the same
+    draws whether the pipeline runs in memory or stage by stage from the command line.
+
+    :param seed: Integer seed, SeedSequence, or None for fresh entropy.
+    :param stage: Name of the stage, one of STAGE_KEYS.
+    """
+    return child_seed_seq(get_seed_seq(seed), STAGE_KEYS[stage])
+
+
+def get_rng(seed=None, stage=None):
+    """
+    Get the random number generator to draw from.
+
+    A Generator (or legacy RandomState) is used as is, so callers can thread their
+    own stream. Anything else seeds a new Generator, from the stream of the stage if given.
+
+    :param seed: Generator, integer seed, SeedSequence, or None for fresh entropy.
+    :param stage: Name of the stage, one of STAGE_KEYS.
+    :return: Generator.
+    """
+    if isinstance(seed, (np.random.Generator, np.random.RandomState)) or seed is np.random:
+        return seed
+    if stage is not None:
+        return np.random.default_rng(stage_seed_seq(seed, stage))
+    return np.random.default_rng(seed)
+
+
+def get_item_rng(rng=None):
+    """
+    Get the Generator of a draw made for one item, e.g. the albedo of one planet.
+
+    Seeds are per population, not per item: seeding every item with the same seed
+    would give every item the same draw. Resolve the Generator of the population
+    once with get_rng(seed, stage) and pass it to every item.
+
+    :param rng: Generator, or None for a Generator shared by the whole process.
+    :return: Generator.
+    """
+    global _default_rng
+    if rng is None:
+        if _default_rng is None:
+            _default_rng = np.random.default_rng()
+        return _default_rng
+    if isinstance(rng, (np.random.Generator, np.random.RandomState)) or rng is np.random:
+        return rng
+    raise TypeError(f"Per-item draws take a Generator, not {type(rng).__name__}. "
+                    f"Seed the population once with get_rng(seed, stage) and pass the Generator.")
+
+
+def chunk_rng(seed_seq, index):
+    """
+    Get the Generator of one chunk of a stage, see child_seed_seq.
+    """
+    return np.random.default_rng(child_seed_seq(seed_seq, index))
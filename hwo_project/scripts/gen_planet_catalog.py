@@ -1,6 +1,13 @@
 import argparse
+import os
 
-from hwo_project.planet_simulations import gen_planets, dist_planets_to_stars, make_planet_catalog
+from hwo_project import instrumentation, random_streams
+from hwo_project.data import data_utils, stage_cache
+from hwo_project.planet_simulations import gen_planets, gen_inclinations, dist_planets_to_stars, make_planet_catalog
+
+
+# Stages of generate_planet_catalog, recorded by the instrumentation as 'stage.<name>'
+PIPELINE_STAGES = ['extract_stars', 'random_planets', 'assign_planets', 'planet_catalog', 'stream_catalog']
 
 
 def parser():
@@ -9,36 +16,180 @@ def parser():
     parser.add_argument('--seed', type=int, default=None, help='Seed for random number generation.')
     parser.add_argument('--show_contrast_plot', action='store_true', help='Show the plot of the contrast vs angular separation.')
     parser.add_argument('--dist_cutoff', type=float, default=None, help='Distance cutoff for stars.')
+    parser.add_argument('--data_format', type=str, default='csv', choices=['csv', 'columns', 'npz'], help='Storage format of the intermediate tables.')
+    parser.add_argument('--chunk_size', type=int, default=None, help='Generate the catalog in streaming mode with this many planets per chunk.')
+    parser.add_argument('--num_workers', type=int, default=1, help='With --chunk_size, number of worker processes evaluating the chunks, the catalog does not depend on it.')
+    parser.add_argument('--force', action='store_true', help='Rerun every stage, even those whose inputs are unchanged.')
+    parser.add_argument('--output_dir', type=str, default=None, help='Run all stages in memory and save the catalog to this directory instead of the package data.')
+    parser.add_argument('--save_intermediates', action='store_true', help='With --output_dir, also save the intermediate tables.')
+    parser.add_argument('--report', type=str, default=None, help='Record per-stage timing and memory and save the run report to this JSON file.')
+    parser.add_argument('--profile_stage', type=str, default=None, choices=PIPELINE_STAGES, help='With --report, capture only this pipeline stage with cProfile and tracemalloc, the other stages are only timed. Memory in the report is process RSS.')
     return parser
 
 
-def generate_planet_catalog(num_planets,dist_cutoff,seed):
-    # Extract the star data
+def generate_planet_catalog(num_planets,dist_cutoff,seed,fmt='csv',chunk_size=None,force=False,num_workers=1):
+    """
+    Run the catalog pipeline, skipping the stages whose inputs, parameters and code are unchanged.
+
+    Stages that draw random numbers are only reused when a seed is given. Every stage
+    draws from its own stream of the seed, see random_streams, so the number of
+    workers of the streaming mode is not a parameter of the catalog.
+
+    :return: Dictionary of stage name to True if the stage was recomputed, False if it was reused.
+    """
     from hwo_project.star_data_extraction import star_data_extract
+
+    cache = stage_cache.StageCache(data_utils.get_manifest_dir())
+    path = lambda filename: data_utils.load_data(filename, get_path=True, fmt=fmt)
+    seeded = seed is not None
+    recomputed = {}
+
+    # Extract the star data
     print('Extracting star data...')
-    star_data_extract.extract_star_data(dist_cutoff=dist_cutoff)
+    recomputed['extract_stars'] = cache.run_stage(
+        'extract_stars',
+        lambda: star_data_extract.extract_star_data(dist_cutoff=dist_cutoff, fmt=fmt, seed=seed),
+        inputs=[data_utils.load_data('raw_stars', get_path=True)],
+        outputs=[path('star_catalog')],
+        params={'dist_cutoff': dist_cutoff, 'seed': seed, 'fmt': fmt},
+        code=[star_data_extract.extract_star_data, gen_inclinations.generate_mock_i, random_streams.get_rng],
+        cacheable=seeded, force=force)
+
+    if chunk_size is not None:
+        # Generate, distribute and evaluate the planets chunk by chunk
+        from hwo_project.planet_simulations import stream_catalog
+        print('Streaming planet catalog...')
+
+        def stream():
+            if num_workers <= 1:
+                return stream_catalog.run_streaming_catalog(num_planets, chunk_size=chunk_size, seed=seed, fmt=fmt,
+                                                            verbose=True)
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                return stream_catalog.run_streaming_catalog(num_planets, chunk_size=chunk_size, seed=seed, fmt=fmt,
+                                                            verbose=True, executor=executor,
+                                                            max_pending=2 * num_workers)
+
+        recomputed['stream_catalog'] = cache.run_stage(
+            'stream_catalog',
+            stream,
+            inputs=[path('star_catalog'), data_utils.load_data('pdf_grid', get_path=True),
+                    data_utils.load_data('planet_properties', get_path=True)],
+            outputs=[path('planet_catalog')],
+            params={'num_planets': num_planets, 'chunk_size': chunk_size, 'seed': seed, 'fmt': fmt},
+            code=[stream_catalog.run_streaming_catalog, stream_catalog.make_catalog_chunk,
+                  make_planet_catalog.compute_planet_columns, random_streams.get_rng],
+            cacheable=seeded, force=force)
+        return recomputed
+
     # Generate the planet catalog
     print('Generating planet catalog...')
-    gen_planets.gen_random_planets(num_planets, seed)
+    recomputed['random_planets'] = cache.run_stage(
+        'random_planets',
+        lambda: gen_planets.gen_random_planets(num_planets, show_plots=False, seed=seed, fmt=fmt),
+        inputs=[data_utils.load_data('pdf_grid', get_path=True)],
+        outputs=[path('random_planets')],
+        params={'num_planets': num_planets, 'seed': seed, 'fmt': fmt},
+        code=[gen_planets.gen_random_planets, random_streams.get_rng],
+        cacheable=seeded, force=force)
+
     # Distribute the planets to stars
     print('Distributing planets to stars...')
-    dist_planets_to_stars.run_dist_planets_to_stars(seed=seed)
+    recomputed['assign_planets'] = cache.run_stage(
+        'assign_planets',
+        lambda: dist_planets_to_stars.run_dist_planets_to_stars(seed=seed, fmt=fmt),
+        inputs=[path('star_catalog'), path('random_planets')],
+        outputs=[path('assigned_planets')],
+        params={'seed': seed, 'fmt': fmt},
+        code=[dist_planets_to_stars.run_dist_planets_to_stars, random_streams.get_rng],
+        cacheable=seeded, force=force)
+
     # Make the planet catalog
     print('Creating planet catalog...')
-    make_planet_catalog.run_create_planet_catalog()
+    recomputed['planet_catalog'] = cache.run_stage(
+        'planet_catalog',
+        lambda: make_planet_catalog.run_create_planet_catalog(fmt=fmt, seed=seed),
+        inputs=[path('star_catalog'), path('assigned_planets'), data_utils.load_data('planet_properties', get_path=True)],
+        outputs=[path('planet_catalog')],
+        params={'seed': seed, 'fmt': fmt},
+        code=[make_planet_catalog.run_create_planet_catalog, make_planet_catalog.compute_planet_columns,
+              random_streams.get_rng],
+        cacheable=seeded, force=force)
+
+    return recomputed
+
+
+def print_stage_report(recomputed):
+    print('Stage summary:')
+    for stage, was_recomputed in recomputed.items():
+        print(f"  {stage:<16} {'recomputed' if was_recomputed else 'cached'}")
 
 
 def main():
     # Parse the command line arguments
-    args = parser().parse_args()
+    arg_parser = parser()
+    args = arg_parser.parse_args()
+    check_args(arg_parser, args)
+
+    if args.report is not None:
+        profile_stage = None if args.profile_stage is None else f'stage.{args.profile_stage}'
+        instrumentation.enable(profile_stage=profile_stage, profile_dir=os.path.dirname(os.path.abspath(args.report)))
+
+    try:
+        run(args)
+    finally:
+        if args.report is not None:
+            instrumentation.write_report(args.report)
+
+
+def check_args(arg_parser, args):
+    """
+    Reject the options that have no effect with the other options given.
+    """
+    if args.output_dir is not None:
+        # The in-memory pipeline neither streams nor caches its stages
+        ignored = [option for option, given in [('--chunk_size', args.chunk_size is not None),
+                                                ('--num_workers', args.num_workers != 1),
+                                                ('--force', args.force),
+                                                ('--profile_stage', args.profile_stage is not None)] if given]
+        if ignored:
+            arg_parser.error(f"{', '.join(ignored)} cannot be used with --output_dir.")
+    elif args.save_intermediates:
+        arg_parser.error('--save_intermediates requires --output_dir.')
+    if args.num_workers != 1 and args.chunk_size is None:
+        arg_parser.error('--num_workers requires --chunk_size.')
+    if args.profile_stage is not None and args.report is None:
+        arg_parser.error('--profile_stage requires --report.')
+
+
+def run(args):
+    if args.output_dir is not None:
+        # Run the pipeline in memory, only the outputs are written
+        from hwo_project.planet_simulations import pipeline
+        tables = pipeline.run_pipeline(args.num_planets, seed=args.seed, dist_cutoff=args.dist_cutoff,
+                                       output_dir=args.output_dir, save_intermediates=args.save_intermediates,
+                                       fmt=args.data_format, verbose=True)
+        if args.show_contrast_plot:
+            show_contrast_plot(tables['planet_catalog'])
+        return
 
     # Generate the planet catalog
-    generate_planet_catalog(args.num_planets,args.dist_cutoff, args.seed)
+    recomputed = generate_planet_catalog(args.num_planets,args.dist_cutoff, args.seed, fmt=args.data_format,
+                                         chunk_size=args.chunk_size, force=args.force,
+                                         num_workers=args.num_workers)
+    print_stage_report(recomputed)
 
     # Show the contrast vs angular separation plot
     if args.show_contrast_plot:
-        from hwo_project.plotting import plot_contrast_vs_angular_separation
-        plot_contrast_vs_angular_separation.plot_contrast_vs_angular_separation()
+        show_contrast_plot(data_utils.load_data('planet_catalog', fmt=args.data_format))
+
+
+def show_contrast_plot(catalog_df):
+    """
+    Plot the contrast vs angular separation of the catalog produced by the run.
+    """
+    from hwo_project.plotting import plot_contrast_vs_angular_separation
+    plot_contrast_vs_angular_separation.plot_contrast_vs_angular_separation(catalog_df)
 
 if __name__ == "__main__":
     main()
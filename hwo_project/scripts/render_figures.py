@@ -0,0 +1,26 @@
+import argparse
+
+
+def parser():
+    from hwo_project.plotting import figure_batch
+
+    parser = argparse.ArgumentParser(description='Render the project figures headless, redrawing only those whose inputs changed.')
+    parser.add_argument('--figures', type=str, nargs='+', default=None, choices=list(figure_batch.FIGURES), help='Figures to render, defaults to all.')
+    parser.add_argument('--data_format', type=str, default='csv', choices=['csv', 'columns', 'npz'], help='Storage format of the input tables.')
+    parser.add_argument('--fig_dir', type=str, default=None, help='Directory to save the figures to, defaults to the package figures directory.')
+    parser.add_argument('--dpi', type=int, default=None, help='Resolution of every figure, defaults to the resolution registered for each figure.')
+    parser.add_argument('--num_workers', type=int, default=None, help='Number of worker processes, defaults to the number of cores.')
+    parser.add_argument('--force', action='store_true', help='Render every figure, even those whose inputs are unchanged.')
+    return parser
+
+
+def main():
+    from hwo_project.plotting import figure_batch
+
+    args = parser().parse_args()
+    figure_batch.render_figures(args.figures, fmt=args.data_format, fig_dir=args.fig_dir, dpi=args.dpi,
+                                num_workers=args.num_workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+import argparse
+
+from hwo_project.planet_simulations import realizations
+
+
+def parser():
+    parser = argparse.ArgumentParser(description='Run Monte Carlo realizations of the planet catalog and summarize the yields.')
+    parser.add_argument('--num_realizations', type=int, default=100, help='Number of catalog realizations.')
+    parser.add_argument('--num_planets', type=int, default=30000, help='Number of planets to generate in each realization.')
+    parser.add_argument('--seed', type=int, default=None, help='Master seed for random number generation.')
+    parser.add_argument('--num_workers', type=int, default=None, help='Number of worker processes, defaults to the number of cores.')
+    parser.add_argument('--out_file', type=str, default=None, help='CSV file to save the per-realization yields to.')
+    return parser
+
+
+def main():
+    # Parse the command line arguments
+    args = parser().parse_args()
+
+    # Run the realizations
+    yields_df = realizations.run_realizations(args.num_realizations, num_planets=args.num_planets,
+                                              seed=args.seed, num_workers=args.num_workers)
+
+    if args.out_file is not None:
+        yields_df.to_csv(args.out_file)
+
+    print(realizations.summarize_yields(yields_df).to_string())
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,175 @@
 # Script to extract data from HPIC catalog
 
+import os
+import json
+import shutil
+import hashlib
+
+import numpy as np
 import pandas as pd
 
 from hwo_project.planet_simulations import gen_inclinations
-from hwo_project.data import data_utils
+from hwo_project import instrumentation, random_streams
+from hwo_project.data import data_utils, stage_cache
+
+# Columns of the HPIC catalog used for the star catalog, with their types
+RAW_STAR_DTYPES = {
+    'ra': np.float64,
+    'dec': np.float64,
+    'tic_id': np.float64,
+    'sy_dist': np.float64,
+    'sy_disterr': np.float64,
+    'st_lum': np.float64,
+    'st_mass': np.float64,
+}
 
-from IPython import embed
 # Load catalog
 
-def extract_star_data(dist_cutoff=None,sep='|',verbose=False):
-    df = data_utils.load_data('raw_stars',sep=sep)
+def extract_star_data(dist_cutoff=None,sep='|',verbose=False,fmt='csv',seed=None):
+    df = read_raw_stars(sep=sep)
 
-    # Extract relevant columns
-    my_columns = ['ra','dec','tic_id','sy_dist','sy_disterr','st_lum','st_mass']
+    final_df = clean_star_data(df, dist_cutoff=dist_cutoff, verbose=verbose, seed=seed)
 
-    # Convert 'tic_id' to string and remove trailing '.0'
-    df['tic_id'] = 'S'+df['tic_id'].astype(str).str.replace(r'\.0$', '', regex=True)
-    df = df[my_columns]
+    # Save the star table
+    data_utils.save_data(final_df, 'star_catalog', fmt=fmt)
+
+@instrumentation.instrument(items=len)
+def read_raw_stars(path=None, sep='|', cache=True):
+    """
+    Read the columns of the raw HPIC table needed for the star catalog.
+
+    Only the RAW_STAR_DTYPES columns are parsed, with explicit types. The result is
+    cached as a binary table keyed by the source path, the SHA-256 of the source
+    file, the column types and the separator, so reading an unchanged file again
+    only loads the cached columns. Writing a new cached table removes the older
+    tables of the same source, and those of sources that no longer exist.
+
+    :param path: Path of the raw HPIC table, defaults to the package raw star file.
+    :param sep: Column separator of the raw table.
+    :param cache: Use and fill the binary cache.
+    :return: DataFrame with the RAW_STAR_DTYPES columns.
+    """
+    if path is None:
+        path = data_utils.load_data('raw_stars', get_path=True)
+
+    if not cache:
+        return _parse_raw_stars(path, sep)
+
+    cache_dir = data_utils.get_ingest_cache_dir()
+    key = f'{_source_id(path)}_{_source_hash(path, cache_dir)}_{_schema_hash(sep)}'
+    cached = os.path.join(cache_dir, f'raw_stars_{key}.columns')
+    if os.path.exists(cached):
+        return data_utils.read_table(cached, mmap_mode=None)
+
+    df = _parse_raw_stars(path, sep)
+
+    # Write next to the final path and rename, so a cached table is always complete
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp = os.path.join(cache_dir, f'.tmp_{os.getpid()}_{os.path.basename(cached)}')
+    data_utils.write_table(df, tmp)
+    try:
+        os.replace(tmp, cached)
+    except OSError:
+        # Written by another process in the meantime
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    _remove_old_caches(cache_dir, path, cached)
+    return df
+
+def _parse_raw_stars(path, sep):
+    return pd.read_csv(path, sep=sep, usecols=list(RAW_STAR_DTYPES), dtype=RAW_STAR_DTYPES)[list(RAW_STAR_DTYPES)]
+
+def _schema_hash(sep):
+    """
+    Get a short hash of RAW_STAR_DTYPES and the separator, so changing the parsed columns, their types or
+    the separator invalidates the cache.
+    """
+    schema = json.dumps([[[column, np.dtype(dtype).str] for column, dtype in RAW_STAR_DTYPES.items()], sep])
+    return hashlib.sha256(schema.encode()).hexdigest()[:16]
+
+def _source_id(path):
+    """
+    Get a short hash of the absolute path of a source file, the prefix of its cached tables.
+    """
+    return hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+
+def _read_sources(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'sources.json'), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _source_hash(path, cache_dir):
+    """
+    Get the SHA-256 of the source file, reusing the recorded hash while its mtime and size are unchanged.
+
+    Recording a new hash also drops the entries of sources that no longer exist.
+    """
+    index = _read_sources(cache_dir)
+
+    signature = stage_cache.path_signature(path)
+    entry = index.get(os.path.abspath(path))
+    if entry is not None and entry['signature'] == signature:
+        return entry['sha256']
+
+    digest = stage_cache.hash_path(path)
+    index = {source: entry for source, entry in index.items() if os.path.exists(source)}
+    index[os.path.abspath(path)] = {'signature': signature, 'sha256': digest}
+    os.makedirs(cache_dir, exist_ok=True)
+
+    # Write next to the index and rename, so a concurrent reader never sees a partial index
+    tmp = os.path.join(cache_dir, f'.tmp_{os.getpid()}_sources.json')
+    with open(tmp, 'w') as f:
+        json.dump(index, f, indent=4)
+    os.replace(tmp, os.path.join(cache_dir, 'sources.json'))
+    return digest
+
+def _remove_old_caches(cache_dir, path, keep):
+    """
+    Remove the cached tables of a source other than keep, and the tables of sources no longer in sources.json.
+    """
+    source_id = _source_id(path)
+    source_ids = {_source_id(source) for source in _read_sources(cache_dir)}
+    for name in os.listdir(cache_dir):
+        if not (name.startswith('raw_stars_') and name.endswith('.columns')):
+            continue
+        table_source_id = name[len('raw_stars_'):].split('_')[0]
+        if (table_source_id == source_id and os.path.join(cache_dir, name) != keep) or table_source_id not in source_ids:
+            try:
+                data_utils.remove_table(os.path.join(cache_dir, name))
+            except OSError:
+                # Removed by another process in the meantime
+                pass
+
+def format_tic_ids(tic_id):
+    """
+    Turn the TIC IDs of the raw HPIC table into the 'S<number>' IDs of the star catalog.
+
+    :param tic_id: Series of numeric TIC IDs, or of their text.
+    :return: Array of IDs, NaN where the TIC ID is missing.
+    """
+    if tic_id.dtype.kind in 'iuf':
+        values = tic_id.to_numpy(dtype=float)
+        known = ~np.isnan(values)
+        formatted = np.full(len(values), np.nan, dtype=object)
+        formatted[known] = ('S' + pd.Series(values[known].astype(np.int64)).astype(str)).to_numpy(dtype=object)
+        return formatted
+
+    return ('S' + tic_id.astype(str).str.replace(r'\.0$', '', regex=True)).to_numpy(dtype=object)
+
+@instrumentation.instrument(items=len)
+def clean_star_data(df, dist_cutoff=None, verbose=False, seed=None):
+    """
+    Turn the raw HPIC table into the star catalog, without any file I/O.
+
+    :param df: DataFrame with the raw HPIC data.
+    :param dist_cutoff: Maximum distance of the stars (in parsecs), None for no cut.
+    :param seed: Run seed, SeedSequence or Generator for the inclinations.
+    :return: DataFrame with the star catalog.
+    """
+    # Only the relevant columns are used, select them before any copy
+    df = df[list(RAW_STAR_DTYPES)]
 
     # Filter out rows with missing values
     mod_df = df.dropna()
@@ -24,21 +177,22 @@ def extract_star_data(dist_cutoff=None,sep='|',verbose=False):
     if verbose:
         print(f'Dropped {df.shape[0] - mod_df.shape[0]} rows with missing values.')
 
-    # Finally, Add a column for the inclination of the star orbits with the generated mock data
-
-    final_df = mod_df.copy()
-
-    final_df.loc[:,'inclination'] = gen_inclinations.generate_mock_i(final_df.shape[0])
-
+    # Apply the distance cut before any derived columns, so they are only made for the kept stars
     if dist_cutoff is not None:
-        # Filter out stars with distance greater than 30 parsecs
-        final_df = final_df[final_df['sy_dist'] <= dist_cutoff]
+        final_df = mod_df[mod_df['sy_dist'] <= dist_cutoff]
         if verbose:
             print(f'Dropped {mod_df.shape[0] - final_df.shape[0]} stars with distance greater than {dist_cutoff} parsecs.')
+    else:
+        final_df = mod_df
+
+    # Convert 'tic_id' to string and remove trailing '.0'
+    final_df = final_df.assign(tic_id=format_tic_ids(final_df['tic_id']))
+
+    # Finally, Add a column for the inclination of the star orbits with the generated mock data
+    final_df.loc[:,'inclination'] = gen_inclinations.generate_mock_i(final_df.shape[0],
+                                                                     seed=random_streams.get_rng(seed, 'inclinations'))
 
-    # Save to CSV
-    out_path = data_utils.load_data('star_catalog',get_path=True)
-    final_df.to_csv(out_path,index=False)
+    return final_df
 
 if __name__ == '__main__':
     extract_star_data(dist_cutoff=30)
@@ -1,11 +1,24 @@
 # Functions to calculate various metrics for the model
+
+import weakref
+
 import numpy as np
 from astropy import units as u, constants as const
 
+from hwo_project import instrumentation, random_streams
 from hwo_project.models import obj_models
 from hwo_project.data import data_utils
 
+# Unit-free constants for the hot conversions, validated against astropy with use_astropy=True
+# G * M_sun * (1 day)^2 / (4 pi^2) in AU^3, so that a = (KEPLER_CONSTANT * M * P^2)^(1/3)
+KEPLER_CONSTANT = (const.G * const.M_sun * (1 * u.day)**2 / (4 * np.pi**2)).to(u.AU**3).value
+# Earth radius in AU
+EARTH_RADIUS_AU = const.R_earth.to(u.AU).value
+# Arcseconds per radian
+RADIAN_TO_ARCSEC = (1 * u.rad).to(u.arcsec).value
 
+
+@instrumentation.instrument()
 def get_optimal_obs_pos(inclination,alpha=60):
     """
     Get the optimal observation position for a given inclination and phase angle.
@@ -53,6 +66,28 @@ def get_optimal_obs_pos(inclination,alpha=60):
         print("Warning: Inclination is less than 0 degrees.")
         return None
 
+@instrumentation.instrument(items=np.size)
+def get_optimal_obs_pos_array(inclination, alpha=60):
+    """
+    Vectorized version of get_optimal_obs_pos for an array of inclinations.
+
+    Inclinations outside [0, 180] degrees, or where no valid angle exists, give NaN.
+
+    :param inclination: Array of inclinations of the star orbits (in degrees).
+    :param alpha: Phase angle of the planet (in degrees).
+    :return: Array of optimal observation positions (in degrees).
+    """
+    inclination = np.asarray(inclination, dtype=float)
+
+    face_on = ((inclination >= 0) & (inclination <= 30)) | ((inclination > 150) & (inclination <= 180))
+    inclined = (inclination > 30) & (inclination <= 150)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        angle = np.degrees(np.arcsin(np.cos(np.radians(alpha))/np.sin(np.radians(inclination))))
+
+    return np.where(face_on, 90.0, np.where(inclined, angle, np.nan))
+
+@instrumentation.instrument(items=np.size)
 def get_pos_radius(radius, phi,inclination):
     """
     Get the position of a planet with a given radius and phase angle.
@@ -65,6 +100,7 @@ def get_pos_radius(radius, phi,inclination):
     return radius * np.sqrt(1 - np.sin(np.radians(phi))**2 * np.cos(np.radians(inclination))**2)
 
 
+@instrumentation.instrument(items=np.size)
 def calculate_lambertian_phase_function(alpha):
     """
     Calculate the phase function for a given phase angle alpha.
@@ -79,14 +115,23 @@ def calculate_lambertian_phase_function(alpha):
 
     return p_alpha
 
-def convert_period_to_orbital_radius(period, star_mass):
+@instrumentation.instrument(items=np.size)
+def convert_period_to_orbital_radius(period, star_mass, use_astropy=False):
     """
     Convert the period of a planet to its orbital radius around a star.
 
+    Works on scalars and arrays. By default Kepler's third law is evaluated with
+    the precomputed KEPLER_CONSTANT, use_astropy=True runs the unit-aware astropy
+    calculation instead to validate it.
+
     :param period: Orbital period of the planet (in days).
     :param star_mass: Mass of the star (in solar masses).
+    :param use_astropy: Compute the radius with astropy units and constants.
     :return: The orbital radius of the planet (in AU).
     """
+    if not use_astropy:
+        return np.cbrt(KEPLER_CONSTANT * star_mass * np.square(period))
+
     # Convert period to seconds
     period_seconds = (period * u.day.to(u.s))*u.s
     
@@ -98,49 +143,167 @@ def convert_period_to_orbital_radius(period, star_mass):
 
     return (orbital_radius.to(u.AU)).value
 
-def convert_earth_radius_to_aus(earth_radiuses):
+@instrumentation.instrument(items=np.size)
+def convert_earth_radius_to_aus(earth_radiuses, use_astropy=False):
     """
     Convert a radius in Earth radii to AU.
 
     :param earth_radius: Radius in Earth radii.
+    :param use_astropy: Convert with astropy units instead of the precomputed EARTH_RADIUS_AU.
     :return: Radius in AU.
     """
+    if not use_astropy:
+        return earth_radiuses * EARTH_RADIUS_AU
+
     return (earth_radiuses * const.R_earth.to(u.AU)).value
     
 
-def create_star_from_tic_id(tic_id, df):
-    row = df[df['tic_id'] == tic_id]
-    if row.empty:
+# StarIndex of the star DataFrames passed to create_star_from_tic_id, keyed by id and dropped with the DataFrame
+_star_indexes = {}
+
+
+def _get_star_index(df, rebuild=False):
+    """
+    Get the cached StarIndex of a star DataFrame, built on first use or when the length of the DataFrame changed.
+    """
+    key = id(df)
+    entry = _star_indexes.get(key)
+    if not rebuild and entry is not None and entry[0]() is df and len(entry[1].row_codes) == len(df):
+        return entry[1]
+
+    star_index = obj_models.StarIndex(df['tic_id'])
+    _star_indexes[key] = (weakref.ref(df, lambda _: _star_indexes.pop(key, None)), star_index)
+    return star_index
+
+
+def _get_star_row(df, tic_id):
+    """
+    Get the row of a TIC ID with the cached StarIndex of df, rebuilt once if it does not match df.
+    """
+    for rebuild in (False, True):
+        try:
+            row = _get_star_index(df, rebuild).get_row(tic_id)
+        except KeyError:
+            continue
+        if df['tic_id'].iloc[row] == tic_id:
+            return row
+    raise KeyError(tic_id)
+
+
+def create_star_from_tic_id(tic_id, df, star_index=None):
+    """
+    Create a Star object for a TIC ID of a star DataFrame.
+
+    Without star_index, the StarIndex of df is built once and cached for later
+    calls with the same DataFrame. It is rebuilt when a lookup does not match the
+    rows of df, e.g. after the tic_id column was changed in place.
+
+    :param tic_id: TIC ID of the star.
+    :param df: DataFrame containing the star data.
+    :param star_index: StarIndex of df, e.g. obj_models.StarIndex(df['tic_id']), instead of the cached one.
+    :return: Star object, from the last row with the TIC ID.
+    """
+    try:
+        row = _get_star_row(df, tic_id) if star_index is None else star_index.get_row(tic_id)
+    except KeyError:
         raise ValueError(f"TIC ID {tic_id} not found in the DataFrame.")
-    
+    row = df.iloc[row]
+
     star = obj_models.Star(
-        ra=row['ra'].values[0],
-        dec=row['dec'].values[0],
-        distance=row['sy_dist'].values[0],
-        l_star=row['st_lum'].values[0],
+        ra=row['ra'],
+        dec=row['dec'],
+        distance=row['sy_dist'],
         hpic_id=tic_id,
-        mass=row['st_mass'].values[0]
+        mass=row['st_mass'],
+        inclination=row['inclination'],
+        lu_star=row['st_lum']
     )
     return star
 
-def get_exoplanet_type(planet_radius, orbital_radius):
+# Planet classifier and the signature of the planet_properties file it was built from
+_planet_classifier = (None, None)
+
+
+def get_planet_classifier(check=True):
+    """
+    Get the planet classifier built from planet_properties.csv.
+
+    The table is loaded and indexed once and reused until the file changes, the
+    same check the data_utils dataset cache uses. The check costs a stat of the
+    file, so per-planet code skips it and batches check once, see invalidate_planet_classifier.
+
+    :param check: Rebuild the classifier if planet_properties.csv changed since it was built.
+    :return: A PlanetClassifier object.
+    """
+    global _planet_classifier
+    cached_signature, classifier = _planet_classifier
+    if classifier is not None and not check:
+        return classifier
+
+    signature = data_utils.get_data_signature('planet_properties')
+    if classifier is None or cached_signature != signature:
+        classifier = obj_models.PlanetClassifier(data_utils.load_data('planet_properties'))
+        _planet_classifier = (signature, classifier)
+    return classifier
+
+
+def invalidate_planet_classifier():
+    """
+    Drop the cached planet classifier, the next get_planet_classifier call rebuilds it.
+    """
+    global _planet_classifier
+    _planet_classifier = (None, None)
+
+
+@instrumentation.instrument()
+def get_exoplanet_type(planet_radius, orbital_radius, rng=None):
     """
     Get the exoplanet type and albedo for a given planet radius and orbital radius.
 
     :param planet_radius: Radius of the planet (in Earth radii).
     :param orbital_radius: Orbital radius of the planet (in AU).
+    :param rng: Generator for the albedo, shared by all the planets of a population, see random_streams.get_item_rng.
     :return: The exoplanet type and albedo.
     """
+    # Checked once per batch by the callers, see get_planet_classifier
+    classifier = get_planet_classifier(check=False)
+
+    type_idx = classifier.classify(planet_radius, orbital_radius)
+    if type_idx < 0:
+        return None, None
+
+    albedo = random_streams.get_item_rng(rng).uniform(classifier.albedo_lower[type_idx], classifier.albedo_upper[type_idx])
+    return classifier.exoplanet_types[type_idx], albedo
+
+
+@instrumentation.instrument(items=lambda result: np.size(result[0]))
+def get_exoplanet_types(planet_radius, orbital_radius, rng=None):
+    """
+    Vectorized version of get_exoplanet_type for arrays of planets.
+
+    Each planet gets the first matching row of the planet properties table,
+    planets with no match get the type None and a NaN albedo.
+
+    :param planet_radius: Array of planet radii (in Earth radii).
+    :param orbital_radius: Array of orbital radii of the planets (in AU).
+    :param rng: Generator or seed for the albedos, a seed seeds the whole population from its 'albedos' stream.
+    :return: Arrays of exoplanet types and albedos.
+    """
+    return get_planet_classifier()(planet_radius, orbital_radius, rng=rng)
 
-    # Load the CSV file into a DataFrame
-    df = data_utils.load_data('planet_properties')
 
-    for index, row in df.iterrows():
-        if (row['planet_radius_lower'] <= planet_radius <= row['planet_radius_upper'] and
-            row['orbitals_radius_lower'] <= orbital_radius <= row['orbitals_radius_upper']):
-            albedo = np.random.uniform(row['albedo_lower'], row['albedo_upper'])
-            return row['exoplanet_type'], albedo
-    return None, None
+@instrumentation.instrument(items=np.size)
+def get_lambertian_contrast(albedo, planet_radius, orbital_radius, p_alpha=0.6089977810442295):
+    """
+    Calculate the contrast between planets and their stars using the Lambertian phase function.
+
+    :param albedo: Albedo of the planet.
+    :param planet_radius: Radius of the planet (in Earth radii).
+    :param orbital_radius: Orbital radius of the planet (in AU).
+    :param p_alpha: Value of the phase function, defaults to the value at alpha=60 degrees.
+    :return: The planet to star contrast.
+    """
+    return albedo * p_alpha * np.pi * convert_earth_radius_to_aus(planet_radius) ** 2 / orbital_radius ** 2
 
 
 def calculate_iwa(wavelength=700*u.nm, aperture_diameter=8*u.m):
@@ -166,6 +329,18 @@ def calculate_iwa(wavelength=700*u.nm, aperture_diameter=8*u.m):
     return iwa_radians, iwa_arcseconds
 
 
+def calculate_iwa_array(wavelength, aperture_diameter):
+    """
+    Calculate the Inner Working Angle (IWA) of many telescopes without astropy units, see calculate_iwa.
+
+    :param wavelength: Array of wavelengths (in nm).
+    :param aperture_diameter: Array of aperture diameters (in m), broadcast against wavelength.
+    :return: Array of IWAs (in arcseconds).
+    """
+    return 3 * np.asarray(wavelength, dtype=float) * 1e-9 / np.asarray(aperture_diameter, dtype=float) * RADIAN_TO_ARCSEC
+
+
+@instrumentation.instrument(items=np.size)
 def get_eff_orbital_radius(orbital_radius, star_luminosity):
     """
     Calculate the effective orbital radius of the planet.
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project.data import data_utils
+
+
+def chunk(start, stop):
+    return pd.DataFrame({'planet_radius': np.arange(start, stop, dtype=float),
+                         'planet_type': [f'type_{i % 3}' for i in range(start, stop)]})
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.columns', '.npz'])
+def test_chunked_table_reads_back_whole(tmp_path, ext):
+    path = str(tmp_path / f'table{ext}')
+    with data_utils.ChunkedTableWriter(path) as writer:
+        for start in range(0, 10, 4):
+            writer.append(chunk(start, min(start + 4, 10)))
+    assert (writer.num_chunks, writer.num_rows) == (3, 10)
+
+    read = data_utils.read_table(path)
+    np.testing.assert_array_equal(read['planet_radius'], np.arange(10.0))
+    assert [len(part) for part in data_utils.iter_table_chunks(path)] == ([10] if ext == '.csv' else [4, 4, 2])
+
+
+@pytest.mark.parametrize('ext', ['.csv', '.columns', '.npz'])
+def test_in_memory_write_replaces_chunked_table(tmp_path, ext):
+    path = str(tmp_path / f'table{ext}')
+    with data_utils.ChunkedTableWriter(path) as writer:
+        writer.append(chunk(0, 10))
+
+    # A later in-memory run writes the same table path
+    data_utils.write_table(chunk(0, 3), path)
+    np.testing.assert_array_equal(data_utils.read_table(path)['planet_radius'], np.arange(3.0))
+
+    # And a later streaming run replaces it again
+    with data_utils.ChunkedTableWriter(path) as writer:
+        writer.append(chunk(0, 5))
+    assert len(data_utils.read_table(path)) == 5
+
+
+def test_rewriting_columns_drops_old_columns(tmp_path):
+    path = str(tmp_path / 'table.columns')
+    data_utils.write_table(chunk(0, 4), path)
+    data_utils.write_table(chunk(0, 4)[['planet_radius']], path)
+    assert sorted(p.name for p in (tmp_path / 'table.columns').iterdir()) == ['col_000.npy', 'meta.json']
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project.data import data_utils
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    data_utils.clear_cache()
+    yield
+    data_utils.clear_cache()
+
+
+def write_stars(data_dir, num_rows, value=1.0):
+    df = pd.DataFrame({'tic_id': [f'S{i}' for i in range(num_rows)], 'st_mass': np.full(num_rows, value)})
+    data_utils.save_data(df, 'star_catalog', data_dir=str(data_dir))
+    return df
+
+
+def test_repeated_loads_share_the_cached_data(tmp_path):
+    write_stars(tmp_path, 5)
+    first = data_utils.load_data('star_catalog', data_dir=str(tmp_path))
+    second = data_utils.load_data('star_catalog', data_dir=str(tmp_path))
+
+    assert data_utils.get_cache_info()[0] == 1
+    pd.testing.assert_frame_equal(first, second)
+    assert np.shares_memory(first['st_mass'].to_numpy(), second['st_mass'].to_numpy())
+
+
+def test_changed_file_is_reloaded(tmp_path):
+    write_stars(tmp_path, 5)
+    assert len(data_utils.load_data('star_catalog', data_dir=str(tmp_path))) == 5
+
+    # Written behind the back of save_data, only the mtime and size tell the cache
+    path = data_utils.load_data('star_catalog', get_path=True, data_dir=str(tmp_path))
+    pd.DataFrame({'tic_id': ['S0'], 'st_mass': [2.0]}).to_csv(path, index=False)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    reloaded = data_utils.load_data('star_catalog', data_dir=str(tmp_path))
+    assert len(reloaded) == 1
+    assert reloaded['st_mass'].iloc[0] == 2.0
+
+
+def test_least_recently_used_dataset_is_evicted(tmp_path, monkeypatch):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    write_stars(tmp_path / 'a', 1000)
+    write_stars(tmp_path / 'b', 1000)
+
+    data_utils.load_data('star_catalog', data_dir=str(tmp_path / 'a'))
+    _, nbytes = data_utils.get_cache_info()
+    monkeypatch.setattr(data_utils, 'CACHE_MAX_BYTES', int(1.5 * nbytes))
+
+    data_utils.load_data('star_catalog', data_dir=str(tmp_path / 'b'))
+    assert data_utils.get_cache_info() == (1, nbytes)
+
+    # Only b is left, loading a again replaces it
+    data_utils.load_data('star_catalog', data_dir=str(tmp_path / 'a'))
+    assert data_utils.get_cache_info()[0] == 1
+
+
+@pytest.mark.parametrize('copy_on_write', [True, False])
+def test_modifying_a_loaded_table_does_not_change_the_cache(tmp_path, monkeypatch, copy_on_write):
+    # Without Copy-on-Write, e.g. pandas 2 by default, the loaded tables are deep copies
+    monkeypatch.setattr(data_utils, '_pandas_copy_on_write', lambda: copy_on_write)
+    expected = write_stars(tmp_path, 5)
+    df = data_utils.load_data('star_catalog', data_dir=str(tmp_path))
+
+    df.loc[0, 'st_mass'] = -1.0
+    df['st_mass'] *= 3
+    df['new_column'] = 1
+    df.drop(index=1, inplace=True)
+
+    pd.testing.assert_frame_equal(data_utils.load_data('star_catalog', data_dir=str(tmp_path)), expected)
+
+
+def test_cached_arrays_are_read_only():
+    grid = data_utils.load_data('pdf_grid')
+    with pytest.raises(ValueError):
+        grid[0, 0] = 1.0
+    assert not data_utils.load_data('pdf_grid').flags.writeable
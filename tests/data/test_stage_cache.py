@@ -0,0 +1,95 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+from hwo_project.data import stage_cache
+from hwo_project.planet_simulations import make_planet_catalog, stream_catalog
+
+
+@pytest.fixture
+def stage_module(tmp_path, monkeypatch):
+    """
+    A module outside the package whose source can be edited, with a function running the stage.
+    """
+    source = tmp_path / 'stage_code.py'
+    source.write_text('def run():\n    return 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    module = importlib.import_module('stage_code')
+    yield source, module
+    sys.modules.pop('stage_code', None)
+
+
+@pytest.fixture
+def stage(tmp_path, stage_module):
+    source, module = stage_module
+    inputs = [str(tmp_path / 'input.txt')]
+    outputs = [str(tmp_path / 'output.txt')]
+    with open(inputs[0], 'w') as f:
+        f.write('input')
+
+    def run():
+        with open(outputs[0], 'w') as f:
+            f.write('output')
+
+    cache = stage_cache.StageCache(str(tmp_path / 'manifests'))
+    return cache, run, inputs, outputs, [module.run], source
+
+
+def run_stage(cache, run, inputs, outputs, code, params=None):
+    return cache.run_stage('stage', run, inputs, outputs, params or {'seed': 1}, code=code)
+
+
+def test_unchanged_stage_is_reused(stage):
+    cache, run, inputs, outputs, code, _ = stage
+    assert run_stage(cache, run, inputs, outputs, code)
+    assert not run_stage(cache, run, inputs, outputs, code)
+
+
+def test_input_change_invalidates(stage):
+    cache, run, inputs, outputs, code, _ = stage
+    run_stage(cache, run, inputs, outputs, code)
+
+    with open(inputs[0], 'w') as f:
+        f.write('changed input')
+    assert run_stage(cache, run, inputs, outputs, code)
+
+
+def test_params_change_invalidates(stage):
+    cache, run, inputs, outputs, code, _ = stage
+    run_stage(cache, run, inputs, outputs, code)
+    assert run_stage(cache, run, inputs, outputs, code, params={'seed': 2})
+
+
+def test_code_change_invalidates(stage):
+    cache, run, inputs, outputs, code, source = stage
+    run_stage(cache, run, inputs, outputs, code)
+
+    source.write_text('def run():\n    return 2 * 10\n')
+    assert run_stage(cache, run, inputs, outputs, code)
+
+
+def test_missing_output_invalidates(stage):
+    cache, run, inputs, outputs, code, _ = stage
+    run_stage(cache, run, inputs, outputs, code)
+
+    os.remove(outputs[0])
+    assert run_stage(cache, run, inputs, outputs, code)
+
+
+def test_catalog_stages_hash_their_helper_modules():
+    for func in (make_planet_catalog.run_create_planet_catalog, stream_catalog.run_streaming_catalog):
+        paths = [os.path.relpath(path, os.path.dirname(stage_cache.__file__) + '/..')
+                 for path in stage_cache._code_paths([func])]
+        assert 'utils.py' in paths
+        assert os.path.join('models', 'obj_models.py') in paths
+
+
+def test_forced_and_uncacheable_stages_always_run(stage):
+    cache, run, inputs, outputs, code, _ = stage
+    run_stage(cache, run, inputs, outputs, code)
+
+    assert cache.run_stage('stage', run, inputs, outputs, {'seed': 1}, code=code, force=True)
+    assert cache.run_stage('stage', run, inputs, outputs, {'seed': 1}, code=code, cacheable=False)
+    assert not run_stage(cache, run, inputs, outputs, code)
@@ -0,0 +1,73 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project.data import data_utils
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'planet_radius': rng.uniform(0.5, 17, 50),
+        'Period(Days)': rng.integers(10, 640, 50),
+        'host_star_id': [f'S{i % 7}' for i in range(50)],
+        'planet_type': ['earths', None, 'neptunes', 'venuses', 'earths'] * 10,
+    })
+
+
+def assert_same_table(read, table):
+    assert list(read.columns) == list(table.columns)
+    for column in table.columns:
+        if table[column].dtype.kind in 'biufc':
+            np.testing.assert_array_equal(read[column].to_numpy(), table[column].to_numpy())
+        else:
+            # Text columns come back as categoricals, missing values as NaN
+            expected = table[column].to_numpy(dtype=object)
+            values = np.asarray(read[column].astype(object))
+            missing = pd.isna(expected)
+            assert np.array_equal(pd.isna(values), missing)
+            assert np.array_equal(values[~missing], expected[~missing])
+
+
+@pytest.mark.parametrize('ext', ['.columns', '.npz'])
+def test_binary_round_trip(tmp_path, table, ext):
+    path = str(tmp_path / f'table{ext}')
+    data_utils.write_table(table, path)
+    assert_same_table(data_utils.read_table(path), table)
+
+
+@pytest.mark.parametrize('ext', ['.columns', '.npz'])
+def test_column_projection(tmp_path, table, ext):
+    path = str(tmp_path / f'table{ext}')
+    data_utils.write_table(table, path)
+
+    read = data_utils.read_table(path, columns=['planet_type', 'planet_radius'])
+    assert_same_table(read, table[['planet_type', 'planet_radius']])
+
+
+def test_columns_are_memory_mapped(tmp_path, table):
+    path = str(tmp_path / 'table.columns')
+    data_utils.write_table(table, path)
+
+    base = data_utils.read_table(path, columns=['planet_radius'])['planet_radius'].to_numpy()
+    while base is not None and not isinstance(base, np.memmap):
+        base = base.base
+    assert isinstance(base, np.memmap)
+
+    loaded = data_utils.read_table(path, columns=['planet_radius'], mmap_mode=None)
+    np.testing.assert_array_equal(loaded['planet_radius'], table['planet_radius'])
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self/fd'), reason='Needs /proc to count open files')
+def test_npz_read_closes_the_archive(tmp_path, table):
+    path = str(tmp_path / 'table.npz')
+    data_utils.write_table(table, path)
+
+    data_utils.read_table(path)
+    num_open = len(os.listdir('/proc/self/fd'))
+    for _ in range(20):
+        data_utils.read_table(path)
+    assert len(os.listdir('/proc/self/fd')) == num_open
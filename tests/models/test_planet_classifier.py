@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from hwo_project import utils
+from hwo_project.data import data_utils
+from hwo_project.models import obj_models
+
+
+def first_match(properties_df, planet_radius, orbital_radius):
+    """
+    Reference classification, the first row of the table whose closed box contains the planet.
+    """
+    for index, row in enumerate(properties_df.itertuples()):
+        if (row.planet_radius_lower <= planet_radius <= row.planet_radius_upper and
+                row.orbitals_radius_lower <= orbital_radius <= row.orbitals_radius_upper):
+            return index
+    return -1
+
+
+@pytest.fixture(scope='module')
+def properties_df():
+    return data_utils.load_data('planet_properties')
+
+
+def test_classifier_matches_first_match_rule(properties_df):
+    classifier = obj_models.PlanetClassifier(properties_df)
+
+    # Random planets, plus every combination of box edges where the closed intervals overlap
+    rng = np.random.default_rng(0)
+    radius_edges = np.unique(properties_df[['planet_radius_lower', 'planet_radius_upper']].to_numpy())
+    orbit_edges = np.unique(properties_df[['orbitals_radius_lower', 'orbitals_radius_upper']].to_numpy())
+    edge_radius, edge_orbit = np.meshgrid(np.concatenate([radius_edges, radius_edges + 1e-9, [0, 1e3]]),
+                                          np.concatenate([orbit_edges, orbit_edges - 1e-9, [-1, 1e3]]))
+    planet_radius = np.concatenate([rng.uniform(0, 25, 5000), edge_radius.ravel()])
+    orbital_radius = np.concatenate([rng.uniform(0, 30, 5000), edge_orbit.ravel()])
+
+    expected = [first_match(properties_df, r, a) for r, a in zip(planet_radius, orbital_radius)]
+    np.testing.assert_array_equal(classifier.classify(planet_radius, orbital_radius), expected)
+
+
+def test_scalar_and_vectorized_types_agree(properties_df):
+    rng = np.random.default_rng(1)
+    planet_radius = rng.uniform(0, 25, 200)
+    orbital_radius = rng.uniform(0, 30, 200)
+
+    types, albedos = utils.get_exoplanet_types(planet_radius, orbital_radius, rng=2)
+    item_rng = np.random.default_rng(3)
+    for i in range(len(planet_radius)):
+        planet_type, albedo = utils.get_exoplanet_type(planet_radius[i], orbital_radius[i], rng=item_rng)
+        assert planet_type == types[i]
+        assert (albedo is None) == np.isnan(albedos[i])
+
+
+def test_classifier_is_rebuilt_once_per_batch_after_a_change(monkeypatch):
+    signature = [(1, 1)]
+    monkeypatch.setattr(data_utils, 'get_data_signature', lambda filename, fmt='csv': signature[0])
+    utils.invalidate_planet_classifier()
+
+    classifier = utils.get_planet_classifier()
+    assert utils.get_planet_classifier() is classifier
+
+    # Per-planet calls skip the check, the next batch picks up the change
+    signature[0] = (2, 1)
+    assert utils.get_planet_classifier(check=False) is classifier
+    assert utils.get_planet_classifier() is not classifier
+    utils.invalidate_planet_classifier()
+
+
+def test_population_keeps_its_classifier(properties_df):
+    stars_df = data_utils.load_data('star_catalog').iloc[:50]
+    stars = obj_models.StarPopulation.from_dataframe(stars_df)
+    rng = np.random.default_rng(6)
+    population = obj_models.PlanetPopulation(rng.uniform(0.5, 15, 200), rng.uniform(1, 700, 200), stars,
+                                             rng.integers(0, 50, 200), rng=rng)
+    planet_type = population.planet_type
+    assert any(value is not None for value in planet_type)
+
+    # A classifier with renamed types built later does not change the population
+    renamed = properties_df.assign(exoplanet_type=properties_df['exoplanet_type'] + '_renamed')
+    utils._planet_classifier = (None, obj_models.PlanetClassifier(renamed))
+    try:
+        np.testing.assert_array_equal(population.planet_type, planet_type)
+        assert [planet.planet_type for planet in population] == list(planet_type)
+    finally:
+        utils.invalidate_planet_classifier()
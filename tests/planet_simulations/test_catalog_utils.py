@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from astropy import units as u
+
+from hwo_project import utils
+from hwo_project.planet_simulations import catalog_utils
+
+
+@pytest.fixture
+def planets_df():
+    rng = np.random.default_rng(0)
+    num_planets = 3000
+    planets_df = pd.DataFrame({
+        # Rounded so there are ties at the thresholds
+        'angular_separation': np.round(rng.lognormal(-2, 1, num_planets), 2),
+        'contrast': np.round(rng.lognormal(-22, 2, num_planets), 12),
+        'planet_type': rng.choice(['earths', 'neptunes', 'jupiters'], num_planets),
+    })
+    planets_df.loc[::97, 'contrast'] = np.nan
+    planets_df.loc[::89, 'planet_type'] = None
+    return planets_df
+
+
+def brute_force_count(planets_df, iwa, contrast_floor, exoplanet_type):
+    return int(np.count_nonzero((planets_df['angular_separation'] > iwa)
+                                & (planets_df['contrast'] > contrast_floor)
+                                & (planets_df['planet_type'] == exoplanet_type)))
+
+
+@pytest.mark.parametrize('block_size', [None, 7, 64, 10_000])
+def test_index_matches_brute_force(planets_df, block_size):
+    index = catalog_utils.ObservabilityIndex(planets_df, block_size=block_size)
+    rng = np.random.default_rng(1)
+
+    # Thresholds on the data values hit the ties, the extremes fall outside the data
+    iwa = np.concatenate([rng.choice(planets_df['angular_separation'], 200), [0, 1e9, -1]])
+    contrast_floor = np.concatenate([rng.choice(planets_df['contrast'].dropna(), 200), [0, 1, -1]])
+    exoplanet_type = rng.choice(['earths', 'neptunes', 'jupiters', 'unknown'], len(iwa))
+
+    counts = index.count_batch(iwa, contrast_floor, exoplanet_type)
+    expected = [brute_force_count(planets_df, *query) for query in zip(iwa, contrast_floor, exoplanet_type)]
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_telescope_counts_match_scans(planets_df):
+    tele_dict = {'small': {'iwa': 0.05, 'contrast_floor': 1e-10}, 'large': {'iwa': 0.2, 'contrast_floor': 1e-11}}
+    index = catalog_utils.ObservabilityIndex(planets_df)
+
+    counts = index.count_telescopes(tele_dict, ['earths', 'neptunes'])
+    for (telescope, exoplanet_type), count in counts.items():
+        assert count == catalog_utils.get_num_observable_planets(planets_df, tele_dict, telescope, exoplanet_type)
+        assert count == catalog_utils.get_num_observable_planets(index, tele_dict, telescope, exoplanet_type)
+
+
+def test_empty_type_index():
+    index = catalog_utils._TypeObservabilityIndex(np.array([]), np.array([]))
+    np.testing.assert_array_equal(index.count(np.array([0.1, 0.2]), np.array([1e-10, 0])), [0, 0])
+
+
+@pytest.mark.parametrize('num_chunks', [1, 4])
+def test_yield_hypercube_matches_per_design_counts(planets_df, num_chunks):
+    aperture_diameters = [4.0, 6.0, 8.0]
+    wavelengths = [500.0, 700.0, 1000.0]
+    contrast_floors = [1e-11, 1e-10, np.median(planets_df['contrast'].dropna())]
+    exoplanet_types = ['earths', 'jupiters']
+
+    bounds = np.linspace(0, len(planets_df), num_chunks + 1).astype(int)
+    chunks = planets_df if num_chunks == 1 else [planets_df.iloc[a:b] for a, b in zip(bounds[:-1], bounds[1:])]
+    cube = catalog_utils.get_yield_hypercube(chunks, aperture_diameters, wavelengths, contrast_floors,
+                                             exoplanet_types)
+
+    for exoplanet_type in exoplanet_types:
+        assert cube[exoplanet_type].shape == (3, 3, 3)
+        for i, aperture_diameter in enumerate(aperture_diameters):
+            for j, wavelength in enumerate(wavelengths):
+                _, iwa = utils.calculate_iwa(wavelength * u.nm, aperture_diameter * u.m)
+                for k, contrast_floor in enumerate(contrast_floors):
+                    tele_dict = {'design': {'iwa': iwa.value, 'contrast_floor': contrast_floor}}
+                    expected = catalog_utils.get_num_observable_planets(planets_df, tele_dict, 'design',
+                                                                        exoplanet_type)
+                    assert cube[exoplanet_type][i, j, k] == expected
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from hwo_project.planet_simulations import dist_planets_to_stars
+
+
+def test_assignment_matches_shuffled_list():
+    planets_per_star = np.random.default_rng(0).integers(0, 5, 500)
+    num_total_planets = int(planets_per_star.sum()) - 100
+
+    # Reference: shuffle a list of the planets and deal consecutive slices to the stars
+    planet_list = list(range(num_total_planets))
+    np.random.default_rng(1).shuffle(planet_list)
+    expected, start = [], 0
+    for num_planets in planets_per_star:
+        expected.append(planet_list[start:start + num_planets])
+        start += num_planets
+
+    planet_order, offsets = dist_planets_to_stars.assign_planets_to_stars_csr(planets_per_star, num_total_planets,
+                                                                              rng=np.random.default_rng(1))
+    assert [planet_order[a:b].tolist() for a, b in zip(offsets[:-1], offsets[1:])] == expected
+
+
+def test_host_stars_match_list_assignment():
+    planets_per_star = np.array([2, 0, 3, 1, 4])
+    num_total_planets = 8
+    planet_order, offsets = dist_planets_to_stars.assign_planets_to_stars_csr(planets_per_star, num_total_planets,
+                                                                              rng=np.random.default_rng(5))
+
+    # Reference: loop over the stars and give each of their planets the star index
+    expected = np.full(num_total_planets, -1)
+    for star, (start, end) in enumerate(zip(offsets[:-1], offsets[1:])):
+        expected[planet_order[start:end]] = star
+    host_star_idx = dist_planets_to_stars.get_host_star_index(planet_order, offsets, num_total_planets)
+    np.testing.assert_array_equal(host_star_idx, expected)
+    assert np.all(host_star_idx >= 0)
+
+    planets_df = pd.DataFrame({'planet_radius': np.arange(num_total_planets, dtype=float)})
+    stars_df = pd.DataFrame({'tic_id': [f'S{i}' for i in range(len(planets_per_star))]})
+    assigned = dist_planets_to_stars.assign_host_stars(planets_df, stars_df, planet_order, offsets)
+    np.testing.assert_array_equal(assigned['host_star_id'], stars_df['tic_id'].to_numpy()[expected])
+
+    # The list-of-lists API gives the same hosts
+    planet_indices = [planet_order[start:end].tolist() for start, end in zip(offsets[:-1], offsets[1:])]
+    pd.testing.assert_frame_equal(dist_planets_to_stars.assign_star_ids_to_planets(planets_df, stars_df, planet_indices),
+                                  assigned)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from hwo_project.planet_simulations import gen_inclinations
+from hwo_project.star_data_extraction import star_data_extract
+
+
+def test_inclinations_follow_cos_density():
+    inclinations = gen_inclinations.sample_inclinations(200_000, rng=np.random.default_rng(0))
+    assert np.all((inclinations >= 0) & (inclinations <= 90))
+    assert stats.kstest(inclinations, lambda i: np.sin(np.radians(np.clip(i, 0, 90)))).pvalue > 1e-3
+
+
+def test_planet_inclinations_do_not_depend_on_chunks():
+    rng = np.random.default_rng(1)
+    host_inclination = gen_inclinations.sample_inclinations(300, rng=rng)
+    host_idx = rng.integers(0, 300, 5000)
+
+    full = gen_inclinations.sample_planet_inclinations(host_inclination, host_idx, rng=np.random.default_rng(2))
+    for chunk_size in [1, 999, 4096]:
+        chunked = gen_inclinations.sample_planet_inclinations(host_inclination, host_idx, rng=np.random.default_rng(2),
+                                                              chunk_size=chunk_size)
+        np.testing.assert_array_equal(chunked, full)
+    assert np.all((full >= 0) & (full <= 90))
+
+    # Coplanar systems keep the inclination of their host
+    coplanar = gen_inclinations.sample_planet_inclinations(host_inclination, host_idx, scale=0, rng=3)
+    np.testing.assert_allclose(coplanar, host_inclination[host_idx], atol=1e-9)
+
+
+def test_mutual_inclinations_follow_rayleigh():
+    # Face-on systems, the planet inclination is the mutual inclination
+    inclinations = gen_inclinations.sample_planet_inclinations(np.zeros(1), np.zeros(100_000, dtype=int), rng=4)
+    assert stats.kstest(inclinations, stats.rayleigh(scale=gen_inclinations.MUTUAL_INCLINATION_SCALE).cdf).pvalue > 1e-3
+
+
+@pytest.mark.parametrize('make_rng', [lambda: np.random.RandomState(5), lambda: np.random])
+def test_legacy_generators(make_rng):
+    rng = make_rng()
+    inclinations = gen_inclinations.sample_inclinations(1000, rng=rng)
+    planets = gen_inclinations.sample_planet_inclinations(inclinations, np.arange(1000) % 7, rng=rng, chunk_size=100)
+    assert np.all((inclinations >= 0) & (inclinations <= 90))
+    assert np.all((planets >= 0) & (planets <= 90))
+
+    if isinstance(rng, np.random.RandomState):
+        np.testing.assert_array_equal(gen_inclinations.sample_inclinations(1000, rng=np.random.RandomState(5)),
+                                      inclinations)
+
+
+def test_star_inclinations_from_a_legacy_generator():
+    raw_df = pd.DataFrame({column: np.arange(1.0, 11.0) for column in star_data_extract.RAW_STAR_DTYPES})
+    stars_df = star_data_extract.clean_star_data(raw_df, seed=np.random.RandomState(6))
+    assert np.all((stars_df['inclination'] >= 0) & (stars_df['inclination'] <= 90))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from hwo_project.planet_simulations import gen_planets
+
+
+@pytest.fixture
+def grid():
+    grid = np.random.default_rng(0).random((6, 9))
+    grid[2, :] = 0
+    grid[:, 4] = 0
+    return grid
+
+
+def test_grid_cells_match_linear_scan(grid):
+    cdf = gen_planets.build_grid_cdf(grid)
+    cells = gen_planets.sample_grid_cells(cdf, 5000, rng=np.random.default_rng(1))
+
+    # Reference: the first cell whose cumulative probability exceeds the uniform draw
+    randu = np.random.default_rng(1).uniform(size=5000)
+    expected = np.array([np.argmax(cdf > u) for u in randu])
+    np.testing.assert_array_equal(cells, expected)
+
+
+def test_empty_cells_are_never_drawn(grid):
+    cdf = gen_planets.build_grid_cdf(grid)
+    cells = gen_planets.sample_grid_cells(cdf, 100_000, rng=np.random.default_rng(2))
+    assert np.all(grid.ravel()[cells] > 0)
+
+
+def test_cell_frequencies_follow_grid(grid):
+    cdf = gen_planets.build_grid_cdf(grid)
+    num_draws = 400_000
+    cells = gen_planets.sample_grid_cells(cdf, num_draws, rng=np.random.default_rng(3))
+
+    expected = grid.ravel() / grid.sum() * num_draws
+    counts = np.bincount(cells, minlength=grid.size)
+    # Within 5 sigma of the binomial counts
+    assert np.all(np.abs(counts - expected) <= 5 * np.sqrt(expected) + 1)
+
+
+def test_spread_in_cell_stays_in_cell(grid):
+    R = np.arange(grid.shape[0] + 1, dtype=float)
+    P = 10 * np.arange(grid.shape[1] + 1, dtype=float)
+    cdf = gen_planets.build_grid_cdf(grid)
+
+    snapped = gen_planets.sample_planet_grid(R, P, cdf, grid.shape, 1000, rng=np.random.default_rng(4))
+    spread = gen_planets.sample_planet_grid(R, P, cdf, grid.shape, 1000, rng=np.random.default_rng(4),
+                                            spread_in_cell=True)
+    for lower, values, width in zip(snapped, spread, (1, 10)):
+        assert np.all((values >= lower) & (values < lower + width))
+
+    with pytest.raises(ValueError):
+        gen_planets.sample_planet_grid(R[:-1], P[:-1], cdf, grid.shape, 10, spread_in_cell=True)
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('scipy')
+
+from hwo_project.planet_simulations.pdf import calc_n_dist, gen_r_vs_A_pdf
+
+
+def test_analytic_grid_matches_dblquad():
+    _, _, analytic = gen_r_vs_A_pdf.compute_integral(method='analytic')
+    _, _, numeric = gen_r_vs_A_pdf.compute_integral(method='dblquad')
+    np.testing.assert_allclose(analytic, numeric, rtol=1e-6, atol=0)
+
+
+def test_analytic_grid_matches_dblquad_on_fine_cells_across_the_break():
+    # Cells on both sides of the SAG13 break at 3.4 Earth radii, one straddling it
+    R = np.array([3.0, 3.3, 3.5, 3.9])
+    P = np.array([10, 11, 13]) / 365.25
+    np.testing.assert_allclose(calc_n_dist.compute_sum_grid(R, P),
+                               gen_r_vs_A_pdf.compute_integral_dblquad(R, P), rtol=1e-6, atol=0)
+
+
+def test_validate_and_unknown_method():
+    gen_r_vs_A_pdf.compute_integral(validate=True)
+    with pytest.raises(ValueError):
+        gen_r_vs_A_pdf.compute_integral(method='trapezoid')
+
+
+def test_power_law_integral_in_log_space():
+    assert np.isclose(calc_n_dist.integrate_power_law_log(1.0, np.e, 0), 1.0)
+    # Integral of x^2 d(ln x) = x^2 / 2
+    assert np.isclose(calc_n_dist.integrate_power_law_log(1.0, 3.0, 2), (9 - 1) / 2)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project import utils
+from hwo_project.data import data_utils
+from hwo_project.models import obj_models
+from hwo_project.planet_simulations import dist_planets_to_stars, make_planet_catalog
+
+
+@pytest.fixture
+def stars_df():
+    # Duplicated tic_ids, the last row wins
+    return pd.DataFrame({'tic_id': [f'S{i % 40}' for i in range(50)], 'ra': np.arange(50.0), 'dec': 0.0,
+                         'sy_dist': 10.0, 'st_mass': 1.0, 'inclination': 60.0, 'st_lum': 0.0})
+
+
+@pytest.fixture
+def assigned_df(stars_df):
+    planets_per_star = np.random.default_rng(0).integers(0, 4, len(stars_df))
+    planet_order, offsets = dist_planets_to_stars.assign_planets_to_stars_csr(
+        planets_per_star, int(planets_per_star.sum()), rng=np.random.default_rng(1))
+    planets_df = pd.DataFrame({'planet_radius': np.ones(len(planet_order))})
+    return dist_planets_to_stars.assign_host_stars(planets_df, stars_df, planet_order, offsets)
+
+
+def test_host_star_codes_match_lookup(stars_df, assigned_df):
+    expected = obj_models.StarIndex(stars_df['tic_id']).get_rows(assigned_df['host_star_id'])
+    np.testing.assert_array_equal(make_planet_catalog.lookup_host_stars(assigned_df, stars_df), expected)
+
+    # Without the signature the codes are checked against host_star_id
+    unsigned = assigned_df.copy()
+    unsigned.attrs.clear()
+    np.testing.assert_array_equal(make_planet_catalog.lookup_host_stars(unsigned, stars_df), expected)
+
+
+def test_codes_without_signature_are_checked_for_every_planet(stars_df, assigned_df):
+    planets_df = assigned_df.copy()
+    planets_df.attrs.clear()
+    # One wrong code is enough to fall back to the host_star_id lookup
+    codes = planets_df['host_star_idx'].to_numpy().copy()
+    codes[len(codes) // 3] = (codes[len(codes) // 3] + 1) % 40
+    planets_df['host_star_idx'] = codes
+
+    expected = obj_models.StarIndex(stars_df['tic_id']).get_rows(planets_df['host_star_id'])
+    np.testing.assert_array_equal(make_planet_catalog.lookup_host_stars(planets_df, stars_df), expected)
+
+
+def test_codes_of_another_star_table_are_not_trusted(stars_df, assigned_df):
+    reordered = stars_df.iloc[::-1].reset_index(drop=True)
+    expected = obj_models.StarIndex(reordered['tic_id']).get_rows(assigned_df['host_star_id'])
+    np.testing.assert_array_equal(make_planet_catalog.lookup_host_stars(assigned_df, reordered), expected)
+
+
+def test_signature_is_kept_in_binary_tables(tmp_path, assigned_df):
+    path = str(tmp_path / 'planets.columns')
+    data_utils.write_table(assigned_df, path)
+    assert data_utils.read_table(path).attrs['host_star_signature'] == assigned_df.attrs['host_star_signature']
+
+
+def test_star_index_is_cached_per_dataframe(monkeypatch, stars_df):
+    builds = []
+    star_index = obj_models.StarIndex
+    monkeypatch.setattr(obj_models, 'StarIndex', lambda tic_ids: builds.append(1) or star_index(tic_ids))
+
+    for tic_id in ['S3', 'S12', 'S3', 'S39']:
+        assert utils.create_star_from_tic_id(tic_id, stars_df).ra == stars_df['ra'][stars_df['tic_id'] == tic_id].iloc[-1]
+    assert len(builds) == 1
+
+    # Changed in place, the stale index is rebuilt
+    stars_df.loc[3, 'tic_id'] = 'S99'
+    assert utils.create_star_from_tic_id('S99', stars_df).ra == 3
+    assert utils.create_star_from_tic_id('S3', stars_df).ra == 43
+    assert len(builds) == 2
+
+    with pytest.raises(ValueError):
+        utils.create_star_from_tic_id('S1000', stars_df)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from hwo_project import utils
+from hwo_project.planet_simulations import orbit_observability
+
+TELE_DICT = {'small': {'iwa': 0.04, 'contrast_floor': 1e-10}, 'large': {'iwa': 0.02, 'contrast_floor': 1e-11}}
+
+
+@pytest.fixture
+def planets():
+    rng = np.random.default_rng(5)
+    num_planets = 150
+    return {
+        'orbital_radius': rng.uniform(0.1, 5, num_planets),
+        'planet_radius': rng.uniform(0.5, 15, num_planets),
+        'albedo': np.where(rng.random(num_planets) < 0.1, np.nan, rng.uniform(0.1, 0.6, num_planets)),
+        'inclination': np.degrees(np.arccos(rng.uniform(-1, 1, num_planets))),
+        'distance': rng.uniform(3, 30, num_planets),
+    }
+
+
+def brute_force_fractions(planets, num_phases):
+    fractions = {telescope: np.zeros(len(planets['orbital_radius'])) for telescope in TELE_DICT}
+    for i in range(len(planets['orbital_radius'])):
+        for t in range(num_phases):
+            phi = t * 360 / num_phases
+            separation = utils.get_pos_radius(planets['orbital_radius'][i], phi, planets['inclination'][i]) / \
+                planets['distance'][i]
+            alpha = np.degrees(np.arccos(np.sin(np.radians(phi)) * np.sin(np.radians(planets['inclination'][i]))))
+            contrast = utils.get_lambertian_contrast(planets['albedo'][i], planets['planet_radius'][i],
+                                                     planets['orbital_radius'][i],
+                                                     p_alpha=utils.calculate_lambertian_phase_function(alpha))
+            for telescope, constraints in TELE_DICT.items():
+                if separation > constraints['iwa'] and contrast > constraints['contrast_floor']:
+                    fractions[telescope][i] += 1 / num_phases
+    return fractions
+
+
+def test_fractions_match_brute_force(planets):
+    fractions = orbit_observability.compute_orbit_fractions(tele_dict=TELE_DICT, num_phases=72, **planets)
+    expected = brute_force_fractions(planets, 72)
+    for telescope in TELE_DICT:
+        np.testing.assert_allclose(fractions[telescope], expected[telescope], atol=1e-12)
+        assert np.all(fractions[telescope][np.isnan(planets['albedo'])] == 0)
+
+
+@pytest.mark.parametrize('max_elements', [1, 360, 1000])
+def test_fractions_do_not_depend_on_chunks(planets, max_elements):
+    fractions = orbit_observability.compute_orbit_fractions(tele_dict=TELE_DICT, **planets)
+    chunked = orbit_observability.compute_orbit_fractions(tele_dict=TELE_DICT, max_elements=max_elements, **planets)
+    for telescope in TELE_DICT:
+        np.testing.assert_allclose(chunked[telescope], fractions[telescope], atol=1e-12)
+
+
+def test_chunks_cover_the_planets():
+    chunks = list(orbit_observability.iter_orbit_chunks(1000, 360, 360 * 64))
+    assert all(chunk.stop - chunk.start <= 64 for chunk in chunks)
+    np.testing.assert_array_equal(np.concatenate([np.arange(1000)[chunk] for chunk in chunks]), np.arange(1000))
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from hwo_project.data import data_utils
+from hwo_project.planet_simulations import dist_planets_to_stars, gen_planets, make_planet_catalog, pipeline
+
+
+@pytest.fixture(scope='module')
+def stars_df():
+    return data_utils.load_data('star_catalog').iloc[:2000].reset_index(drop=True)
+
+
+def test_pipeline_is_reproducible_and_matches_stages(stars_df):
+    tables = pipeline.run_pipeline(3000, seed=9, stars_df=stars_df)
+    again = pipeline.run_pipeline(3000, seed=9, stars_df=stars_df)
+    for name in ['random_planets', 'assigned_planets', 'planet_catalog']:
+        pd.testing.assert_frame_equal(tables[name], again[name])
+
+    # The stages run one by one with the same seed draw from the same streams
+    random_planets = gen_planets.simulate_random_planets(R=gen_planets.R_BINS, P=gen_planets.P_BINS,
+                                                         grid=data_utils.load_data('pdf_grid'), nplanets=3000, seed=9)
+    assigned_planets = dist_planets_to_stars.distribute_planets_to_stars(random_planets, stars_df, seed=9)
+    planet_catalog = make_planet_catalog.create_planet_catalog(assigned_planets, stars_df, seed=9)
+
+    pd.testing.assert_frame_equal(random_planets, tables['random_planets'])
+    pd.testing.assert_frame_equal(assigned_planets, tables['assigned_planets'])
+    pd.testing.assert_frame_equal(planet_catalog, tables['planet_catalog'])
@@ -0,0 +1,32 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from hwo_project import random_streams
+from hwo_project.data import data_utils
+from hwo_project.planet_simulations import dist_planets_to_stars, stream_catalog
+
+
+@pytest.fixture(scope='module')
+def stars_df():
+    return data_utils.load_data('star_catalog').iloc[:2000].reset_index(drop=True)
+
+
+def catalog_chunks(stars_df, executor=None):
+    planets_per_star = dist_planets_to_stars.generate_planets_per_star(len(stars_df), 2000, 7, 1, seed=11)
+    host_chunks = stream_catalog.iter_host_chunks(planets_per_star, 300)
+    chunks = stream_catalog.iter_catalog_chunks(host_chunks, stars_df, data_utils.load_data('pdf_grid'),
+                                                random_streams.stage_seed_seq(11, 'catalog_chunks'),
+                                                executor=executor, max_pending=3)
+    return pd.concat(list(chunks), ignore_index=True)
+
+
+def test_streaming_catalog_does_not_depend_on_workers(stars_df):
+    serial = catalog_chunks(stars_df)
+    assert len(serial) == 2000
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pd.testing.assert_frame_equal(catalog_chunks(stars_df, executor), serial)
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        pd.testing.assert_frame_equal(catalog_chunks(stars_df, executor), serial)
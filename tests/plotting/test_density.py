@@ -0,0 +1,51 @@
+import matplotlib
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project.plotting import density, figure_batch
+
+matplotlib.use('Agg')
+
+
+@pytest.fixture
+def small_df():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'angular_separation': rng.uniform(0, 0.2, 100), 'contrast': 10 ** rng.uniform(-11, -2, 100),
+                         'planet_type': 'earths', 'orbital_radius': rng.uniform(0.1, 3, 100),
+                         'planet_radius': rng.uniform(0.5, 10, 100)})
+
+
+def test_plot_dpi_follows_mode(small_df):
+    assert density.get_plot_dpi(small_df) == density.SCATTER_DPI
+    assert density.get_plot_dpi(small_df, mode='density') == density.DENSITY_DPI
+    assert density.get_plot_dpi(small_df, mode='density', dpi=72) == 72
+    # The batch calls it with every argument of the plotting function
+    assert density.get_plot_dpi(df=small_df, save=False) == density.SCATTER_DPI
+
+
+@pytest.mark.parametrize('name', ['contrast_vs_angular_separation', 'simulated_planet_populations'])
+@pytest.mark.parametrize('mode', ['scatter', 'density'])
+def test_catalog_plots_save_at_the_mode_resolution(monkeypatch, small_df, name, mode):
+    import matplotlib.pyplot as plt
+
+    saved = []
+    monkeypatch.setattr(plt, 'savefig', lambda path, dpi: saved.append(dpi))
+    plot = figure_batch.resolve(figure_batch.FIGURES[name]['func'])
+    try:
+        plot(df=small_df, mode=mode)
+    finally:
+        plt.close('all')
+    assert saved == [density.SCATTER_DPI if mode == 'scatter' else density.DENSITY_DPI]
+
+
+def test_batch_resolves_the_registered_dpi(monkeypatch, tmp_path, small_df):
+    from PIL import Image
+
+    monkeypatch.setattr(density, 'MAX_SCATTER_POINTS', 10)
+    monkeypatch.setitem(figure_batch._shared_inputs, 'planet_catalog', small_df)
+    path = str(tmp_path / 'contrast.png')
+    figure_batch._render(figure_batch.FIGURES['contrast_vs_angular_separation'], path,
+                         figure_batch.FIGURES['contrast_vs_angular_separation']['dpi'])
+    # 20 x 10 inches at DENSITY_DPI
+    assert Image.open(path).size == (20 * density.DENSITY_DPI, 10 * density.DENSITY_DPI)
@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project.data import data_utils
+from hwo_project.plotting import density, figure_batch
+
+
+@pytest.fixture
+def data_paths(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    paths = {'planet_catalog': str(tmp_path / 'planets.csv'), 'tele_constraints': str(tmp_path / 'tele.json')}
+    pd.DataFrame({'angular_separation': rng.uniform(0, 0.2, 100), 'contrast': 10 ** rng.uniform(-11, -2, 100),
+                  'planet_type': 'earths'}).to_csv(paths['planet_catalog'], index=False)
+    with open(paths['tele_constraints'], 'w') as f:
+        json.dump({'hwo': {'iwa': 0.05, 'contrast_floor': 1e-10}, '30m': {'iwa': 0.01, 'contrast_floor': 1e-8}}, f)
+
+    monkeypatch.setattr(data_utils, 'get_data_paths', lambda: paths)
+    monkeypatch.setattr(data_utils, 'get_manifest_dir', lambda: str(tmp_path / 'manifests'))
+    # Density images render at a low resolution, so the test stays fast
+    monkeypatch.setattr(density, 'MAX_SCATTER_POINTS', 10)
+    return paths
+
+
+def test_contrast_figure_depends_on_telescope_constraints(tmp_path, data_paths):
+    def render():
+        return figure_batch.render_figures(['contrast_vs_angular_separation'], fig_dir=str(tmp_path / 'figures'),
+                                           num_workers=1, verbose=False)['contrast_vs_angular_separation']
+
+    assert render() is True
+    assert render() is False
+
+    with open(data_paths['tele_constraints'], 'w') as f:
+        json.dump({'hwo': {'iwa': 0.06, 'contrast_floor': 1e-10}, '30m': {'iwa': 0.01, 'contrast_floor': 1e-8}}, f)
+    assert render() is True
+
+    os.remove(data_paths['tele_constraints'])
+    assert render() is None
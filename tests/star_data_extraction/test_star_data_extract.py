@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hwo_project.data import data_utils
+from hwo_project.star_data_extraction import star_data_extract
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / 'cache')
+    monkeypatch.setattr(data_utils, 'get_ingest_cache_dir', lambda: cache_dir)
+    return cache_dir
+
+
+def write_raw_stars(path, sep='|', num_stars=20, offset=0):
+    df = pd.DataFrame({column: np.arange(num_stars, dtype=float) + offset
+                       for column in star_data_extract.RAW_STAR_DTYPES})
+    df['extra'] = 'unused'
+    with open(path, 'w') as f:
+        f.write('\n'.join(sep.join(map(str, row)) for row in [df.columns, *df.itertuples(index=False)]) + '\n')
+    return df[list(star_data_extract.RAW_STAR_DTYPES)]
+
+
+def cached_tables(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.startswith('raw_stars_'))
+
+
+def test_cached_read_matches_parse(tmp_path, cache_dir):
+    path = str(tmp_path / 'stars.csv')
+    expected = write_raw_stars(path)
+
+    pd.testing.assert_frame_equal(star_data_extract.read_raw_stars(path), expected)
+    assert len(cached_tables(cache_dir)) == 1
+    pd.testing.assert_frame_equal(star_data_extract.read_raw_stars(path), expected)
+    pd.testing.assert_frame_equal(star_data_extract.read_raw_stars(path, cache=False), expected)
+
+
+def test_cache_key_covers_types_and_separator(tmp_path, cache_dir, monkeypatch):
+    path = str(tmp_path / 'stars.csv')
+    write_raw_stars(path, sep='::')
+
+    # Multi-character separators are part of the key too
+    key = star_data_extract._schema_hash('::')
+    assert key != star_data_extract._schema_hash('|')
+    assert len(star_data_extract.read_raw_stars(path, sep='::')) == 20
+    assert key in cached_tables(cache_dir)[0]
+
+    monkeypatch.setitem(star_data_extract.RAW_STAR_DTYPES, 'ra', np.float32)
+    assert star_data_extract._schema_hash('::') != key
+    assert star_data_extract.read_raw_stars(path, sep='::')['ra'].dtype == np.float32
+
+
+def test_old_caches_of_a_source_are_removed(tmp_path, cache_dir):
+    path = str(tmp_path / 'stars.csv')
+    other = str(tmp_path / 'other.csv')
+    write_raw_stars(path)
+    write_raw_stars(other)
+    star_data_extract.read_raw_stars(path)
+    star_data_extract.read_raw_stars(other)
+    assert len(cached_tables(cache_dir)) == 2
+
+    # A changed source replaces its own cached table only
+    expected = write_raw_stars(path, num_stars=30, offset=1)
+    pd.testing.assert_frame_equal(star_data_extract.read_raw_stars(path), expected)
+    tables = cached_tables(cache_dir)
+    assert len(tables) == 2
+    assert sum(star_data_extract._source_id(path) in table for table in tables) == 1
+
+    # A source that no longer exists loses its entry and its table
+    os.remove(other)
+    write_raw_stars(path, num_stars=10)
+    star_data_extract.read_raw_stars(path)
+    assert len(cached_tables(cache_dir)) == 1
+    assert list(star_data_extract._read_sources(cache_dir)) == [os.path.abspath(path)]
@@ -0,0 +1,21 @@
+from hwo_project import instrumentation
+
+
+def test_only_the_named_stage_is_profiled(tmp_path):
+    instrumentation.reset()
+    instrumentation.enable(profile_stage='stage.b', profile_dir=str(tmp_path))
+    try:
+        for name in ['a', 'b', 'b']:
+            with instrumentation.stage(f'stage.{name}'):
+                # Nested stages with the same name share the outer profile
+                with instrumentation.stage(f'stage.{name}'):
+                    sum(range(10000))
+        report = instrumentation.get_report()
+    finally:
+        instrumentation.disable()
+        instrumentation.reset()
+
+    stages = {stage['name']: stage for stage in report['stages']}
+    assert 'profile' in stages['stage.b'] and 'profile' not in stages['stage.a']
+    assert all('process_peak_rss_mb' in stage and 'peak_rss_increase_mb' in stage for stage in stages.values())
+    assert [path.name for path in tmp_path.iterdir()] == ['stage.b.prof']
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from hwo_project import random_streams, utils
+
+
+def test_item_draws_reject_seeds():
+    with pytest.raises(TypeError):
+        utils.get_exoplanet_type(1.0, 1.0, rng=3)
+
+
+def test_stage_streams_are_independent_and_reproducible():
+    draws = {stage: random_streams.get_rng(7, stage).random(5) for stage in random_streams.STAGE_KEYS}
+    for stage, values in draws.items():
+        np.testing.assert_array_equal(random_streams.get_rng(7, stage).random(5), values)
+    assert len({tuple(values) for values in draws.values()}) == len(draws)
+
+    # Generators are threaded through unchanged
+    rng = np.random.default_rng(0)
+    assert random_streams.get_rng(rng, 'inclinations') is rng
+    assert random_streams.get_item_rng(rng) is rng
+
+
+def test_chunk_streams_depend_only_on_the_index():
+    seed_seq = random_streams.stage_seed_seq(3, 'catalog_chunks')
+    forward = [random_streams.chunk_rng(seed_seq, index).random(3) for index in range(4)]
+    backward = [random_streams.chunk_rng(seed_seq, index).random(3) for index in reversed(range(4))][::-1]
+    np.testing.assert_array_equal(forward, backward)
@@ -0,0 +1,36 @@
+import numpy as np
+from astropy import units as u
+
+from hwo_project import utils
+
+
+def test_unit_free_conversions_match_astropy():
+    rng = np.random.default_rng(4)
+    period = rng.uniform(0.5, 1e5, 1000)
+    mass = rng.uniform(0.1, 3, 1000)
+
+    np.testing.assert_allclose(utils.convert_period_to_orbital_radius(period, mass),
+                               utils.convert_period_to_orbital_radius(period, mass, use_astropy=True), rtol=1e-12)
+
+    radius = rng.uniform(0.1, 25, 1000)
+    np.testing.assert_allclose(utils.convert_earth_radius_to_aus(radius),
+                               utils.convert_earth_radius_to_aus(radius, use_astropy=True), rtol=1e-15)
+
+
+def test_unit_free_conversions_of_scalars():
+    # One year around the Sun is one AU
+    assert np.isclose(utils.convert_period_to_orbital_radius(365.25, 1.0), 1.0, rtol=1e-4)
+    assert np.isclose(utils.convert_period_to_orbital_radius(30.0, 0.8),
+                      utils.convert_period_to_orbital_radius(30.0, 0.8, use_astropy=True), rtol=1e-12)
+    assert np.isclose(utils.convert_earth_radius_to_aus(1.0), utils.EARTH_RADIUS_AU)
+
+
+def test_iwa_array_matches_astropy():
+    wavelengths = np.array([450.0, 700.0, 1000.0])
+    aperture_diameters = np.array([2.4, 6.0, 8.0, 12.0])
+    iwa = utils.calculate_iwa_array(wavelengths[None, :], aperture_diameters[:, None])
+
+    for i, aperture_diameter in enumerate(aperture_diameters):
+        for j, wavelength in enumerate(wavelengths):
+            _, expected = utils.calculate_iwa(wavelength * u.nm, aperture_diameter * u.m)
+            assert np.isclose(iwa[i, j], expected.value, rtol=1e-12)